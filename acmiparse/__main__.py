@@ -0,0 +1,63 @@
+# __main__.py
+"""
+命令行入口：加载一个 .acmi 文件并打印概要
+用法：
+    python -m acmiparse data/flyingdata0.acmi
+    python -m acmiparse data/flyingdata0.zip.acmi --profile          # 分阶段耗时与计数
+    python -m acmiparse data/flyingdata0.acmi --profile --json       # 以 JSON 输出指标
+"""
+import argparse
+import json
+import logging
+import sys
+
+from .parser import load_acmi
+from .profiling import profile
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog='python -m acmiparse', description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file')
+    ap.add_argument('--columnar', action='store_true', help='加载为列式存储')
+    ap.add_argument('--compact-properties', action='store_true', help='对象属性使用共享属性表')
+    ap.add_argument('--start', type=float)
+    ap.add_argument('--end', type=float)
+    ap.add_argument('--no-index', action='store_true', help='不建立 id 索引')
+    ap.add_argument('--profile', action='store_true', help='输出分阶段耗时与计数')
+    ap.add_argument('--json', action='store_true', help='--profile 的结果以 JSON 输出')
+    args = ap.parse_args(argv)
+    logging.basicConfig(level=logging.ERROR if args.profile else logging.WARNING)
+
+    def run():
+        acmi = load_acmi(args.file, columnar=args.columnar, compact_properties=args.compact_properties,
+                         start=args.start, end=args.end)
+        if args.no_index:
+            return acmi, None
+        acmi._ensure_index()   # ids 取自加载时的概要，按 id 分组的索引需单独建立(profile 中的 index 阶段)
+        return acmi, acmi.ids
+
+    if not args.profile:
+        acmi, ids = run()
+        _summary(acmi, ids)
+        return 0
+    with profile() as m:
+        acmi, ids = run()
+    if args.json:
+        print(json.dumps(m.snapshot(), ensure_ascii=False, indent=2))
+    else:
+        _summary(acmi, ids)
+        print()
+        print(m.report())
+    return 0
+
+
+def _summary(acmi, ids) -> None:
+    frames = acmi.frames
+    span = f"{frames[0].timestamp:.2f} - {frames[-1].timestamp:.2f}s" if len(frames) else '-'
+    print(f"{acmi.header.file_type} {acmi.header.file_version}")
+    print(f"帧 {len(frames):,} ({span})" + (f"，对象 {len(ids):,} 个" if ids is not None else ''))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,20 +1,60 @@
 # acmi_file.py
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import List, Dict, Iterable, Any
+from typing import List, Dict, Iterable, Any, Optional, TextIO, Union, Tuple
 from collections import defaultdict
+from array import array
 import csv
 import io
 from .model import *
+from . import profiling
 
+import numpy as np
 import pandas as pd  # 可选依赖，仅用于 to_df
 
+# 子对象字段 -> 对应 dataclass，用于把短列名(如 altitude)解析为扁平列名
+_SUB_OBJECTS = (
+    ('object_coordinates', ACMIObjectCoordinates),
+    ('object_properties', ACMIObjectProperties),
+    ('object_events', ACMIEvent),
+)
+_COORD_FIELD_POS = {f: i for i, f in enumerate(ACMIObjectCoordinates.__dataclass_fields__)}
+_COORD_COLUMNS = [f'object_coordinates.{f}' for f in ACMIObjectCoordinates.__dataclass_fields__]
+
 # ---------- 基础工具 ----------
 @dataclass(slots=True)
-class FrameObjectRef:
-    """定位对象：第几帧、帧内第几个"""
-    frame_index: int
-    object_index: int
+class _IdIndex:
+    """
+    id 索引：按 object_id 稳定排序的平行数组，每条更新只占 8 字节
+    第 i 个 id 的记录为 frame_index / object_index[bounds[i]:bounds[i + 1]]
+    """
+    ids: np.ndarray             # uint64，升序去重
+    bounds: np.ndarray          # int64
+    frame_index: np.ndarray     # int32，第几帧
+    object_index: np.ndarray    # int32，帧内第几个
+    positions: Dict[int, int]   # object_id -> i
+
+    @classmethod
+    def build(cls, frames: List['ACMIFrame']) -> '_IdIndex':
+        oids, fidx, oidx = array('Q'), array('i'), array('i')
+        for f, frame in enumerate(frames):
+            objs = frame.objects
+            oids.extend([o.object_id for o in objs])
+            fidx.extend(array('i', [f]) * len(objs))
+            oidx.extend(range(len(objs)))
+        keys = np.frombuffer(oids, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        ids, starts = np.unique(keys[order], return_index=True)
+        return cls(ids, np.append(starts, len(order)),
+                   np.frombuffer(fidx, dtype=np.int32)[order],
+                   np.frombuffer(oidx, dtype=np.int32)[order],
+                   {oid: i for i, oid in enumerate(ids.tolist())})
+
+    def span(self, object_id: int) -> Tuple[int, int]:
+        i = self.positions.get(object_id)
+        if i is None:
+            return 0, 0
+        return int(self.bounds[i]), int(self.bounds[i + 1])
 
 
 @dataclass(slots=True, frozen=True)
@@ -29,9 +69,9 @@ class IdView:
     # ---------- 魔法方法 ----------
     def __getattr__(self, col: str) -> List[Any]:
         """支持 obj.altitude 形式"""
-        if col in self._file.columns:
-            return self._file._column_for_id(self._id, col)
-        raise AttributeError(col)
+        if col.startswith('_'):
+            raise AttributeError(col)
+        return self._file._column_for_id(self._id, _resolve_column(col))
 
     def __getitem__(self, item):
         return self._file.id_objects(self._id)[item]
@@ -50,6 +90,31 @@ class IdView:
     def to_df(self) -> pd.DataFrame:
         return self._file._id_to_df([self._id])
 
+    def to_arrays(self, columns: Iterable[str] | None = None) -> Dict[str, np.ndarray]:
+        return self._file.id_arrays(self._id, columns)
+
+
+def _resolve_column(col: str) -> str:
+    """短列名 -> 扁平列名，如 altitude -> object_coordinates.altitude"""
+    if '.' in col or col in ACMIObject.__dataclass_fields__:
+        return col
+    for head, cls in _SUB_OBJECTS:
+        if col in cls.__dataclass_fields__:
+            return f"{head}.{col}"
+    raise AttributeError(col)
+
+
+def _to_array(values: List[Any]) -> np.ndarray:
+    """数值列转 float64(None -> NaN)，其余保持 object"""
+    if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+        if values and all(isinstance(v, int) for v in values):
+            return np.asarray(values, dtype=np.int64) if all(abs(v) < 2 ** 63 for v in values) \
+                else np.asarray(values, dtype=np.uint64)
+        return np.asarray([np.nan if v is None else v for v in values], dtype=np.float64)
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
 
 class ObjectCollection:
     """dict-like 代理，支持 acmi.objects[12345] / acmi.objects[:]"""
@@ -58,7 +123,7 @@ class ObjectCollection:
 
     def __getitem__(self, key):
         if isinstance(key, slice):
-            return [o for frame in self._file.frames for o in frame.objects][key]
+            return self._file._objects_slice(key)
         if isinstance(key, int):
             return IdView(key, self._file)
         raise TypeError('key must be int or slice')
@@ -67,7 +132,7 @@ class ObjectCollection:
         return (o for frame in self._file.frames for o in frame.objects)
 
     def __len__(self):
-        return sum(len(f.objects) for f in self._file.frames)
+        return self._file.summary.updates
 
 
 # ---------- 主文件模型 ----------
@@ -78,17 +143,40 @@ class ACMIFile:
     frames: List['ACMIFrame']
 
     # ---------- 内部 ----------
-    _id_index: Dict[int, List[FrameObjectRef]] = field(
-        init=False, repr=False, default_factory=lambda: defaultdict(list)
-    )
+    _id_index: Optional[_IdIndex] = field(init=False, repr=False, default=None)
     _index_built: bool = field(init=False, repr=False, default=False)
+    _event_log: Optional[List[Tuple[float, ACMIEvent]]] = field(init=False, repr=False, default=None)  # 加载时收集
+    _event_table: Optional['EventTable'] = field(init=False, repr=False, default=None)
+    _summary: Optional['ACMISummary'] = field(init=False, repr=False, default=None)  # 加载时增量维护
+    _removal_log: Optional[List[Tuple[int, float, int]]] = field(init=False, repr=False, default=None)  # (此前更新条数, 时间, id)
+    _lifecycle: Optional['LifecycleTable'] = field(init=False, repr=False, default=None)
 
     # ---------- 公开属性 ----------
+    @property
+    def events(self) -> 'EventTable':
+        """按时间排序、带类型/id 索引的事件表(首次访问时建立)"""
+        if self._event_table is None:
+            self._event_table = self._build_events()
+        return self._event_table
+
+    @property
+    def summary(self) -> 'ACMISummary':
+        """文件概要(id、各 id 首末时间/次数/Type/Name、列、帧数与时间跨度)"""
+        if self._summary is None:
+            self._summary = self._build_summary()
+        return self._summary
+
+    @property
+    def lifecycle(self) -> 'LifecycleTable':
+        """每个对象各段存活期(出现/最后更新/移除时间)，支持按时刻、时间段查询存活对象(首次访问时建立)"""
+        if self._lifecycle is None:
+            self._lifecycle = self._build_lifecycle()
+        return self._lifecycle
+
     @property
     def ids(self) -> List[int]:
         """全部出现过的 object_id(升序去重)"""
-        self._ensure_index()
-        return sorted(self._id_index)
+        return list(self.summary.ids)
 
     @property
     def objects(self) -> ObjectCollection:
@@ -98,26 +186,31 @@ class ACMIFile:
     @property
     def columns(self) -> List[str]:
         """所有可用扁平列名，按字母序"""
-        try:
-            obj = next(iter(self.objects))
-        except StopIteration:
-            return []
-        return self._auto_columns([obj])
+        return self.summary.columns
 
     # ---------- 函数式接口(保留向后兼容) ----------
     def id_all(self) -> List[int]:
         return self.ids
 
     def id_count(self, object_id: int) -> int:
-        self._ensure_index()
-        return len(self._id_index.get(object_id, []))
+        return self.summary.count(object_id)
 
     def id_objects(self, object_id: int) -> List['ACMIObject']:
         self._ensure_index()
-        return [self._get_obj(ref) for ref in self._id_index.get(object_id, [])]
+        index = self._id_index
+        lo, hi = index.span(object_id)
+        frames = self.frames
+        return [frames[f].objects[o] for f, o in zip(index.frame_index[lo:hi].tolist(),
+                                                      index.object_index[lo:hi].tolist())]
 
     def id_column(self, object_id: int, col: str) -> List[Any]:
-        return self._column_for_id(object_id, col)
+        col = _resolve_column(col)
+        return self._id_column_values(object_id, [col], as_arrays=False)[col]
+
+    def id_arrays(self, object_id: int, columns: Iterable[str] | None = None) -> Dict[str, np.ndarray]:
+        """一次遍历某个 id 的全部记录，按列构建 numpy 数组(数值列缺失为 NaN)"""
+        columns = [_resolve_column(c) for c in columns] if columns else self._id_auto_columns(object_id)
+        return self._id_column_values(object_id, columns, as_arrays=True)
 
     def id_to_csv(
         self,
@@ -126,53 +219,129 @@ class ACMIFile:
         *,
         delimiter: str = ',',
         include_header: bool = True,
-    ) -> str:
-        """指定 ID(或全部)导出 CSV"""
-        if object_ids is None:
-            object_ids = self.ids
-        rows = [o for oid in object_ids for o in self.id_objects(oid)]
-        if not rows:
-            return ''
-
-        columns = list(columns) if columns else self._auto_columns(rows)
-        table = [[self._deep_get(o, c) for c in columns] for o in rows]
-
-        buf = io.StringIO()
-        writer = csv.writer(buf, delimiter=delimiter)
+        file: Optional[TextIO] = None,
+    ) -> Optional[str]:
+        """
+        指定 ID(或全部)导出 CSV
+        传入 file 时逐个 id 直接写入文件句柄并返回 None，额外内存只与单个 id 的记录数有关
+        """
+        object_ids = self.ids if object_ids is None else list(object_ids)
+        columns = [_resolve_column(c) for c in columns] if columns else self._ids_auto_columns(object_ids)
+        if not columns:
+            return None if file is not None else ''
+
+        out = file if file is not None else io.StringIO()
+        writer = csv.writer(out, delimiter=delimiter)
         if include_header:
             writer.writerow(columns)
-        writer.writerows(table)
-        return buf.getvalue()
+        for oid in object_ids:
+            values = self._id_column_values(oid, columns, as_arrays=False)
+            writer.writerows(zip(*(values[c] for c in columns)))
+        return None if file is not None else out.getvalue()
 
     def id_to_df(
         self,
         object_ids: Iterable[int] | None = None,
         columns: Iterable[str] | None = None,
     ) -> pd.DataFrame:
-        csv_str = self.id_to_csv(object_ids, columns, delimiter=',')
-        return pd.read_csv(io.StringIO(csv_str))
+        """直接由列数组构建 DataFrame，不经过 CSV 文本"""
+        object_ids = self.ids if object_ids is None else list(object_ids)
+        columns = [_resolve_column(c) for c in columns] if columns else self._ids_auto_columns(object_ids)
+        parts: Dict[str, List[np.ndarray]] = {c: [] for c in columns}
+        for oid in object_ids:
+            for c, arr in self._id_column_values(oid, columns, as_arrays=True).items():
+                parts[c].append(arr)
+        return pd.DataFrame({c: np.concatenate(p) if p else np.empty(0) for c, p in parts.items()},
+                            columns=columns)
 
     # ---------- 内部辅助 ----------
     def _ensure_index(self) -> None:
         if self._index_built:
             return
-        self._build_id_index()
+        m = profiling.current()
+        if m is None:
+            self._build_id_index()
+        else:
+            with m.stage('index'):
+                self._build_id_index()
         self._index_built = True
 
+    def _build_events(self) -> 'EventTable':
+        from .events import EventTable
+        if self._event_log is not None:
+            return EventTable.from_events(self._event_log)
+        return EventTable.from_frames(self.frames)
+
     def _build_id_index(self) -> None:
-        self._id_index.clear()
-        for f_idx, frame in enumerate(self.frames):
-            for o_idx, obj in enumerate(frame.objects):
-                self._id_index[obj.object_id].append(
-                    FrameObjectRef(f_idx, o_idx)
-                )
+        self._id_index = _IdIndex.build(self.frames)
 
-    def _get_obj(self, ref: FrameObjectRef) -> 'ACMIObject':
-        return self.frames[ref.frame_index].objects[ref.object_index]
+    def _build_summary(self) -> 'ACMISummary':
+        from .summary import ACMISummary
+        return ACMISummary.from_frames(self.frames)
+
+    def _build_lifecycle(self) -> 'LifecycleTable':
+        from .lifecycle import LifecycleTable
+        return LifecycleTable.from_frames(self.frames, self._removals(), self.summary.end)
+
+    def _removals(self) -> List[Tuple[int, float, int]]:
+        """全部移除记录 (此前更新条数, 时间, id)，按文件顺序"""
+        return self._removal_log or []
+
+    def _objects_slice(self, key: slice) -> List['ACMIObject']:
+        """按帧偏移定位，只访问切片覆盖到的帧"""
+        offsets = self.summary.frame_offsets
+        r = range(int(offsets[-1]))[key]
+        if not len(r):
+            return []
+        idx = np.arange(r.start, r.stop, r.step, dtype=np.int64)
+        fidx = np.searchsorted(offsets, idx, 'right') - 1
+        frames = self.frames
+        out, cur, objs = [], -1, None
+        for f, o in zip(fidx.tolist(), (idx - offsets[fidx]).tolist()):
+            if f != cur:
+                objs, cur = frames[f].objects, f
+            out.append(objs[o])
+        return out
 
     def _column_for_id(self, oid: int, col: str) -> List[Any]:
         return self.id_column(oid, col)
 
+    def _id_column_values(self, object_id: int, columns: List[str],
+                          as_arrays: bool) -> Dict[str, Union[List[Any], np.ndarray]]:
+        """列提取引擎：子类(如列式存储)可覆盖以直接切片数组"""
+        cols = self._extract_columns(self.id_objects(object_id), columns)
+        return {c: _to_array(v) for c, v in cols.items()} if as_arrays else cols
+
+    def _id_auto_columns(self, object_id: int) -> List[str]:
+        return self._auto_columns(self.id_objects(object_id))
+
+    def _ids_auto_columns(self, object_ids: Iterable[int]) -> List[str]:
+        cols = set()
+        for oid in object_ids:
+            cols.update(self._id_auto_columns(oid))
+        return sorted(cols)
+
+    @staticmethod
+    def _extract_columns(rows: List['ACMIObject'], columns: List[str]) -> Dict[str, List[Any]]:
+        """单次遍历 rows，同时填充所有列；同一子对象只取一次"""
+        specs = []
+        for c in columns:
+            head, _, sub = c.partition('.')
+            specs.append((head, sub or None, _COORD_FIELD_POS.get(sub) if head == 'object_coordinates' else None, []))
+        heads = sorted({h for h, _, _, _ in specs})
+        for o in rows:
+            # 坐标直接从打包数据取值，不还原(也不缓存)为 ACMIObjectCoordinates
+            got = {h: coordinate_fields(o) if h == 'object_coordinates' else getattr(o, h, None) for h in heads}
+            for head, sub, pos, out in specs:
+                v = got[head]
+                if v is not None:
+                    if head == 'object_coordinates':
+                        v = v[pos] if pos is not None else (o.object_coordinates if sub is None else None)
+                    elif sub is not None:
+                        v = getattr(v, sub, None)
+                out.append(v)
+        return {c: out for c, (_, _, _, out) in zip(columns, specs)}
+
     def _id_to_csv(self, ids, **kw):
         return self.id_to_csv(ids, **kw)
 
@@ -190,6 +359,10 @@ class ACMIFile:
         cols = set()
         for obj in rows:
             for f in obj.__dataclass_fields__:
+                if f == 'object_coordinates':
+                    if has_coordinates(obj):   # 只判断是否存在，不触发还原
+                        cols.update(_COORD_COLUMNS)
+                    continue
                 val = getattr(obj, f)
                 if val is None:
                     continue
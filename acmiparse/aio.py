@@ -0,0 +1,180 @@
+# aio.py
+from __future__ import annotations
+from typing import List, Dict, Optional, AsyncIterator, Iterable, Tuple, Union, BinaryIO, Callable
+import asyncio
+import logging
+
+from .model import *
+from .reader import ACMIFileReader, split_block, split_complete
+from .acmi_file import ACMIFile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+# ---------- 异步读取 ----------
+class AsyncACMIFileReader:
+    """
+    异步读取 .acmi / 压缩包：打开与按块读取都放到线程池执行，不阻塞事件循环
+    用法：
+        async for lines in AsyncACMIFileReader('demo.zip.acmi').iter_line_batches():
+            ...
+    """
+
+    def __init__(self, file_path: str, encoding: str = 'utf-8-sig', chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self._reader = ACMIFileReader(file_path=file_path, encoding=encoding)
+        self.file_path = file_path
+        self.encoding = encoding
+        self.chunk_size = chunk_size
+
+    async def iter_line_batches(self) -> AsyncIterator[List[bytes]]:
+        """每读一块产出该块内的完整行(bytes)，跨块的半行(含未结束的续行)留到下一块"""
+        f: BinaryIO = await asyncio.to_thread(self._reader.open_binary)
+        try:
+            rest = b''
+            while True:
+                block = await asyncio.to_thread(f.read, self.chunk_size)
+                if not block:
+                    break
+                lines, rest = split_complete(rest + block)
+                yield lines
+            if rest:
+                yield split_block(rest)
+        finally:
+            await asyncio.to_thread(f.close)
+
+    async def read_raw_lines(self) -> AsyncIterator[bytes]:
+        async for batch in self.iter_line_batches():
+            for line in batch:
+                yield line
+
+
+# ---------- 异步解析 / 加载 ----------
+async def _abatches(loader, start, end, ids, predicate,
+                    handle: Callable[[Iterable], object]) -> AsyncIterator[object]:
+    """
+    按块异步读取；每块的分词与 handle(该块的事件序列) 一起放到线程池执行，逐块产出 handle 的返回值
+    同一时刻只有一个线程在操作 loader，事件循环只负责调度
+    """
+    parser = loader._parser
+    parser._set_filter(start, end, ids, predicate)
+    reader = AsyncACMIFileReader(parser.reader.file_path, parser.encoding)
+    async for batch in reader.iter_line_batches():
+        yield await asyncio.to_thread(handle, parser.parse_lines(batch))
+        if parser._filter is not None and parser._filter.finished:
+            break  # 已越过时间窗终点
+
+
+async def aiter_frames(file_path: str, encoding: str = 'utf-8-sig', *,
+                       start: Optional[float] = None, end: Optional[float] = None,
+                       ids: Optional[Iterable[int]] = None,
+                       predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+                       **options) -> AsyncIterator[ACMIFrame]:
+    """
+    异步逐帧产出(不累积)，与 ACMILoader.iter_frames 对应；options 为 ACMILoader 自身的选项
+    读取、分词与帧组装都在线程池中按块进行，事件循环线程只负责产出已完成的帧
+    """
+    from .parser import ACMILoader, _FrameBegin, _ObjectUpdate, _ObjectRemove
+    loader = ACMILoader(file_path, encoding, start=start, end=end, ids=ids, predicate=predicate, **options)
+    current: Optional[ACMIFrame] = None
+
+    def assemble(events) -> List[ACMIFrame]:
+        nonlocal current
+        done = []
+        for ev in events:
+            if isinstance(ev, _FrameBegin):
+                if current is not None:
+                    done.append(current)
+                current = ACMIFrame(timestamp=ev.time_offset, objects=[])
+                loader.timestamp = ev.time_offset
+            elif isinstance(ev, _ObjectUpdate):
+                if current is not None:
+                    current.objects.append(loader._make_object(ev))
+            elif not isinstance(ev, _ObjectRemove):
+                loader._handle(ev)
+        return done
+
+    async for frames in _abatches(loader, start, end, ids, predicate, assemble):
+        for frame in frames:
+            yield frame
+    if current is not None:
+        yield current
+
+
+async def aload_acmi(file_path: str, encoding: str = 'utf-8-sig', columnar: bool = False, *,
+                     start: Optional[float] = None, end: Optional[float] = None,
+                     ids: Optional[Iterable[int]] = None,
+                     predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+                     **options) -> ACMIFile:
+    """
+    load_acmi 的异步版本；options 如 compact_properties
+    读取、分词、对象构建与收尾都在线程池中按块进行，不占用事件循环线程；
+    纯 Python 解析仍受 GIL 限制，多个文件并发加载不会比顺序加载更快，但事件循环保持可响应
+    """
+    from .parser import ACMILoader
+    loader = ACMILoader(file_path, encoding, columnar=columnar, start=start, end=end, ids=ids,
+                        predicate=predicate, **options)
+
+    def feed(events) -> None:
+        for ev in events:
+            loader._handle(ev)
+
+    async for _ in _abatches(loader, start, end, ids, predicate, feed):
+        pass
+    return await asyncio.to_thread(loader._finish)
+
+
+async def _load_indexed(paths: List[str], concurrency: int,
+                        kwargs: dict) -> AsyncIterator[Tuple[int, str, Union[ACMIFile, BaseException]]]:
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    todo = iter(enumerate(paths))
+    done = object()
+
+    async def worker():
+        for i, path in todo:  # 多个 worker 共享同一个迭代器
+            try:
+                result = await aload_acmi(path, **kwargs)
+            except Exception as e:
+                logger.error(f"加载失败 {path}: {e}")
+                result = e
+            await queue.put((i, path, result))
+        await queue.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, min(concurrency, len(paths))))]
+    remaining = len(workers)
+    try:
+        while remaining:
+            item = await queue.get()
+            if item is done:
+                remaining -= 1
+                continue
+            yield item
+    finally:
+        for w in workers:
+            w.cancel()
+
+
+async def aiter_load(
+    file_paths: Iterable[str],
+    concurrency: int = 4,
+    **kwargs,
+) -> AsyncIterator[Tuple[str, Union[ACMIFile, BaseException]]]:
+    """
+    以最多 concurrency 个并发加载一批文件，按完成顺序产出 (路径, 结果或异常)
+    结果队列容量等于 concurrency，消费方处理不过来时加载方会等待(背压)
+    """
+    async for _, path, result in _load_indexed(list(file_paths), concurrency, kwargs):
+        yield path, result
+
+
+async def aload_many(file_paths: Iterable[str], concurrency: int = 4,
+                     return_exceptions: bool = False, **kwargs) -> List[Union[ACMIFile, BaseException]]:
+    """并发加载一批文件，结果按输入顺序返回；return_exceptions=False 时遇到首个异常即抛出"""
+    paths = list(file_paths)
+    results = [None] * len(paths)
+    async for i, _, result in _load_indexed(paths, concurrency, kwargs):
+        if isinstance(result, BaseException) and not return_exceptions:
+            raise result
+        results[i] = result
+    return results
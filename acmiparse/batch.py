@@ -0,0 +1,298 @@
+# batch.py
+"""
+多文件批处理：在进程池中汇总或处理一批录像，单个文件失败不影响其余文件
+用法：
+    paths = find_recordings('archive/')
+    summaries = summarize_files(paths, progress=lambda done, total, path: print(done, total))
+    df = summaries_to_df(summaries)
+    fleet = merge_summaries(summaries)
+    # 在工作进程中对每个 ACMIFile 执行 fn，只把 fn 的结果传回主进程
+    for path, n in iter_map_files(paths, count_updates):
+        ...
+fn/任务需可被 pickle(模块顶层函数)；主进程与工作进程之间只传路径与结果，不传 ACMIFile
+"""
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import List, Dict, Optional, Iterable, Iterator, Callable, Any, Tuple
+import logging
+import os
+import traceback
+
+import pandas as pd
+
+from .model import *
+from .acmi_file import ACMIFile
+from .parser import ACMIParser, load_acmi, _GlobalProp, _FrameBegin, _ObjectUpdate, _ObjectRemove
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, str], None]   # (已完成数, 总数, 路径)
+
+
+class BatchError(Exception):
+    """工作进程中处理单个文件失败；只携带字符串，保证能 pickle 回主进程"""
+
+    def __init__(self, path: str, error_type: str, message: str, tb: str = ''):
+        super().__init__(path, error_type, message, tb)
+        self.path = path
+        self.error_type = error_type
+        self.message = message
+        self.traceback = tb
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.error_type}: {self.message}"
+
+    def __repr__(self) -> str:
+        return f"BatchError({self.path!r}, {self.error_type!r}, {self.message!r})"
+
+
+# ---------- 单文件汇总 ----------
+@dataclass
+class FileSummary:
+    path: str
+    size_bytes: int = 0
+    reference_time: Optional[str] = None
+    title: Optional[str] = None
+    start: Optional[float] = None           # 首帧时间(秒)
+    end: Optional[float] = None             # 末帧时间(秒)
+    frames: int = 0
+    updates: int = 0
+    removals: int = 0
+    ids: List[int] = field(default_factory=list)           # 出现过的对象 id(不含全局对象 0)
+    types: Dict[int, str] = field(default_factory=dict)    # id -> 最后一次出现的 Type
+    events: Dict[str, int] = field(default_factory=dict)   # 事件类型 -> 次数
+    seconds: float = 0.0                                   # 汇总耗时
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.start is None else self.end - self.start
+
+    def type_counts(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for t in self.types.values():
+            counts[t] = counts.get(t, 0) + 1
+        return counts
+
+
+def summarize_file(file_path: str, encoding: str = 'utf-8-sig') -> FileSummary:
+    """单遍流式扫描，不构建 ACMIFile"""
+    s = FileSummary(file_path, size_bytes=os.path.getsize(file_path))
+    ids = set()
+    types = s.types
+    events = s.events
+    updates = frames = removals = 0
+    start = end = None
+    for ev in ACMIParser(file_path, encoding).events():
+        cls = ev.__class__
+        if cls is _ObjectUpdate:
+            updates += 1
+            oid = ev.obj_id
+            if oid:
+                ids.add(oid)
+            props = ev.props
+            if props is not None and props.text_properties:
+                t = props.text_properties.get('Type')
+                if t:
+                    types[oid] = t
+            if ev.event is not None:
+                events[ev.event.event_type] = events.get(ev.event.event_type, 0) + 1
+        elif cls is _FrameBegin:
+            frames += 1
+            if start is None:
+                start = ev.time_offset
+            end = ev.time_offset
+        elif cls is _ObjectRemove:
+            removals += 1
+        elif cls is _GlobalProp:
+            if ev.key == 'ReferenceTime':
+                s.reference_time = ev.value
+            elif ev.key == 'Title':
+                s.title = ev.value
+    s.ids = sorted(ids)
+    s.updates, s.frames, s.removals = updates, frames, removals
+    s.start, s.end = start, end
+    return s
+
+
+# ---------- 进程池调度 ----------
+def _call(task: Callable, path: str, args: tuple) -> Tuple[Any, float]:
+    """工作进程入口：异常转成 BatchError 返回，不让它打断进程池"""
+    t0 = perf_counter()
+    try:
+        result = task(path, *args)
+    except Exception as e:
+        result = BatchError(path, type(e).__name__, str(e), traceback.format_exc())
+    return result, perf_counter() - t0
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _iter_pool(paths: List[str], task: Callable, args: tuple, workers: Optional[int],
+               progress: Optional[ProgressCallback]) -> Iterator[Tuple[int, Any, float]]:
+    """
+    按完成顺序产出 (输入下标, 结果或 BatchError, 耗时)
+    大文件先提交，避免最后只剩一个大文件在跑；在途任务数有界
+    工作进程异常退出(崩溃/被杀)时重建进程池，把当时在途的文件逐个单独重跑以找出元凶
+    """
+    total = len(paths)
+    workers = max(1, min(workers or os.cpu_count() or 1, total or 1))
+    todo = deque(sorted(range(total), key=lambda i: -_size(paths[i])))
+    suspects: deque = deque()
+    inflight: Dict[Any, int] = {}
+    isolated = set()
+    pool: Optional[ProcessPoolExecutor] = None
+    done = 0
+    try:
+        while todo or suspects or inflight:
+            if pool is None:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if suspects:
+                if not inflight:
+                    i = suspects.popleft()
+                    isolated.add(i)
+                    inflight[pool.submit(_call, task, paths[i], args)] = i
+            else:
+                while todo and len(inflight) < 2 * workers:
+                    i = todo.popleft()
+                    inflight[pool.submit(_call, task, paths[i], args)] = i
+            finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            broken = False
+            for fut in finished:
+                i = inflight.pop(fut)
+                try:
+                    result, seconds = fut.result()
+                except BrokenProcessPool:
+                    broken = True
+                    if i not in isolated:
+                        suspects.append(i)
+                        continue
+                    result, seconds = BatchError(paths[i], 'BrokenProcessPool', '工作进程异常退出'), 0.0
+                except Exception as e:
+                    # 进程池本身完好，只是这个文件的结果无法传回(如无法 pickle)
+                    result, seconds = BatchError(paths[i], type(e).__name__, str(e), traceback.format_exc()), 0.0
+                if isinstance(result, BatchError):
+                    logger.error(f"处理失败 {result}")
+                done += 1
+                if progress is not None:
+                    progress(done, total, paths[i])
+                yield i, result, seconds
+            if broken:
+                suspects.extend(inflight.values())
+                inflight.clear()
+                pool.shutdown(wait=True, cancel_futures=True)
+                pool = None
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _load_and_apply(path: str, fn: Callable[[ACMIFile], Any], load_kwargs: dict) -> Any:
+    return fn(load_acmi(path, **load_kwargs))
+
+
+# ---------- 对外 API ----------
+def find_recordings(directory: str, recursive: bool = True) -> List[str]:
+    """目录下的 .acmi / .zip.acmi 文件，按路径排序"""
+    out = []
+    for root, dirs, files in os.walk(directory):
+        out.extend(os.path.join(root, f) for f in files if f.lower().endswith('.acmi'))
+        if not recursive:
+            break
+    return sorted(out)
+
+
+def iter_map_files(file_paths: Iterable[str], fn: Callable[[ACMIFile], Any], *,
+                   workers: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+                   **load_kwargs) -> Iterator[Tuple[str, Any]]:
+    """
+    在工作进程中 load_acmi(path, **load_kwargs) 后调用 fn，按完成顺序产出 (路径, fn 结果或 BatchError)
+    完整的 ACMIFile 只存在于工作进程中
+    """
+    paths = list(file_paths)
+    for i, result, _ in _iter_pool(paths, _load_and_apply, (fn, load_kwargs), workers, progress):
+        yield paths[i], result
+
+
+def map_files(file_paths: Iterable[str], fn: Callable[[ACMIFile], Any], *,
+              workers: Optional[int] = None, progress: Optional[ProgressCallback] = None,
+              return_exceptions: bool = True, **load_kwargs) -> List[Any]:
+    """同 iter_map_files，结果按输入顺序返回；return_exceptions=False 时遇到首个失败即抛出 BatchError"""
+    paths = list(file_paths)
+    results: List[Any] = [None] * len(paths)
+    for i, result, _ in _iter_pool(paths, _load_and_apply, (fn, load_kwargs), workers, progress):
+        if isinstance(result, BatchError) and not return_exceptions:
+            raise result
+        results[i] = result
+    return results
+
+
+def summarize_files(file_paths: Iterable[str], *, workers: Optional[int] = None,
+                    progress: Optional[ProgressCallback] = None,
+                    encoding: str = 'utf-8-sig') -> List[FileSummary]:
+    """并行汇总一批文件，按输入顺序返回；失败的文件对应 error 非空的 FileSummary"""
+    paths = list(file_paths)
+    out: List[Optional[FileSummary]] = [None] * len(paths)
+    for i, result, seconds in _iter_pool(paths, summarize_file, (encoding,), workers, progress):
+        if isinstance(result, BatchError):
+            result = FileSummary(paths[i], size_bytes=_size(paths[i]), error=f"{result.error_type}: {result.message}")
+        result.seconds = seconds
+        out[i] = result
+    return out
+
+
+# ---------- 合并 ----------
+@dataclass
+class FleetSummary:
+    files: int = 0
+    failed: int = 0
+    frames: int = 0
+    updates: int = 0
+    duration: float = 0.0                                       # 各文件时长之和(秒)
+    objects: int = 0                                            # 各文件对象数之和
+    type_counts: Dict[str, int] = field(default_factory=dict)   # Type -> 对象数
+    event_counts: Dict[str, int] = field(default_factory=dict)  # 事件类型 -> 次数
+
+
+def merge_summaries(summaries: Iterable[FileSummary]) -> FleetSummary:
+    fleet = FleetSummary()
+    for s in summaries:
+        fleet.files += 1
+        if not s.ok:
+            fleet.failed += 1
+            continue
+        fleet.frames += s.frames
+        fleet.updates += s.updates
+        fleet.duration += s.duration or 0.0
+        fleet.objects += len(s.ids)
+        for t, n in s.type_counts().items():
+            fleet.type_counts[t] = fleet.type_counts.get(t, 0) + n
+        for e, n in s.events.items():
+            fleet.event_counts[e] = fleet.event_counts.get(e, 0) + n
+    return fleet
+
+
+def summaries_to_df(summaries: Iterable[FileSummary]) -> pd.DataFrame:
+    """每个文件一行；ids/types/events 保留为对象列"""
+    rows = [{
+        'path': s.path, 'ok': s.ok, 'error': s.error, 'size_bytes': s.size_bytes,
+        'reference_time': s.reference_time, 'title': s.title,
+        'start': s.start, 'end': s.end, 'duration': s.duration,
+        'frames': s.frames, 'updates': s.updates, 'removals': s.removals,
+        'objects': len(s.ids), 'ids': s.ids, 'types': s.type_counts(), 'events': s.events,
+        'seconds': s.seconds,
+    } for s in summaries]
+    return pd.DataFrame(rows)
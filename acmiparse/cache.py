@@ -0,0 +1,112 @@
+# cache.py
+from __future__ import annotations
+from dataclasses import asdict
+from typing import Optional, Dict, Any
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from .model import *
+from .columnar import ColumnarFrameStore, ColumnarACMIFile, _GrowableArray
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 2  # 2: 增加移除记录列
+CACHE_SUFFIX = '.acmicache'
+_HASH_SAMPLE = 1024 * 1024  # 哈希只取首尾各 1 MiB，避免重读整个文件
+
+
+# ---------- 源文件指纹 ----------
+def source_fingerprint(file_path: str, full_hash: bool = False) -> Dict[str, Any]:
+    """源文件的大小、mtime 与 blake2b 哈希(默认只哈希首尾采样块)"""
+    st = os.stat(file_path)
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        if full_hash or st.st_size <= 2 * _HASH_SAMPLE:
+            for block in iter(lambda: f.read(_HASH_SAMPLE), b''):
+                h.update(block)
+        else:
+            h.update(f.read(_HASH_SAMPLE))
+            f.seek(-_HASH_SAMPLE, os.SEEK_END)
+            h.update(f.read(_HASH_SAMPLE))
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': h.hexdigest(),
+            'full_hash': full_hash}
+
+
+def cache_path(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """缓存目录路径：默认与源文件同目录，名为 <文件名>.acmicache"""
+    name = os.path.basename(file_path) + CACHE_SUFFIX
+    return os.path.join(cache_dir or os.path.dirname(os.path.abspath(file_path)), name)
+
+
+# ---------- 写入 ----------
+def save_cache(acmi: ColumnarACMIFile, file_path: str, cache_dir: Optional[str] = None,
+               full_hash: bool = False) -> str:
+    """
+    把列式结果写成 sidecar 目录：meta.json + 每列一个 .npy
+    先写临时目录再改名，写入中途失败不会留下半个缓存
+    """
+    store = acmi.store
+    target = cache_path(file_path, cache_dir)
+    tmp = tempfile.mkdtemp(prefix='.tmp-', dir=os.path.dirname(target))
+    try:
+        for name, arr in vars(store).items():
+            if isinstance(arr, _GrowableArray):
+                np.save(os.path.join(tmp, name + '.npy'), arr.values)
+        for name, arr in zip(('id_order', 'id_keys', 'id_bounds'), store.id_index()):
+            np.save(os.path.join(tmp, name + '.npy'), arr)
+        meta = {
+            'version': CACHE_VERSION,
+            'source': source_fingerprint(file_path, full_hash),
+            'header': asdict(acmi.header),
+            'global_properties': asdict(acmi.global_properties),
+            'strings': store.strings,
+        }
+        with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return target
+
+
+# ---------- 读取 ----------
+def load_cache(file_path: str, cache_dir: Optional[str] = None) -> Optional[ColumnarACMIFile]:
+    """缓存存在且与源文件指纹一致时以 mmap 方式载入，否则返回 None"""
+    target = cache_path(file_path, cache_dir)
+    meta_file = os.path.join(target, 'meta.json')
+    if not os.path.exists(meta_file):
+        return None
+    try:
+        with open(meta_file, encoding='utf-8') as f:
+            meta = json.load(f)
+        src = meta['source']
+        if meta.get('version') != CACHE_VERSION or \
+                src != source_fingerprint(file_path, src.get('full_hash', False)):
+            logger.info(f"缓存已过期: {target}")
+            return None
+
+        store = ColumnarFrameStore(capacity=0)
+        for name, arr in vars(store).items():
+            if isinstance(arr, _GrowableArray):
+                setattr(store, name, _GrowableArray.wrap(
+                    np.load(os.path.join(target, name + '.npy'), mmap_mode='r')))
+        store.set_id_index(*(np.load(os.path.join(target, name + '.npy'), mmap_mode='r')
+                             for name in ('id_order', 'id_keys', 'id_bounds')))
+        store.strings = meta['strings']
+        store._string_codes = {s: i for i, s in enumerate(store.strings)}
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"读取缓存失败，将重新解析: {e}")
+        return None
+
+    return ColumnarACMIFile.from_store(ACMIHeader(**meta['header']),
+                                       ACMIGlobalProperties(**meta['global_properties']),
+                                       store)
@@ -0,0 +1,402 @@
+# columnar.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Any, Iterator, Sequence, Tuple
+import math
+
+import numpy as np
+
+from .model import *
+from .acmi_file import ACMIFile, _to_array
+
+# 坐标列顺序(与 T= 字段的 9 段式一致)
+COORD_FIELDS: Tuple[str, ...] = ('longitude', 'latitude', 'altitude',
+                                 'roll', 'pitch', 'yaw', 'u', 'v', 'heading')
+_NAN = math.nan
+_EMPTY_COORDS = (_NAN,) * len(COORD_FIELDS)
+
+
+# ---------- 基础工具 ----------
+class _GrowableArray:
+    """按倍增扩容的 numpy 数组，支持一维或定宽二维行"""
+    __slots__ = ('_data', '_size')
+
+    def __init__(self, dtype, width: Optional[int] = None, capacity: int = 1024):
+        shape = (capacity,) if width is None else (capacity, width)
+        self._data = np.empty(shape, dtype=dtype)
+        self._size = 0
+
+    def append(self, value) -> None:
+        if self._size == self._data.shape[0]:
+            self._grow(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+
+    def extend(self, values) -> None:
+        n = len(values)
+        if not n:
+            return
+        if self._size + n > self._data.shape[0]:
+            self._grow(self._size + n)
+        self._data[self._size:self._size + n] = values
+        self._size += n
+
+    def _grow(self, need: int) -> None:
+        cap = max(need, self._data.shape[0] * 2)
+        data = np.empty((cap,) + self._data.shape[1:], dtype=self._data.dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    @classmethod
+    def wrap(cls, data: np.ndarray) -> '_GrowableArray':
+        """包装已有数组(如 mmap 载入的缓存)，继续追加时会拷贝扩容"""
+        arr = cls.__new__(cls)
+        arr._data = data
+        arr._size = data.shape[0]
+        return arr
+
+    def trim(self) -> None:
+        """释放多余容量(加载完成后调用)"""
+        if self._data.shape[0] != self._size:
+            self._data = self._data[:self._size].copy()
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._data[:self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+
+# ---------- 列式帧存储 ----------
+class ColumnarFrameStore:
+    """
+    列式存储：每条对象更新占一行
+    - 坐标 / 帧号 / object_id 放入定长类型数组
+    - 数值属性、文本属性、事件分别放入稀疏表(行号 + 键 + 值)
+    - 文本统一进字符串表，只存整数编码
+    """
+
+    def __init__(self, capacity: int = 1024):
+        # 帧
+        self.frame_times = _GrowableArray(np.float64)
+        self.frame_starts = _GrowableArray(np.int64)     # 每帧第一行的行号
+        # 行
+        self.row_frame = _GrowableArray(np.int32, capacity=capacity)
+        self.row_object_id = _GrowableArray(np.uint64, capacity=capacity)
+        self.row_coords = _GrowableArray(np.float64, len(COORD_FIELDS), capacity)  # 缺失为 NaN
+        self.row_has_coords = _GrowableArray(np.bool_, capacity=capacity)
+        # 数值属性稀疏表
+        self.num_row = _GrowableArray(np.int64)
+        self.num_key = _GrowableArray(np.int32)
+        self.num_value = _GrowableArray(np.float64)
+        # 文本属性稀疏表
+        self.text_row = _GrowableArray(np.int64)
+        self.text_key = _GrowableArray(np.int32)
+        self.text_value = _GrowableArray(np.int32)
+        # 事件表，object_ids 平铺后用 offsets 切分
+        self.event_row = _GrowableArray(np.int64)
+        self.event_type = _GrowableArray(np.int32)
+        self.event_text = _GrowableArray(np.int32)
+        self.event_ids_offsets = _GrowableArray(np.int64)
+        self.event_ids = _GrowableArray(np.uint64)
+        self.event_ids_offsets.append(0)
+        # 移除记录：发生时已有的行数、时间、id
+        self.removal_pos = _GrowableArray(np.int64)
+        self.removal_time = _GrowableArray(np.float64)
+        self.removal_id = _GrowableArray(np.uint64)
+        # 字符串表
+        self.strings: List[str] = []
+        self._string_codes: Dict[str, int] = {}
+        self._id_index: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+        self._id_rows: Optional[Dict[int, np.ndarray]] = None
+
+    # ---------- 写入 ----------
+    def intern(self, s: str) -> int:
+        code = self._string_codes.get(s)
+        if code is None:
+            code = len(self.strings)
+            self._string_codes[s] = code
+            self.strings.append(s)
+        return code
+
+    def begin_frame(self, timestamp: float) -> None:
+        self.frame_times.append(timestamp)
+        self.frame_starts.append(len(self.row_frame))
+
+    def append_update(self, obj_id: int,
+                      coords: Optional[Tuple[Optional[float], ...]],
+                      props: Optional[ACMIObjectProperties],
+                      event: Optional[ACMIEvent]) -> int:
+        """追加一行，返回行号；调用前必须已有帧"""
+        row = len(self.row_frame)
+        self.row_frame.append(len(self.frame_times) - 1)
+        self.row_object_id.append(obj_id)
+        if coords is not None:
+            self.row_coords.append(tuple(_NAN if v is None else v for v in coords))
+            self.row_has_coords.append(True)
+        else:
+            self.row_coords.append(_EMPTY_COORDS)
+            self.row_has_coords.append(False)
+        if props is not None:
+            for k, v in (props.numeric_properties or {}).items():
+                self.num_row.append(row)
+                self.num_key.append(self.intern(k))
+                self.num_value.append(v)
+            for k, v in (props.text_properties or {}).items():
+                self.text_row.append(row)
+                self.text_key.append(self.intern(k))
+                self.text_value.append(self.intern(v))
+        if event is not None:
+            self.event_row.append(row)
+            self.event_type.append(self.intern(event.event_type))
+            self.event_text.append(self.intern(event.event_text))
+            self.event_ids.extend(event.object_ids or [])
+            self.event_ids_offsets.append(len(self.event_ids))
+        self._id_index = self._id_rows = None
+        return row
+
+    def append_removal(self, timestamp: float, obj_id: int) -> None:
+        self.removal_pos.append(len(self.row_frame))
+        self.removal_time.append(timestamp)
+        self.removal_id.append(obj_id)
+
+    def trim(self) -> None:
+        for arr in vars(self).values():
+            if isinstance(arr, _GrowableArray):
+                arr.trim()
+
+    # ---------- 只读 ----------
+    @property
+    def frame_count(self) -> int:
+        return len(self.frame_times)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_frame)
+
+    @property
+    def row_times(self) -> np.ndarray:
+        """每行的时间(由帧号换算)"""
+        return self.frame_times.values[self.row_frame.values]
+
+    def frame_rows(self, frame_index: int) -> range:
+        starts = self.frame_starts.values
+        stop = starts[frame_index + 1] if frame_index + 1 < len(starts) else self.row_count
+        return range(int(starts[frame_index]), int(stop))
+
+    def id_rows(self, object_id: int) -> np.ndarray:
+        """某个 object_id 的全部行号(按时间顺序)"""
+        self._ensure_id_rows()
+        return self._id_rows.get(object_id, np.empty(0, dtype=np.int64))
+
+    def ids(self) -> List[int]:
+        self._ensure_id_rows()
+        return sorted(self._id_rows)
+
+    def id_index(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        id 索引的数组形式 (order, ids, bounds)：
+        order 为按 id 稳定排序后的行号，ids[i] 的行号为 order[bounds[i]:bounds[i+1]]
+        """
+        if self._id_index is None:
+            oids = self.row_object_id.values
+            order = np.argsort(oids, kind='stable')
+            uniq, starts = np.unique(oids[order], return_index=True)
+            self._id_index = (order, uniq, np.append(starts, len(order)))
+        return self._id_index
+
+    def set_id_index(self, order: np.ndarray, ids: np.ndarray, bounds: np.ndarray) -> None:
+        self._id_index = (order, ids, bounds)
+        self._id_rows = None
+
+    def _ensure_id_rows(self) -> None:
+        if self._id_rows is not None:
+            return
+        order, uniq, bounds = self.id_index()
+        self._id_rows = {int(u): order[bounds[i]:bounds[i + 1]]
+                         for i, u in enumerate(uniq.tolist())}
+
+    # ---------- 还原为对象模型 ----------
+    def _sparse_range(self, rows: np.ndarray, row: int) -> Tuple[int, int]:
+        lo = int(np.searchsorted(rows, row, 'left'))
+        hi = int(np.searchsorted(rows, row, 'right'))
+        return lo, hi
+
+    def object_at(self, row: int) -> ACMIObject:
+        oid = int(self.row_object_id.values[row])
+        obj = ACMIObject(object_id=oid,
+                         time_offset=float(self.frame_times.values[self.row_frame.values[row]]))
+        if self.row_has_coords.values[row]:
+            vals = self.row_coords.values[row].tolist()
+            obj.object_coordinates = ACMIObjectCoordinates(
+                object_id=oid,
+                **{k: (None if v != v else v) for k, v in zip(COORD_FIELDS, vals)})
+
+        strings = self.strings
+        lo, hi = self._sparse_range(self.num_row.values, row)
+        numeric = {strings[k]: v for k, v in zip(self.num_key.values[lo:hi].tolist(),
+                                                 self.num_value.values[lo:hi].tolist())}
+        lo, hi = self._sparse_range(self.text_row.values, row)
+        text = {strings[k]: strings[v] for k, v in zip(self.text_key.values[lo:hi].tolist(),
+                                                       self.text_value.values[lo:hi].tolist())}
+        if numeric or text:
+            obj.object_properties = ACMIObjectProperties(text_properties=text or None,
+                                                         numeric_properties=numeric or None)
+
+        lo, hi = self._sparse_range(self.event_row.values, row)
+        if hi > lo:
+            offs = self.event_ids_offsets.values
+            obj.object_events = ACMIEvent(
+                object_id=oid,
+                event_type=strings[self.event_type.values[lo]],
+                object_ids=[int(x) for x in self.event_ids.values[offs[lo]:offs[lo + 1]]],
+                event_text=strings[self.event_text.values[lo]],
+            )
+        return obj
+
+    def props_column(self, rows: np.ndarray, text: bool) -> List[Optional[dict]]:
+        """批量还原文本或数值属性字典，无属性的行为 None"""
+        if text:
+            table_rows, keys, vals = self.text_row.values, self.text_key.values, self.text_value.values
+        else:
+            table_rows, keys, vals = self.num_row.values, self.num_key.values, self.num_value.values
+        los = np.searchsorted(table_rows, rows, 'left').tolist()
+        his = np.searchsorted(table_rows, rows, 'right').tolist()
+        strings = self.strings
+        out: List[Optional[dict]] = []
+        for lo, hi in zip(los, his):
+            if lo == hi:
+                out.append(None)
+                continue
+            ks = keys[lo:hi].tolist()
+            vs = vals[lo:hi].tolist()
+            out.append({strings[k]: strings[v] for k, v in zip(ks, vs)} if text
+                       else {strings[k]: v for k, v in zip(ks, vs)})
+        return out
+
+    def coord_column(self, rows: np.ndarray, name: str) -> List[Optional[float]]:
+        """批量取坐标列，无坐标或缺失字段为 None"""
+        col = self.row_coords.values[rows, COORD_FIELDS.index(name)]
+        has = self.row_has_coords.values[rows]
+        return [v if h and v == v else None for v, h in zip(col.tolist(), has.tolist())]
+
+
+class FrameSequence(Sequence):
+    """ACMIFile.frames 的只读视图，按需把列存储还原为 ACMIFrame"""
+
+    def __init__(self, store: ColumnarFrameStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store.frame_count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('frame index out of range')
+        store = self._store
+        return ACMIFrame(timestamp=float(store.frame_times.values[index]),
+                         objects=[store.object_at(r) for r in store.frame_rows(index)])
+
+    def __iter__(self) -> Iterator[ACMIFrame]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+# ---------- 列式文件模型 ----------
+@dataclass
+class ColumnarACMIFile(ACMIFile):
+    """与 ACMIFile 接口一致，frames / id_objects / IdView 均为列存储上的视图"""
+    store: ColumnarFrameStore = field(default=None, repr=False)
+
+    @classmethod
+    def from_store(cls, header: ACMIHeader, global_properties: ACMIGlobalProperties,
+                   store: ColumnarFrameStore) -> 'ColumnarACMIFile':
+        return cls(header=header, global_properties=global_properties,
+                   frames=FrameSequence(store), store=store)
+
+    def id_count(self, object_id: int) -> int:
+        return len(self.store.id_rows(object_id))
+
+    def id_objects(self, object_id: int) -> List[ACMIObject]:
+        return [self.store.object_at(r) for r in self.store.id_rows(object_id).tolist()]
+
+    def _id_column_values(self, object_id: int, columns: List[str], as_arrays: bool):
+        """id/时间/坐标列直接从数组切片，其余列回退为对象模型提取"""
+        store = self.store
+        rows = store.id_rows(object_id)
+        out: Dict[str, Any] = {}
+        rest = []
+        for c in columns:
+            head, _, sub = c.partition('.')
+            if c == 'object_id':
+                out[c] = np.full(len(rows), object_id, dtype=np.int64 if object_id < 2 ** 63 else np.uint64) \
+                    if as_arrays else [object_id] * len(rows)
+            elif c == 'time_offset':
+                t = store.frame_times.values[store.row_frame.values[rows]]
+                out[c] = t if as_arrays else t.tolist()
+            elif head == 'object_coordinates' and sub in COORD_FIELDS:
+                out[c] = store.row_coords.values[rows, COORD_FIELDS.index(sub)] \
+                    if as_arrays else store.coord_column(rows, sub)
+            elif head == 'object_coordinates' and sub in ('object_id', 'type'):
+                value = object_id if sub == 'object_id' else DEFAULT_COORD_TYPE
+                vals = [value if h else None for h in store.row_has_coords.values[rows].tolist()]
+                out[c] = _to_array(vals) if as_arrays else vals
+            elif head == 'object_properties' and sub in ('text_properties', 'numeric_properties'):
+                vals = store.props_column(rows, text=sub == 'text_properties')
+                out[c] = _to_array(vals) if as_arrays else vals
+            else:
+                rest.append(c)
+        if rest:
+            out.update(super()._id_column_values(object_id, rest, as_arrays))
+        return {c: out[c] for c in columns}
+
+    def _id_auto_columns(self, object_id: int) -> List[str]:
+        """只看该 id 各行在哪些表中出现，不还原对象"""
+        store = self.store
+        rows = store.id_rows(object_id)
+        if not len(rows):
+            return []
+        cols = ['object_id', 'time_offset']
+
+        def present(table_rows: np.ndarray) -> bool:
+            if not len(table_rows):
+                return False
+            idx = np.minimum(np.searchsorted(table_rows, rows), len(table_rows) - 1)
+            return bool(np.any(table_rows[idx] == rows))
+
+        if store.row_has_coords.values[rows].any():
+            cols += [f'object_coordinates.{f}' for f in ACMIObjectCoordinates.__dataclass_fields__]
+        if present(store.num_row.values) or present(store.text_row.values):
+            cols += [f'object_properties.{f}' for f in ACMIObjectProperties.__dataclass_fields__]
+        if present(store.event_row.values):
+            cols += [f'object_events.{f}' for f in ACMIEvent.__dataclass_fields__]
+        return sorted(cols)
+
+    def _build_events(self) -> 'EventTable':
+        from .events import EventTable
+        return EventTable.from_store(self.store)
+
+    def _build_summary(self) -> 'ACMISummary':
+        from .summary import ACMISummary
+        return ACMISummary.from_store(self.store)
+
+    def _build_lifecycle(self) -> 'LifecycleTable':
+        from .lifecycle import LifecycleTable
+        store = self.store
+        return LifecycleTable.from_arrays(store.row_object_id.values, store.row_times,
+                                          store.removal_pos.values, store.removal_time.values,
+                                          store.removal_id.values, self.summary.end)
+
+    def _removals(self) -> List[Tuple[int, float, int]]:
+        store = self.store
+        return list(zip(store.removal_pos.values.tolist(), store.removal_time.values.tolist(),
+                        store.removal_id.values.tolist()))
+
+    def _ensure_index(self) -> None:
+        # 行索引由 store 维护
+        self._index_built = True
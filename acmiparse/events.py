@@ -0,0 +1,235 @@
+# events.py
+"""
+事件表：把散落在各帧对象行上的 ACMIEvent 收集为按时间排序的列式表，并按类型/来源 id/被引用 id 建索引
+用法：
+    table = load_acmi('demo.acmi').events
+    table.find('Destroyed', object_id=0x102)           # 涉及 0x102 的全部 Destroyed 事件
+    table.find(start=600, end=900)                     # 时间窗内的全部事件
+    table.pairs('TakenOff', 'Landed')                  # 起飞 -> 同一对象的下一次着陆
+索引均为 (id, 类型, 时间) 的字典序排序数组，按 id、类型、时间窗的查询都是 O(log n) 次二分 + 结果数
+来源 id 为事件行自身的 object_id(全局事件为 0)，被引用 id 为 Event=类型|id1|id2|...|文本 中的 id
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .model import *
+
+
+@dataclass(slots=True)
+class TimedEvent:
+    time_offset: float
+    event: ACMIEvent
+
+
+def _range(arr: np.ndarray, value, lo: int, hi: int) -> Tuple[int, int]:
+    part = arr[lo:hi]
+    return lo + int(np.searchsorted(part, value, 'left')), lo + int(np.searchsorted(part, value, 'right'))
+
+
+# ---------- 排序索引 ----------
+@dataclass(slots=True)
+class _EventIndex:
+    """按 (id, 类型, 时间) 字典序排列的事件下标"""
+    ids: np.ndarray      # uint64
+    codes: np.ndarray    # int32
+    times: np.ndarray    # float64
+    events: np.ndarray   # int64，指向事件表的下标
+
+    @classmethod
+    def build(cls, ids: np.ndarray, codes: np.ndarray, times: np.ndarray, events: np.ndarray) -> '_EventIndex':
+        order = np.lexsort((times, codes, ids))
+        return cls(ids[order], codes[order], times[order], events[order])
+
+    def lookup(self, oid: Optional[int] = None, code: Optional[int] = None,
+               start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """返回命中的事件下标(按时间升序)"""
+        lo, hi = 0, len(self.events)
+        if oid is not None:
+            lo, hi = _range(self.ids, np.uint64(oid), lo, hi)
+        if code is not None:
+            lo, hi = _range(self.codes, code, lo, hi)
+            # id、类型都已固定，区间内按时间有序
+            if start is not None:
+                lo += int(np.searchsorted(self.times[lo:hi], start, 'left'))
+            if end is not None:
+                hi = lo + int(np.searchsorted(self.times[lo:hi], end, 'right'))
+            return self.events[lo:hi]
+        found = self.events[lo:hi]
+        if start is not None or end is not None:
+            t = self.times[lo:hi]
+            mask = np.ones(len(t), dtype=bool)
+            if start is not None:
+                mask &= t >= start
+            if end is not None:
+                mask &= t <= end
+            found = found[mask]
+        return np.sort(found)   # 事件下标本身按时间排列
+
+
+# ---------- 事件表 ----------
+class EventTable:
+    """
+    列：times(升序) / object_ids(来源) / codes(类型编码，categories[code] 为类型名) / texts /
+        ref_offsets + ref_ids(被引用 id 平铺，第 i 个事件为 ref_ids[ref_offsets[i]:ref_offsets[i + 1]])
+    """
+
+    def __init__(self, times: np.ndarray, object_ids: np.ndarray, codes: np.ndarray,
+                 categories: List[str], texts: List[str], ref_offsets: np.ndarray, ref_ids: np.ndarray):
+        order = np.argsort(times, kind='stable')
+        if not np.array_equal(order, np.arange(len(order))):
+            counts = np.diff(ref_offsets)
+            starts = ref_offsets[:-1]
+            ref_ids = np.concatenate([ref_ids[starts[i]:starts[i] + counts[i]] for i in order]) \
+                if len(ref_ids) else ref_ids
+            ref_offsets = np.concatenate([[0], np.cumsum(counts[order])]).astype(np.int64)
+            times, object_ids, codes = times[order], object_ids[order], codes[order]
+            texts = [texts[i] for i in order.tolist()]
+        self.times = times
+        self.object_ids = object_ids
+        self.codes = codes
+        self.categories = categories
+        self.texts = texts
+        self.ref_offsets = ref_offsets
+        self.ref_ids = ref_ids
+        self._codes = {name: i for i, name in enumerate(categories)}
+
+        n = len(times)
+        idx = np.arange(n, dtype=np.int64)
+        self._by_type = _EventIndex.build(np.zeros(n, dtype=np.uint64), codes, times, idx)
+        self._by_source = _EventIndex.build(object_ids, codes, times, idx)
+        owner = np.repeat(idx, np.diff(ref_offsets))
+        refs = ref_ids
+        if len(owner):
+            # 同一事件多次引用同一 id 只在索引中保留一条，否则按 id 查询会重复返回
+            order = np.lexsort((refs, owner))
+            owner, refs = owner[order], refs[order]
+            keep = np.ones(len(owner), dtype=bool)
+            keep[1:] = (owner[1:] != owner[:-1]) | (refs[1:] != refs[:-1])
+            owner, refs = owner[keep], refs[keep]
+        self._by_ref = _EventIndex.build(refs, codes[owner], times[owner], owner)
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_events(cls, items: Iterable[Tuple[float, ACMIEvent]]) -> 'EventTable':
+        times, oids, codes, texts, offsets, refs = [], [], [], [], [0], []
+        categories: List[str] = []
+        lookup: Dict[str, int] = {}
+        for t, ev in items:
+            code = lookup.get(ev.event_type)
+            if code is None:
+                code = lookup[ev.event_type] = len(categories)
+                categories.append(ev.event_type)
+            times.append(t)
+            oids.append(ev.object_id)
+            codes.append(code)
+            texts.append(ev.event_text)
+            refs.extend(ev.object_ids or ())
+            offsets.append(len(refs))
+        return cls(np.asarray(times, dtype=np.float64), np.asarray(oids, dtype=np.uint64),
+                   np.asarray(codes, dtype=np.int32), categories, texts,
+                   np.asarray(offsets, dtype=np.int64), np.asarray(refs, dtype=np.uint64))
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[ACMIFrame]) -> 'EventTable':
+        """扫描全部帧(用于不是由 ACMILoader 生成的 ACMIFile)"""
+        return cls.from_events((o.time_offset, o.object_events)
+                               for f in frames for o in f.objects if o.object_events is not None)
+
+    @classmethod
+    def from_store(cls, store) -> 'EventTable':
+        """直接由 ColumnarFrameStore 的事件列构建"""
+        rows = store.event_row.values
+        used, codes = np.unique(store.event_type.values, return_inverse=True)
+        strings = store.strings
+        return cls(store.frame_times.values[store.row_frame.values[rows]].astype(np.float64),
+                   store.row_object_id.values[rows].astype(np.uint64),
+                   codes.astype(np.int32).reshape(-1), [strings[c] for c in used.tolist()],
+                   [strings[c] for c in store.event_text.values.tolist()],
+                   store.event_ids_offsets.values.astype(np.int64),
+                   store.event_ids.values.astype(np.uint64))
+
+    # ---------- 访问 ----------
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, i: int) -> TimedEvent:
+        lo, hi = self.ref_offsets[i], self.ref_offsets[i + 1]
+        return TimedEvent(float(self.times[i]), ACMIEvent(
+            int(self.object_ids[i]), self.categories[self.codes[i]],
+            self.ref_ids[lo:hi].tolist(), self.texts[i]))
+
+    def __iter__(self) -> Iterator[TimedEvent]:
+        return (self[i] for i in range(len(self)))
+
+    def type_counts(self) -> Dict[str, int]:
+        counts = np.bincount(self.codes, minlength=len(self.categories))
+        return {name: int(n) for name, n in zip(self.categories, counts)}
+
+    # ---------- 查询 ----------
+    def indices(self, event_type: Optional[str] = None, object_id: Optional[int] = None,
+                start: Optional[float] = None, end: Optional[float] = None,
+                role: str = 'any') -> np.ndarray:
+        """
+        命中事件的下标(按时间升序)
+        role: object_id 的角色，'source' 事件行自身的 id / 'ref' 被引用的 id / 'any' 两者之一
+        """
+        code = None
+        if event_type is not None:
+            code = self._codes.get(event_type)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+        if object_id is None:
+            if code is not None:
+                return self._by_type.lookup(None, code, start, end)
+            lo = 0 if start is None else int(np.searchsorted(self.times, start, 'left'))
+            hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, 'right'))
+            return np.arange(lo, max(lo, hi), dtype=np.int64)
+        if role not in ('any', 'source', 'ref'):
+            raise ValueError(f"未知的 role: {role}")
+        parts = []
+        if role in ('any', 'source'):
+            parts.append(self._by_source.lookup(object_id, code, start, end))
+        if role in ('any', 'ref'):
+            parts.append(self._by_ref.lookup(object_id, code, start, end))
+        return parts[0] if len(parts) == 1 else np.union1d(parts[0], parts[1])
+
+    def find(self, event_type: Optional[str] = None, object_id: Optional[int] = None,
+             start: Optional[float] = None, end: Optional[float] = None, role: str = 'any') -> List[TimedEvent]:
+        return [self[i] for i in self.indices(event_type, object_id, start, end, role).tolist()]
+
+    def count(self, event_type: Optional[str] = None, object_id: Optional[int] = None,
+              start: Optional[float] = None, end: Optional[float] = None, role: str = 'any') -> int:
+        return len(self.indices(event_type, object_id, start, end, role))
+
+    def pairs(self, start_type: str, end_type: str,
+              max_gap: Optional[float] = None) -> List[Tuple[TimedEvent, Optional[TimedEvent]]]:
+        """
+        对每个 start_type 事件，找同一主体(第一个被引用 id，没有时为来源 id)之后最早的 end_type 事件
+        如 pairs('TakenOff', 'Landed')；找不到(或超过 max_gap 秒)时配对为 None
+        """
+        out = []
+        for i in self.indices(start_type).tolist():
+            lo, hi = self.ref_offsets[i], self.ref_offsets[i + 1]
+            subject, role = (int(self.ref_ids[lo]), 'ref') if hi > lo else (int(self.object_ids[i]), 'source')
+            t = float(self.times[i])
+            until = None if max_gap is None else t + max_gap
+            match = self.indices(end_type, subject, t, until, role)
+            match = match[match > i] if len(match) else match   # 同一时刻时只取排在其后的
+            out.append((self[i], self[int(match[0])] if len(match) else None))
+        return out
+
+    # ---------- 导出 ----------
+    def to_df(self) -> pd.DataFrame:
+        offs = self.ref_offsets
+        return pd.DataFrame({
+            'time_offset': self.times,
+            'event_type': pd.Categorical.from_codes(self.codes, self.categories) if len(self.categories)
+            else pd.Categorical([]),
+            'object_id': self.object_ids,
+            'object_ids': [self.ref_ids[offs[i]:offs[i + 1]].tolist() for i in range(len(self))],
+            'event_text': self.texts,
+        })
@@ -0,0 +1,258 @@
+# index.py
+from __future__ import annotations
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Iterator, Tuple, Callable, BinaryIO
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, ZIP_DEFLATED
+import logging
+import struct
+import zlib
+
+from .model import *
+from .reader import ACMIFileReader, join_continuations
+from .parser import ACMIParser, _FrameBegin
+from .state import ACMIStateEngine, ObjectState
+
+logger = logging.getLogger(__name__)
+
+_BLOCK = 256 * 1024
+_LOCAL_HEADER = struct.Struct('<4s5H3L2H')   # zip 本地文件头(30 字节)
+
+
+# ---------- zip 解压检查点 ----------
+@dataclass
+class ZipCheckpoint:
+    raw_pos: int                 # 压缩数据中的绝对偏移
+    decoded_pos: int             # 对应的解码流偏移
+    decomp: Optional[object]     # zlib 解压器副本(STORED 成员或数据起点为 None)
+
+
+class _InflateStream:
+    """
+    直接从 zip 成员的原始压缩数据解压，可在块边界保存/恢复解压器状态，
+    从而在任意检查点继续解压而不必从头开始
+    """
+
+    def __init__(self, file_path: str, info: ZipInfo):
+        self._f = open(file_path, 'rb')
+        self._f.seek(info.header_offset)
+        fields = _LOCAL_HEADER.unpack(self._f.read(_LOCAL_HEADER.size))
+        name_len, extra_len = fields[-2], fields[-1]
+        self._data_start = info.header_offset + _LOCAL_HEADER.size + name_len + extra_len
+        self._raw_end = self._data_start + info.compress_size
+        self._stored = info.compress_type == ZIP_STORED
+        self.checkpoints: List[ZipCheckpoint] = []
+        self._start = ZipCheckpoint(self._data_start, 0, None)
+        self.restore(self._start)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._raw_pos >= self._raw_end
+
+    def checkpoint(self) -> ZipCheckpoint:
+        # 尚未输入任何数据的解压器无法 copy，数据起点直接记为 None
+        fresh = self._stored or self._raw_pos == self._data_start
+        return ZipCheckpoint(self._raw_pos, self.decoded_pos, None if fresh else self._decomp.copy())
+
+    def restore(self, cp: ZipCheckpoint) -> None:
+        self._raw_pos = cp.raw_pos
+        self.decoded_pos = cp.decoded_pos
+        if self._stored:
+            self._decomp = None
+        else:
+            self._decomp = zlib.decompressobj(-15) if cp.decomp is None else cp.decomp.copy()
+        self._pending = b''
+        self._f.seek(cp.raw_pos)
+
+    def seek(self, offset: int) -> None:
+        """定位到解码流 offset：从最近的检查点恢复，再丢弃多余输出"""
+        i = bisect_right([cp.decoded_pos for cp in self.checkpoints], offset) - 1
+        self.restore(self.checkpoints[i] if i >= 0 else self._start)
+        while self.decoded_pos < offset:
+            block = self.read_block()
+            if not block:
+                return
+            over = self.decoded_pos - offset
+            if over > 0:
+                self._pending = block[len(block) - over:]
+                self.decoded_pos = offset
+
+    def read_block(self) -> bytes:
+        if self._pending:
+            block, self._pending = self._pending, b''
+            self.decoded_pos += len(block)
+            return block
+        while self._raw_pos < self._raw_end:
+            raw = self._f.read(min(_BLOCK, self._raw_end - self._raw_pos))
+            if not raw:
+                break
+            self._raw_pos += len(raw)
+            out = raw if self._stored else self._decomp.decompress(raw)
+            if self._raw_pos >= self._raw_end and not self._stored:
+                out += self._decomp.flush()
+            if out:
+                self.decoded_pos += len(out)
+                return out
+        return b''
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def _iter_lines(read_block: Callable[[], bytes], offset: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    把块流切成逻辑行，产出 (行首在解码流中的偏移, 行内容)
+    以 '\\' 结尾的物理行与下一行合并(与 reader 一致)，偏移为合并后逻辑行的起点
+    """
+    rest = b''
+    pos = start = offset
+    pending: List[bytes] = []
+
+    def lines() -> Iterator[bytes]:
+        nonlocal rest
+        while True:
+            block = read_block()
+            if not block:
+                break
+            parts = (rest + block).split(b'\n')
+            rest = parts.pop()
+            yield from parts
+        if rest:
+            yield rest
+
+    for raw in lines():
+        line = raw.rstrip(b'\r')
+        if not pending:
+            start = pos
+        pos += len(raw) + 1
+        if line.endswith(b'\\'):
+            pending.append(line)
+        elif pending:
+            pending.append(line)
+            yield start, join_continuations(pending)[0]
+            pending = []
+        else:
+            yield start, line
+    if pending:
+        yield start, join_continuations(pending)[0]
+
+
+# ---------- 帧时间索引 ----------
+@dataclass
+class FrameCheckpoint:
+    time_offset: float
+    offset: int                                         # 帧行在解码流中的偏移
+    keyframe: Optional[Dict[int, ObjectState]] = None   # 该帧之前的完整对象状态
+
+
+@dataclass
+class FrameTimeIndex:
+    """
+    稀疏的帧时间索引：每隔 interval 秒记录一个帧行偏移和关键帧状态；
+    zip 输入额外记录解压检查点，随机定位的代价与文件总长度无关
+    """
+    file_path: str
+    encoding: str
+    checkpoints: List[FrameCheckpoint] = field(default_factory=list)
+    zip_member: Optional[ZipInfo] = None
+    zip_checkpoints: List[ZipCheckpoint] = field(default_factory=list, repr=False)
+
+    def locate(self, time_offset: float) -> FrameCheckpoint:
+        """不晚于 time_offset 的最近检查点(早于首帧时返回首个检查点)"""
+        if not self.checkpoints:
+            raise ValueError('索引中没有帧')
+        i = bisect_right([cp.time_offset for cp in self.checkpoints], time_offset) - 1
+        return self.checkpoints[max(i, 0)]
+
+    def iter_lines_from(self, offset: int) -> Iterator[bytes]:
+        """从解码流 offset 处开始逐行读取"""
+        if self.zip_member is None:
+            with open(self.file_path, 'rb') as f:
+                f.seek(offset)
+                for _, line in _iter_lines(lambda: f.read(_BLOCK), offset):
+                    yield line
+            return
+        stream = _InflateStream(self.file_path, self.zip_member)
+        stream.checkpoints = self.zip_checkpoints
+        try:
+            stream.seek(offset)
+            for _, line in _iter_lines(stream.read_block, offset):
+                yield line
+        finally:
+            stream.close()
+
+    def seek(self, time_offset: float) -> Iterator[bytes]:
+        """从覆盖 time_offset 的检查点帧开始逐行读取"""
+        return self.iter_lines_from(self.locate(time_offset).offset)
+
+    def state_at(self, time_offset: float) -> ACMIFrame:
+        """time_offset 时刻(含该时刻所在帧)全部存活对象的完整状态"""
+        cp = self.locate(time_offset)
+        engine = ACMIStateEngine()
+        if cp.keyframe is not None:
+            engine.live = {oid: _copy_state(s) for oid, s in cp.keyframe.items()}
+        parser = ACMIParser(encoding=self.encoding)
+        parser._header_done = parser._global_prop_done = True
+        for ev in parser.parse_lines(self.iter_lines_from(cp.offset)):
+            if isinstance(ev, _FrameBegin) and ev.time_offset > time_offset:
+                break
+            engine.apply(ev)
+        return engine.snapshot()
+
+
+def _copy_state(s: ObjectState) -> ObjectState:
+    return ObjectState(s.object_id, s.first_seen, s.last_update, list(s.coords),
+                       dict(s.text_properties), dict(s.numeric_properties))
+
+
+def build_frame_index(reader: ACMIFileReader, interval: float = 60.0, keyframes: bool = True,
+                      zip_checkpoint_bytes: int = 16 * 1024 * 1024) -> FrameTimeIndex:
+    """
+    顺序扫描一遍，每隔 interval 秒(帧时间)记录一个检查点；
+    keyframes=True 时同时保存该帧之前的完整状态，供 state_at 直接起步
+    """
+    index = FrameTimeIndex(reader.file_path, reader.encoding)
+    stream = None
+    if reader.zip_file:
+        with ZipFile(reader.file_path) as z:
+            info = next((i for i in z.infolist() if i.filename.lower().endswith('.acmi')), None)
+        if info is None:
+            raise FileNotFoundError("压缩包中未找到.acmi文件")
+        if info.compress_type not in (ZIP_STORED, ZIP_DEFLATED) or info.flag_bits & 0x1:
+            raise ValueError(f"不支持索引的压缩方式: {info.compress_type}")
+        index.zip_member = info
+        stream = _InflateStream(reader.file_path, info)
+        last_zcp = [-zip_checkpoint_bytes]
+
+        def read_block() -> bytes:
+            if not stream.exhausted and stream.decoded_pos - last_zcp[0] >= zip_checkpoint_bytes:
+                index.zip_checkpoints.append(stream.checkpoint())
+                last_zcp[0] = stream.decoded_pos
+            return stream.read_block()
+    else:
+        f = open(reader.file_path, 'rb')
+        read_block = lambda: f.read(_BLOCK)
+
+    engine = ACMIStateEngine() if keyframes else None
+    parser = ACMIParser(encoding=reader.encoding)
+    last_time = None
+    try:
+        for offset, line in _iter_lines(read_block, 0):
+            if line[:1] == b'#':
+                try:
+                    t = float(line[1:])
+                except ValueError:
+                    t = None
+                if t is not None and (last_time is None or t - last_time >= interval):
+                    keyframe = {oid: _copy_state(s) for oid, s in engine.live.items()} if engine else None
+                    index.checkpoints.append(FrameCheckpoint(t, offset, keyframe))
+                    last_time = t
+            for ev in parser.parse_lines((line,)):
+                if engine is not None:
+                    engine.apply(ev)
+    finally:
+        if stream is not None:
+            stream.close()
+        else:
+            f.close()
+    return index
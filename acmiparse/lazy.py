@@ -0,0 +1,409 @@
+# lazy.py
+"""
+两阶段惰性加载：
+    第一阶段只扫描一遍字节，记录每条更新的所在帧、object_id 与正文字节区间(numpy 向量化，不解析 T=/属性)
+    第二阶段在访问 id_objects / IdView / frames[i] 时才解析对应的行，结果缓存
+用法：
+    acmi = load_acmi('big.zip.acmi', lazy=True)
+    track = acmi.objects[0x102].to_df()     # 只解析这一个对象的行
+普通文件通过 mmap 访问，压缩包解压到内存中的 bytes；close() 释放
+"""
+from __future__ import annotations
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Any
+import logging
+import mmap
+import re
+
+import numpy as np
+
+from .model import *
+from .reader import ACMIFileReader, join_continuations
+from .acmi_file import ACMIFile, _IdIndex
+from .parser import ACMIParser, ACMILoader, _HeaderParsed, _GlobalProp, _FrameBegin, _ObjectUpdate, _ObjectRemove
+from .props import PropertyTable
+
+logger = logging.getLogger(__name__)
+
+_HEX = np.full(256, 255, dtype=np.uint8)
+for _i, _c in enumerate(b'0123456789abcdef'):
+    _HEX[_c] = _i
+for _i, _c in enumerate(b'ABCDEF'):
+    _HEX[_c] = 10 + _i
+_MAX_ID_DIGITS = 16
+_RE_EVENT = re.compile(rb'Event=')
+_RE_COORDS = re.compile(rb',T=')
+_RE_PROPS = re.compile(rb',(?!T=|Event=)[^,=]+=')
+_RE_TYPE_NAME = re.compile(rb',(?:Type|Name)=')
+
+
+# ---------- 第一阶段：扫描 ----------
+@dataclass
+class LazyRows:
+    """每条更新一行：所在帧、id、正文(逗号之后)字节区间"""
+    buf: Any                         # bytes 或 mmap
+    encoding: str
+    frame_times: np.ndarray          # float64
+    frame_starts: np.ndarray         # int64，第 i 帧的第一行
+    row_frame: np.ndarray            # int32
+    row_id: np.ndarray               # uint64
+    row_start: np.ndarray            # int64
+    row_end: np.ndarray              # int64
+    props_table: Optional[PropertyTable] = None
+    continued: bool = False          # 文件中出现过 '\\' 续行，解析前需合并
+    removal_pos: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))   # 移除时已有的行数
+    removal_time: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    removal_id: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64))
+    objects: List[Optional[ACMIObject]] = field(default_factory=list, repr=False)   # 解析缓存
+    _parser: ACMIParser = field(default_factory=ACMIParser, repr=False)
+
+    def __post_init__(self):
+        self.objects = [None] * len(self.row_id)
+
+    @property
+    def row_count(self) -> int:
+        return len(self.row_id)
+
+    def frame_rows(self, index: int) -> range:
+        stop = self.frame_starts[index + 1] if index + 1 < len(self.frame_starts) else self.row_count
+        return range(int(self.frame_starts[index]), int(stop))
+
+    def object_at(self, row: int) -> ACMIObject:
+        obj = self.objects[row]
+        if obj is None:
+            obj = self.objects[row] = self._decode(row)
+        return obj
+
+    def _decode(self, row: int) -> ACMIObject:
+        oid = int(self.row_id[row])
+        body = self.buf[self.row_start[row]:self.row_end[row]]
+        if self.continued:
+            body = _merge_continued(body)
+        body = body.decode('ascii') if body.isascii() else bytes(body).decode(self.encoding)
+        coords, event, props = self._parser._parse_body(oid, body)
+        obj = ACMIObject(object_id=oid, time_offset=float(self.frame_times[self.row_frame[row]]))
+        if coords:
+            obj.object_coordinates = pack_coordinates(coords)
+        if props:
+            obj.object_properties = props if self.props_table is None else self.props_table.add(props)
+        if event:
+            obj.object_events = event
+        return obj
+
+    def matching_rows(self, pattern: 're.Pattern') -> np.ndarray:
+        """行内(含分隔正文的逗号)能匹配 pattern 的行号，升序去重；在整个缓冲区上做一次 C 级搜索"""
+        pos = np.fromiter((m.start() for m in pattern.finditer(self.buf)), dtype=np.int64)
+        if not len(pos) or not self.row_count:
+            return np.empty(0, dtype=np.int64)
+        pos += 1   # 匹配可能从 id 后的逗号开始，按其后一个字节归属行
+        rows = np.searchsorted(self.row_start, pos, 'right') - 1
+        ok = (rows >= 0) & (pos < self.row_end[np.maximum(rows, 0)])
+        return np.unique(rows[ok])
+
+    def iter_matching_rows(self, pattern: 're.Pattern') -> Iterator[int]:
+        """同 matching_rows，但逐个产出(可能重复)，适合找到第一个即停止的场合"""
+        starts, ends = self.row_start, self.row_end
+        for m in pattern.finditer(self.buf):
+            pos = m.start() + 1
+            r = int(np.searchsorted(starts, pos, 'right')) - 1
+            if r >= 0 and pos < ends[r]:
+                yield r
+
+
+def _open_buffer(reader: ACMIFileReader):
+    """普通文件 mmap(按需访问，提示随机读)，压缩包解压为 bytes"""
+    if reader.zip_file:
+        with reader.open_binary() as f:
+            return f.read()
+    mm = reader.open_mmap(sequential=False)
+    return b'' if mm is None else mm
+
+
+def _merge_continued(line: bytes) -> bytes:
+    """跨多个物理行的逻辑行：按 ACMIFileReader 的规则合并续行"""
+    if b'\\\n' not in line and b'\\\r\n' not in line:
+        return line
+    return b'\n'.join(join_continuations(line.replace(b'\r\n', b'\n').split(b'\n')))
+
+
+def _line_spans(arr: np.ndarray) -> Tuple[np.ndarray, np.ndarray, bool]:
+    """逻辑行的 [起点, 终点)(不含行尾 '\\r')；以 '\\' 结尾的物理行与下一行合并为一个区间"""
+    nl = np.flatnonzero(arr == 0x0A)
+    starts = np.concatenate(([0], nl + 1))
+    ends = np.concatenate((nl, [len(arr)]))
+    if len(starts) and starts[-1] >= len(arr):
+        starts, ends = starts[:-1], ends[:-1]
+    if len(arr):
+        cr = (ends > starts) & (arr[np.maximum(ends - 1, 0)] == 0x0D)
+        ends[cr] -= 1
+    cont = np.flatnonzero((ends > starts) & (arr[np.maximum(ends - 1, 0)] == 0x5C))
+    if not len(cont):
+        return starts, ends, False
+    keep = np.ones(len(starts), dtype=bool)
+    for i in cont[::-1].tolist():   # 从后往前，连续多行续行逐级并入
+        if i + 1 < len(starts):
+            ends[i] = ends[i + 1]
+            keep[i + 1] = False
+        else:
+            ends[i] -= 1   # 文件末尾的续行符没有下一行可接，直接去掉
+    return starts[keep], ends[keep], True
+
+
+def _hex_ids(arr: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    向量化解析行首的十六进制 id：返回 (id, 逗号偏移, 是否成功)
+    不是纯十六进制 id(如含空白)或超过 16 位的行标记为失败，由调用方逐行回退
+    """
+    n = len(starts)
+    ids = np.zeros(n, dtype=np.uint64)
+    comma = np.full(n, -1, dtype=np.int64)
+    active = np.ones(n, dtype=bool)
+    bad = np.zeros(n, dtype=bool)
+    last = len(arr) - 1
+    for j in range(_MAX_ID_DIGITS + 1):
+        pos = starts + j
+        inb = pos < ends
+        b = arr[np.minimum(pos, last)]
+        hit = active & inb & (b == 0x2C)
+        comma[hit] = j
+        active &= inb & ~hit
+        v = _HEX[b]
+        bad |= active & (v == 255)
+        active &= v != 255
+        ids[active] = ids[active] * np.uint64(16) + v[active].astype(np.uint64)
+    ok = (comma > 0) & ~bad
+    return ids, comma, ok
+
+
+def scan(file_path: str, encoding: str = 'utf-8-sig', *, start: Optional[float] = None,
+         end: Optional[float] = None, ids: Optional[Iterable[int]] = None,
+         compact_properties: bool = False) -> 'LazyACMIFile':
+    """
+    第一阶段扫描，结果与 ACMILoader.load_file(同样的过滤条件)逐帧一致；
+    object_id 超出 uint64 的行直接丢弃(完整加载时 id 索引同样无法容纳)
+    """
+    reader = ACMIFileReader(file_path, encoding)
+    buf = _open_buffer(reader)
+    arr = np.frombuffer(buf, dtype=np.uint8) if len(buf) else np.empty(0, dtype=np.uint8)
+    starts, ends, continued = _line_spans(arr)
+
+    # 前导部分(文件头、全局属性)交给解析器逐行处理，直到全局属性阶段结束
+    loader = ACMILoader(file_path, encoding)
+    parser = ACMIParser(encoding=encoding)
+    head_frames: List[Tuple[float, int]] = []     # (时间, 行号)
+    head_rows: List[Tuple[int, int, int, int]] = []  # (帧序号, id, 正文起点, 终点)
+    removals: List[Tuple[int, float, int, int]] = []  # (此前的行数, 时间, id, 帧序号)
+    k = 0
+    while k < len(starts) and not parser._global_prop_done:
+        s, e = int(starts[k]), int(ends[k])
+        line = bytes(buf[s:e])
+        for ev in parser.parse_lines((_merge_continued(line) if continued else line,)):
+            if isinstance(ev, (_HeaderParsed, _GlobalProp)):
+                loader._handle(ev)
+            elif isinstance(ev, _FrameBegin):
+                head_frames.append((ev.time_offset, k))
+            elif isinstance(ev, _ObjectUpdate) and head_frames:
+                head_rows.append((len(head_frames) - 1, ev.obj_id, buf.find(b',', s, e) + 1, e))
+            elif isinstance(ev, _ObjectRemove):
+                removals.append((len(head_rows), ev.time_offset, ev.obj_id, len(head_frames) - 1))
+        k += 1
+    if not parser._header_done:
+        loader._handle(_HeaderParsed(parser._header))
+
+    # 之后的行：按首字节分类
+    starts, ends = starts[k:], ends[k:]
+    nonempty = ends > starts
+    first = np.where(nonempty, arr[np.minimum(starts, max(len(arr) - 1, 0))], 0) if len(arr) else \
+        np.empty(0, dtype=np.uint8)
+    frame_lines = np.flatnonzero(first == 0x23)
+    times, frame_at = [t for t, _ in head_frames], []
+    for i in frame_lines.tolist():
+        try:
+            times.append(float(bytes(buf[starts[i] + 1:ends[i]])))
+        except ValueError:
+            continue
+        frame_at.append(i)
+    frame_at = np.asarray(frame_at, dtype=np.int64)
+
+    obj_lines = np.flatnonzero(_HEX[first] != 255)
+    o_starts, o_ends = starts[obj_lines], ends[obj_lines]
+    row_id, comma, ok = _hex_ids(arr, o_starts, o_ends)
+    for i in np.flatnonzero(~ok).tolist():   # 少见写法逐行回退，与 ACMIParser 的 int(x, 16) 一致
+        s, e = int(o_starts[i]), int(o_ends[i])
+        c = buf.find(b',', s, e)
+        try:
+            oid = int(bytes(buf[s:c]), 16) if c > s else -1
+        except ValueError:
+            oid = -1
+        if 0 <= oid < 2 ** 64:
+            row_id[i], comma[i], ok[i] = oid, c - s, True
+    row_frame = np.searchsorted(frame_at, obj_lines, 'right') - 1 + len(head_frames)
+    keep = ok & (row_frame >= 0)   # 第一帧之前的对象行与 ACMILoader 一样丢弃
+
+    # 移除行很少，逐行解析 id；位置为其之前保留的对象行数
+    rem_lines = np.flatnonzero(first == 0x2D)
+    if len(rem_lines):
+        rem_pos = np.searchsorted(obj_lines[keep], rem_lines) + len(head_rows)
+        rem_frame = np.searchsorted(frame_at, rem_lines, 'right') - 1 + len(head_frames)
+        for i, pos, f in zip(rem_lines.tolist(), rem_pos.tolist(), rem_frame.tolist()):
+            try:
+                oid = int(bytes(buf[starts[i] + 1:ends[i]]), 16)
+            except ValueError:
+                continue
+            if 0 <= oid < 2 ** 64:
+                removals.append((pos, times[f] if f >= 0 else parser._time, oid, f))
+    removal_pos = np.asarray([r[0] for r in removals], dtype=np.int64)
+    removal_time = np.asarray([r[1] for r in removals], dtype=np.float64)
+    removal_id = np.asarray([r[2] for r in removals], dtype=np.uint64)
+    removal_frame = np.asarray([r[3] for r in removals], dtype=np.int64)
+
+    row_frame = np.concatenate((np.asarray([r[0] for r in head_rows], dtype=np.int64), row_frame[keep]))
+    row_id = np.concatenate((np.asarray([r[1] for r in head_rows], dtype=np.uint64), row_id[keep]))
+    row_start = np.concatenate((np.asarray([r[2] for r in head_rows], dtype=np.int64),
+                                (o_starts + comma + 1)[keep]))
+    row_end = np.concatenate((np.asarray([r[3] for r in head_rows], dtype=np.int64), o_ends[keep]))
+    frame_times = np.asarray(times, dtype=np.float64)
+
+    # 过滤：与 ACMIParser 的流式过滤语义一致(越过 end 的第一帧起全部丢弃，start 之前的帧不产出)
+    if start is not None or end is not None or ids is not None:
+        fkeep = np.ones(len(frame_times), dtype=bool)
+        if end is not None:
+            over = np.flatnonzero(frame_times > end)
+            if len(over):
+                fkeep[over[0]:] = False
+        if start is not None:
+            fkeep &= frame_times >= start
+        rkeep = fkeep[row_frame] if len(row_frame) else np.zeros(0, dtype=bool)
+        if ids is not None:
+            rkeep &= np.isin(row_id, np.fromiter(ids, dtype=np.uint64))
+        # 第一帧之前的移除仅在没有 start 时保留(与解析器的 in_window 初值一致)
+        mkeep = np.where(removal_frame >= 0, fkeep[np.maximum(removal_frame, 0)] if len(fkeep) else False,
+                         start is None)
+        if ids is not None:
+            mkeep &= np.isin(removal_id, np.fromiter(ids, dtype=np.uint64))
+        kept_before = np.concatenate(([0], np.cumsum(rkeep)))
+        removal_pos, removal_time, removal_id = kept_before[removal_pos[mkeep]], removal_time[mkeep], \
+            removal_id[mkeep]
+        remap = np.cumsum(fkeep) - 1
+        frame_times = frame_times[fkeep]
+        row_frame, row_id, row_start, row_end = remap[row_frame[rkeep]], row_id[rkeep], row_start[rkeep], \
+            row_end[rkeep]
+
+    row_frame = row_frame.astype(np.int32)
+    rows = LazyRows(buf, encoding, frame_times,
+                    np.searchsorted(row_frame, np.arange(len(frame_times)), 'left').astype(np.int64),
+                    row_frame, row_id, row_start, row_end,
+                    PropertyTable() if compact_properties else None, continued,
+                    removal_pos=removal_pos, removal_time=removal_time, removal_id=removal_id)
+    return LazyACMIFile.from_rows(loader.header, loader.global_properties, rows)
+
+
+# ---------- 第二阶段：按需解析的视图 ----------
+class LazyFrameSequence(Sequence):
+    """ACMIFile.frames 的只读视图，访问某一帧时才解析该帧的行"""
+
+    def __init__(self, rows: LazyRows):
+        self._rows = rows
+
+    def __len__(self) -> int:
+        return len(self._rows.frame_times)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('frame index out of range')
+        rows = self._rows
+        return ACMIFrame(timestamp=float(rows.frame_times[index]),
+                         objects=[rows.object_at(r) for r in rows.frame_rows(index)])
+
+    def __iter__(self) -> Iterator[ACMIFrame]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+@dataclass
+class LazyACMIFile(ACMIFile):
+    """与 ACMIFile 接口一致；id 索引直接由扫描结果建立，只解析被访问的行"""
+    rows: LazyRows = field(default=None, repr=False)
+
+    @classmethod
+    def from_rows(cls, header: ACMIHeader, global_properties: ACMIGlobalProperties,
+                  rows: LazyRows) -> 'LazyACMIFile':
+        return cls(header=header, global_properties=global_properties,
+                   frames=LazyFrameSequence(rows), rows=rows)
+
+    @property
+    def decoded_count(self) -> int:
+        """已解析(缓存)的行数"""
+        return sum(o is not None for o in self.rows.objects)
+
+    def id_objects(self, object_id: int) -> List[ACMIObject]:
+        self._ensure_index()
+        index = self._id_index
+        lo, hi = index.span(object_id)
+        rows = self.rows
+        starts = rows.frame_starts[index.frame_index[lo:hi]] + index.object_index[lo:hi]
+        return [rows.object_at(r) for r in starts.tolist()]
+
+    def close(self) -> None:
+        buf = self.rows.buf
+        if isinstance(buf, mmap.mmap):
+            buf.close()
+
+    def _build_id_index(self) -> None:
+        rows = self.rows
+        keys = rows.row_id
+        order = np.argsort(keys, kind='stable')
+        uniq, first = np.unique(keys[order], return_index=True)
+        local = np.arange(rows.row_count, dtype=np.int64) - rows.frame_starts[rows.row_frame]
+        self._id_index = _IdIndex(uniq, np.append(first, len(order)),
+                                  rows.row_frame[order], local[order].astype(np.int32),
+                                  {oid: i for i, oid in enumerate(uniq.tolist())})
+
+    def _build_summary(self) -> 'ACMISummary':
+        """计数与时间直接由扫描数组得到；Type/Name 与列只解析字节搜索命中的行"""
+        from .summary import ACMISummary
+        rows = self.rows
+        types: Dict[int, str] = {}
+        names: Dict[int, str] = {}
+        for r in rows.matching_rows(_RE_TYPE_NAME).tolist():
+            obj = rows.object_at(r)
+            text = obj.object_properties.text_properties if obj.object_properties is not None else None
+            if text:
+                if text.get('Type'):
+                    types[obj.object_id] = text['Type']
+                if text.get('Name'):
+                    names[obj.object_id] = text['Name']
+
+        def any_row(pattern, attr: str) -> bool:
+            return any(getattr(rows.object_at(r), attr) is not None for r in rows.iter_matching_rows(pattern))
+
+        return ACMISummary.from_arrays(rows.frame_times, rows.frame_starts, rows.row_frame, rows.row_id,
+                                       types=types, names=names,
+                                       has_coordinates=any_row(_RE_COORDS, 'object_coordinates'),
+                                       has_properties=any_row(_RE_PROPS, 'object_properties'),
+                                       has_events=any_row(_RE_EVENT, 'object_events'))
+
+    def _build_lifecycle(self) -> 'LifecycleTable':
+        from .lifecycle import LifecycleTable
+        rows = self.rows
+        return LifecycleTable.from_arrays(rows.row_id, rows.frame_times[rows.row_frame], rows.removal_pos,
+                                          rows.removal_time, rows.removal_id, self.summary.end)
+
+    def _removals(self) -> List[Tuple[int, float, int]]:
+        rows = self.rows
+        return list(zip(rows.removal_pos.tolist(), rows.removal_time.tolist(), rows.removal_id.tolist()))
+
+    def _build_events(self) -> 'EventTable':
+        from .events import EventTable
+        rows = self.rows
+        items = []
+        for r in rows.matching_rows(_RE_EVENT).tolist():
+            obj = rows.object_at(r)
+            if obj.object_events is not None:
+                items.append((obj.time_offset, obj.object_events))
+        return EventTable.from_events(items)
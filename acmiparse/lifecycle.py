@@ -0,0 +1,225 @@
+# lifecycle.py
+"""
+对象生命周期表：每个对象每段存活期一行，记录出现时间、最后一次更新时间与移除时间
+用法：
+    life = load_acmi('demo.acmi').lifecycle
+    life.ids_at(600)                 # 600 秒时存在的全部对象
+    life.ids_during(600, 900)        # [600, 900] 内任意时刻存在过的对象
+    life.get(0x102)                  # 0x102 的各段存活期(同一 id 移除后可能再次出现)
+存活区间为 [出现时间, 移除时间)；没有被移除的对象存活到录像最后一帧(含)
+"某时刻存活" 由中心区间树回答，"时间段内存活" 额外用按出现时间排序的数组，均为 O(log n + k)
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Iterable, Iterator, Tuple
+
+import math
+
+import numpy as np
+import pandas as pd
+
+from .model import *
+
+
+@dataclass(slots=True)
+class Lifetime:
+    object_id: int
+    spawn: float                    # 第一次更新的时间
+    last_update: float              # 最后一次更新的时间
+    removed: Optional[float] = None  # 移除时间，未被移除为 None
+
+
+# ---------- 区间树 ----------
+class _IntervalTree:
+    """
+    静态中心区间树，区间为半开 [start, stop)
+    每个节点保存跨过中心点的区间：按 start 升序、按 stop 升序各一份，查询时二分取前缀/后缀
+    """
+
+    def __init__(self, starts: np.ndarray, stops: np.ndarray):
+        self._nodes: List[tuple] = []
+        idx = np.flatnonzero(stops > starts)   # 空区间在任何时刻都不存活
+        self._root = self._build(starts, stops, idx) if len(idx) else -1
+
+    def _build(self, starts: np.ndarray, stops: np.ndarray, idx: np.ndarray) -> int:
+        # 以中位数区间的起点为中心，保证该区间落在本节点，递归必然收敛
+        s = starts[idx]
+        center = float(np.sort(s)[len(s) // 2])
+        e = stops[idx]
+        here = (s <= center) & (e > center)
+        left, right = idx[e <= center], idx[s > center]
+        mine = idx[here]
+        by_start = mine[np.argsort(starts[mine], kind='stable')]
+        by_stop = mine[np.argsort(stops[mine], kind='stable')]
+        node = len(self._nodes)
+        self._nodes.append(None)
+        self._nodes[node] = (center, starts[by_start], by_start, stops[by_stop], by_stop,
+                             self._build(starts, stops, left) if len(left) else -1,
+                             self._build(starts, stops, right) if len(right) else -1)
+        return node
+
+    def stab(self, t: float) -> np.ndarray:
+        """start <= t < stop 的区间下标(无序)"""
+        parts = []
+        node = self._root
+        while node != -1:
+            center, start_vals, by_start, stop_vals, by_stop, left, right = self._nodes[node]
+            if t < center:
+                # 本节点区间都满足 stop > center > t
+                parts.append(by_start[:int(np.searchsorted(start_vals, t, 'right'))])
+                node = left
+            else:
+                # 本节点区间都满足 start <= center <= t
+                parts.append(by_stop[int(np.searchsorted(stop_vals, t, 'right')):])
+                node = right
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+
+
+# ---------- 生命周期表 ----------
+class LifecycleTable:
+    """
+    列：object_ids / spawn / last_update / removed(未移除为 NaN)，按 (spawn, object_id) 排序
+    end_time 为录像最后一帧时间，未移除对象的存活区间到此为止(含)
+    """
+
+    def __init__(self, object_ids: np.ndarray, spawn: np.ndarray, last_update: np.ndarray,
+                 removed: np.ndarray, end_time: Optional[float]):
+        order = np.lexsort((object_ids, spawn))
+        self.object_ids = object_ids[order]
+        self.spawn = spawn[order]
+        self.last_update = last_update[order]
+        self.removed = removed[order]
+        self.end_time = end_time
+        tail = math.inf if end_time is None else math.nextafter(end_time, math.inf)
+        self.stop = np.where(np.isnan(self.removed), np.maximum(tail, self.spawn), self.removed)
+        self._tree = _IntervalTree(self.spawn, self.stop)
+        by_id = np.argsort(self.object_ids, kind='stable')
+        self._id_keys, self._id_first = np.unique(self.object_ids[by_id], return_index=True)
+        self._id_order = by_id
+
+    # ---------- 构建 ----------
+    @classmethod
+    def from_arrays(cls, row_id: np.ndarray, row_time: np.ndarray,
+                    removal_pos: np.ndarray, removal_time: np.ndarray, removal_id: np.ndarray,
+                    end_time: Optional[float]) -> 'LifecycleTable':
+        """
+        row_id/row_time: 每条更新的 id 与时间(文件顺序)
+        removal_*: 每条移除的位置(此前已有的更新条数)、时间与 id
+        同一 id 的更新按其间的移除切分为多段存活期；移除一个当前不存活的 id 不产生记录
+        """
+        row_id = np.asarray(row_id, dtype=np.uint64)
+        row_time = np.asarray(row_time, dtype=np.float64)
+        removal_pos = np.asarray(removal_pos, dtype=np.int64)
+        removal_id = np.asarray(removal_id, dtype=np.uint64)
+        removal_time = np.asarray(removal_time, dtype=np.float64)
+
+        order = np.argsort(row_id, kind='stable')
+        keys, first, counts = np.unique(row_id[order], return_index=True, return_counts=True)
+        times = row_time[order]
+        removed_ids = np.unique(removal_id)
+        plain = ~np.isin(keys, removed_ids)
+
+        # 没有移除记录的 id：整体一段，直接向量化
+        out_id = [keys[plain]]
+        out_spawn = [times[first[plain]]]
+        out_last = [times[(first + counts - 1)[plain]]]
+        out_removed = [np.full(int(plain.sum()), np.nan)]
+
+        # 有移除记录的 id(通常很少)逐个按移除位置切段
+        ids, spawns, lasts, removes = array('Q'), array('d'), array('d'), array('d')
+        rem_order = np.lexsort((removal_pos, removal_id))
+        r_ids, r_pos, r_time = removal_id[rem_order], removal_pos[rem_order], removal_time[rem_order]
+        for i in np.flatnonzero(~plain).tolist():
+            oid = keys[i]
+            rows = order[first[i]:first[i] + counts[i]]
+            t = times[first[i]:first[i] + counts[i]]
+            lo, hi = np.searchsorted(r_ids, oid, 'left'), np.searchsorted(r_ids, oid, 'right')
+            qs, qt = r_pos[lo:hi], r_time[lo:hi]
+            seg = np.searchsorted(qs, rows, 'right')   # 行之前发生过的移除次数
+            bounds = np.flatnonzero(np.diff(seg)) + 1
+            for a, b in zip(np.concatenate(([0], bounds)).tolist(), np.concatenate((bounds, [len(rows)])).tolist()):
+                k = int(seg[a])
+                ids.append(int(oid))
+                spawns.append(float(t[a]))
+                lasts.append(float(t[b - 1]))
+                removes.append(float(qt[k]) if k < len(qs) else math.nan)
+        out_id.append(np.frombuffer(ids, dtype=np.uint64))
+        out_spawn.append(np.frombuffer(spawns, dtype=np.float64))
+        out_last.append(np.frombuffer(lasts, dtype=np.float64))
+        out_removed.append(np.frombuffer(removes, dtype=np.float64))
+        return cls(np.concatenate(out_id), np.concatenate(out_spawn), np.concatenate(out_last),
+                   np.concatenate(out_removed), end_time)
+
+    @classmethod
+    def from_records(cls, records: Iterable[Tuple[int, float, float, float]],
+                     end_time: Optional[float]) -> 'LifecycleTable':
+        """由 (id, 出现时间, 最后更新时间, 移除时间或 NaN) 记录构建，供加载时增量维护的存活期使用"""
+        rows = list(records)
+        return cls(np.asarray([r[0] for r in rows], dtype=np.uint64),
+                   np.asarray([r[1] for r in rows], dtype=np.float64),
+                   np.asarray([r[2] for r in rows], dtype=np.float64),
+                   np.asarray([r[3] for r in rows], dtype=np.float64), end_time)
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[ACMIFrame], removals: Iterable[Tuple[int, float, int]] = (),
+                    end_time: Optional[float] = None) -> 'LifecycleTable':
+        """对象模型：遍历帧取每条更新的 id 与时间；removals 为 (此前更新条数, 时间, id)"""
+        oids, times = array('Q'), array('d')
+        for frame in frames:
+            objs = frame.objects
+            oids.extend([o.object_id for o in objs])
+            times.extend(array('d', [frame.timestamp]) * len(objs))
+        rem = list(removals)
+        return cls.from_arrays(np.frombuffer(oids, dtype=np.uint64), np.frombuffer(times, dtype=np.float64),
+                               [r[0] for r in rem], [r[1] for r in rem], [r[2] for r in rem], end_time)
+
+    # ---------- 访问 ----------
+    def __len__(self) -> int:
+        return len(self.object_ids)
+
+    def __getitem__(self, i: int) -> Lifetime:
+        removed = float(self.removed[i])
+        return Lifetime(int(self.object_ids[i]), float(self.spawn[i]), float(self.last_update[i]),
+                        None if removed != removed else removed)
+
+    def __iter__(self) -> Iterator[Lifetime]:
+        return (self[i] for i in range(len(self)))
+
+    def get(self, object_id: int) -> List[Lifetime]:
+        """某个 id 的各段存活期(按出现时间)"""
+        i = int(np.searchsorted(self._id_keys, np.uint64(object_id)))
+        if i == len(self._id_keys) or self._id_keys[i] != object_id:
+            return []
+        stop = self._id_first[i + 1] if i + 1 < len(self._id_first) else len(self._id_order)
+        return [self[r] for r in self._id_order[self._id_first[i]:stop].tolist()]
+
+    # ---------- 查询 ----------
+    def alive_at(self, t: float) -> np.ndarray:
+        """t 时刻存活的存活期下标(升序)"""
+        return np.sort(self._tree.stab(t))
+
+    def alive_during(self, start: float, end: float) -> np.ndarray:
+        """[start, end] 内任意时刻存活过的存活期下标(升序)：start 时刻存活的 + 在 (start, end] 内出现的"""
+        if end < start:
+            return np.empty(0, dtype=np.int64)
+        lo = int(np.searchsorted(self.spawn, start, 'right'))
+        hi = int(np.searchsorted(self.spawn, end, 'right'))
+        born = np.arange(lo, hi, dtype=np.int64)
+        born = born[self.stop[born] > self.spawn[born]] if len(born) else born
+        return np.union1d(self._tree.stab(start), born)
+
+    def ids_at(self, t: float) -> List[int]:
+        return np.unique(self.object_ids[self.alive_at(t)]).tolist()
+
+    def ids_during(self, start: float, end: float) -> List[int]:
+        return np.unique(self.object_ids[self.alive_during(start, end)]).tolist()
+
+    # ---------- 导出 ----------
+    def to_df(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'object_id': self.object_ids,
+            'spawn': self.spawn,
+            'last_update': self.last_update,
+            'removed': self.removed,
+        })
@@ -1,6 +1,8 @@
-from typing import Optional, List, Dict, Union, Set
+from typing import Optional, List, Dict, Union, Set, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict
+import math
+import struct
 
 class ACMIPropertyRegistry:
     GLOBAL_PROPERTIES_ALLOWED_TEXT_KEYS: Set[str] = frozenset(["DataSource", "DataRecorder", "ReferenceTime", "RecordingTime", "Author", "Title", "Category", "Briefing", "Debriefing", "Comments", "MapId"])
@@ -24,15 +26,17 @@ class ACMIPropertyRegistry:
     OBJECT_PROPERTIES_ALLOWED_KEYS: Set[str] = OBJECT_PROPERTIES_ALLOWED_TEXT_KEYS | OBJECT_PROPERTIES_ALLOWED_NUMERIC_KEYS
 
 
-@dataclass
+@dataclass(slots=True)
 class ACMIHeader:
     file_type: str = "text/acmi/tacview"
     file_version: str = "2.2"
 
-@dataclass
+DEFAULT_COORD_TYPE = 'simple+spherical'
+
+@dataclass(slots=True)
 class ACMIObjectCoordinates:
     object_id: int
-    type: str = 'simple+spherical' # simple complex spherical flat 
+    type: str = DEFAULT_COORD_TYPE # simple complex spherical flat 
     longitude: Optional[float] = None # 经度
     latitude: Optional[float] = None # 纬度
     altitude: Optional[float] = None # 高度 / 米
@@ -43,25 +47,25 @@ class ACMIObjectCoordinates:
     v: Optional[float] = None  # m/s
     heading: Optional[float] = None  # 
 
-@dataclass
+@dataclass(slots=True)
 class ACMIGlobalProperties: # 全局属性, 文件开始处除了前两行的属性
     text_properties: Dict[str, str] = None  # 文本属性
     numeric_properties: Dict[str, float] = None # 数值属性
 
     
-@dataclass
+@dataclass(slots=True)
 class ACMIEvent:
     object_id: int
     event_type: str # 事件类型
     object_ids: List[int] # 对象id列表
     event_text: str # 事件文本
 
-@dataclass
+@dataclass(slots=True)
 class ACMIObjectProperties:
     text_properties: Dict[str, str] = None
     numeric_properties: Dict[str, float] = None
 
-@dataclass
+@dataclass(slots=True)
 class ACMIObject: # 一行内容
     object_id: int
     time_offset: float  # 相对于 ReferenceTime 的秒数
@@ -71,10 +75,66 @@ class ACMIObject: # 一行内容
     object_events: ACMIEvent = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ACMIFrame:
     timestamp: float  # 相对于 ReferenceTime 的秒数
     objects: List[ACMIObject]
 
 
+# ---------- 坐标打包 ----------
+# ACMIObject 中的坐标以 9 个 float64 打包存放(顺序同 T= 的 9 段式，缺失为 NaN)，
+# 首次访问 object_coordinates 时才还原为 ACMIObjectCoordinates
+_COORD_PACK = struct.Struct('<9d')
+_NAN = math.nan
+
+
+def pack_coordinates(values: Tuple[Optional[float], ...]) -> bytes:
+    """(经度, 纬度, 高度, Roll, Pitch, Yaw, U, V, Heading) -> 72 字节"""
+    return _COORD_PACK.pack(*[_NAN if v is None else v for v in values])
+
+
+def unpack_coordinates(object_id: int, packed: bytes) -> ACMIObjectCoordinates:
+    lon, lat, alt, roll, pitch, yaw, u, v, heading = [None if x != x else x for x in _COORD_PACK.unpack(packed)]
+    return ACMIObjectCoordinates(object_id, DEFAULT_COORD_TYPE, lon, lat, alt, pitch, yaw, roll, u, v, heading)
+
+
+def coordinate_values(obj: ACMIObject) -> Optional[Tuple[Optional[float], ...]]:
+    """按 (经度, 纬度, 高度, Roll, Pitch, Yaw, U, V, Heading) 取坐标；打包状态下直接解包，不还原、不缓存"""
+    c = _COORD_SLOT.__get__(obj)
+    if c is None:
+        return None
+    if c.__class__ is bytes:
+        return tuple([None if x != x else x for x in _COORD_PACK.unpack(c)])
+    return (c.longitude, c.latitude, c.altitude, c.roll, c.pitch, c.yaw, c.u, c.v, c.heading)
+
+
+def coordinate_fields(obj: ACMIObject) -> Optional[Tuple]:
+    """按 ACMIObjectCoordinates 的字段顺序(含 object_id、type)取坐标；打包状态下直接解包，不还原、不缓存"""
+    c = _COORD_SLOT.__get__(obj)
+    if c is None:
+        return None
+    if c.__class__ is bytes:
+        lon, lat, alt, roll, pitch, yaw, u, v, heading = [None if x != x else x for x in _COORD_PACK.unpack(c)]
+        return (obj.object_id, DEFAULT_COORD_TYPE, lon, lat, alt, pitch, yaw, roll, u, v, heading)
+    return (c.object_id, c.type, c.longitude, c.latitude, c.altitude, c.pitch, c.yaw, c.roll, c.u, c.v, c.heading)
+
+
+def has_coordinates(obj: ACMIObject) -> bool:
+    return _COORD_SLOT.__get__(obj) is not None
+
+
+def _install_lazy_coordinates() -> None:
+    global _COORD_SLOT
+    slot = _COORD_SLOT = ACMIObject.object_coordinates   # slots=True 生成的成员描述符
+
+    def get(self) -> Optional[ACMIObjectCoordinates]:
+        c = slot.__get__(self)
+        if c.__class__ is bytes:
+            c = unpack_coordinates(self.object_id, c)
+            slot.__set__(self, c)  # 还原后缓存，之后的修改能保留
+        return c
+
+    ACMIObject.object_coordinates = property(get, slot.__set__)
+
 
+_install_lazy_coordinates()
@@ -0,0 +1,153 @@
+# parallel.py
+from __future__ import annotations
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Iterator, Any, Tuple, BinaryIO
+import logging
+import os
+
+from .model import *
+from .reader import ACMIFileReader, split_block
+from .acmi_file import ACMIFile
+from .parser import (ACMIParser, ACMILoader, _HeaderParsed, _GlobalProp,
+                     _FrameBegin, _ObjectUpdate, _ObjectRemove)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 32 * 1024 * 1024
+_READ_BLOCK = 4 * 1024 * 1024
+
+# 紧凑中间格式的标记
+_TAG_FRAME, _TAG_UPDATE, _TAG_REMOVE, _TAG_GLOBAL = range(4)
+
+
+# ---------- 切块 ----------
+def _frame_start(buf: bytearray, start: int = 0) -> int:
+    """buf 中 start 之后第一个帧行的起始位置，找不到返回 -1"""
+    if start == 0 and buf[:1] == b'#':
+        return 0
+    pos = buf.find(b'\n#', max(start - 1, 0))
+    while pos >= 0:
+        # 上一物理行以 '\\' 结尾时这一行是续行内容，不是帧行
+        end = pos - 1 if pos > 0 and buf[pos - 1] == 0x0D else pos
+        if end == 0 or buf[end - 1] != 0x5C:
+            return pos + 1
+        pos = buf.find(b'\n#', pos + 1)
+    return -1
+
+
+def _iter_chunks(stream: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """
+    按 '#<time>' 帧边界切分字节流
+    第一块为前导部分(文件头 + 全局属性，直到第一个帧行之前)，之后每块都以帧行开头
+    """
+    buf = bytearray()
+    preamble_done = False
+    while True:
+        block = stream.read(_READ_BLOCK)
+        buf += block
+        if not preamble_done:
+            pos = _frame_start(buf)
+            if pos < 0:
+                if block:
+                    continue
+                pos = len(buf)
+            yield bytes(buf[:pos])
+            del buf[:pos]
+            preamble_done = True
+        while len(buf) >= chunk_size:
+            cut = _frame_start(buf, chunk_size)
+            if cut < 0:
+                break
+            yield bytes(buf[:cut])
+            del buf[:cut]
+        if not block:
+            if buf:
+                yield bytes(buf)
+            return
+
+
+# ---------- 工作进程 ----------
+def _pack(ev: Any) -> tuple:
+    if isinstance(ev, _ObjectUpdate):
+        props = ev.props
+        event = None if ev.event is None else (ev.event.event_type, ev.event.object_ids,
+                                               ev.event.event_text)
+        return (_TAG_UPDATE, ev.obj_id, ev.coords,
+                props.text_properties if props else None,
+                props.numeric_properties if props else None, event)
+    if isinstance(ev, _FrameBegin):
+        return (_TAG_FRAME, ev.time_offset)
+    if isinstance(ev, _ObjectRemove):
+        return (_TAG_REMOVE, ev.time_offset, ev.obj_id)
+    if isinstance(ev, _GlobalProp):
+        return (_TAG_GLOBAL, ev.obj_id, ev.key, ev.value)
+    raise TypeError(f'unexpected event {ev!r}')
+
+
+def _unpack(item: tuple) -> Any:
+    tag = item[0]
+    if tag == _TAG_UPDATE:
+        _, oid, coords, text, numeric, event = item
+        props = None
+        if text is not None or numeric is not None:
+            props = ACMIObjectProperties(text_properties=text, numeric_properties=numeric)
+        if event is not None:
+            event = ACMIEvent(oid, *event)
+        return _ObjectUpdate(oid, coords, event, props)
+    if tag == _TAG_FRAME:
+        return _FrameBegin(item[1])
+    if tag == _TAG_REMOVE:
+        return _ObjectRemove(item[1], item[2])
+    return _GlobalProp(item[1], item[2], item[3])
+
+
+def _parse_chunk(data: bytes, encoding: str, global_phase: bool) -> List[tuple]:
+    """在工作进程中解析一个帧对齐的块，返回紧凑元组列表"""
+    parser = ACMIParser(encoding=encoding)
+    parser._header_done = True
+    parser._global_prop_done = not global_phase
+    return [_pack(ev) for ev in parser.parse_lines(split_block(data))]
+
+
+# ---------- 对外 API ----------
+def load_acmi_parallel(
+    file_path: str,
+    encoding: str = 'utf-8-sig',
+    *,
+    workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    columnar: bool = False,
+) -> ACMIFile:
+    """
+    多进程解析：主进程按帧边界切块并处理前导部分，
+    工作进程解析各块，结果按原顺序合并为一个 ACMIFile(与 load_acmi 结果一致)
+    """
+    workers = workers or os.cpu_count() or 1
+    loader = ACMILoader(file_path, encoding, columnar=columnar)
+    reader = ACMIFileReader(file_path, encoding)
+
+    with reader.open_binary() as stream:
+        chunks = _iter_chunks(stream, chunk_size)
+        preamble = next(chunks, b'')
+        head = ACMIParser(encoding=encoding)
+        for ev in head.parse_lines(split_block(preamble)):
+            loader._handle(ev)
+        if not head._header_done:
+            loader._handle(_HeaderParsed(head._header))  # 前导部分只有文件头时与串行行为保持一致
+        global_phase = not head._global_prop_done
+
+        pending: deque = deque()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for chunk in chunks:
+                pending.append(pool.submit(_parse_chunk, chunk, encoding, global_phase))
+                global_phase = False
+                # 限制在途块数，保证内存有界
+                while len(pending) > 2 * workers:
+                    for item in pending.popleft().result():
+                        loader._handle(_unpack(item))
+            while pending:
+                for item in pending.popleft().result():
+                    loader._handle(_unpack(item))
+
+    return loader._finish()
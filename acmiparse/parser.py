@@ -1,15 +1,26 @@
-from dataclasses import dataclass
-from typing import Dict, List, Optional
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Union, Callable, AbstractSet
 import re
+import asyncio
 import logging
-from typing import Iterator, TextIO, Any, Dict, Tuple
+from typing import Iterator, Iterable, AsyncIterator, TextIO, Any, Dict, Tuple
 from .reader import ACMIFileReader
 from .model import *
 from .utils import *
-from .acmi_file import ACMIFile, FrameObjectRef
+from .acmi_file import ACMIFile
+from .columnar import ColumnarFrameStore, ColumnarACMIFile
+from .cache import load_cache, save_cache
+from .props import PropertyTable
+from .summary import ACMISummary
+from .lifecycle import LifecycleTable
+from . import profiling
 
 logger = logging.getLogger(__name__)
 
+# T= 解析结果为 9 元组，顺序同 COORD_FIELDS(经度|纬度|高度|Roll|Pitch|Yaw|U|V|Heading)，缺失为 None
+_NONE1, _NONE3, _NONE6 = (None,), (None,) * 3, (None,) * 6
+_NO_COORDS = (None,) * 9
+
 @dataclass
 class _HeaderParsed:
     header: ACMIHeader
@@ -27,145 +38,281 @@ class _FrameBegin:
 @dataclass
 class _ObjectUpdate:
     obj_id: int
-    coords: Optional[ACMIObjectCoordinates]  # 可能只改坐标
+    coords: Optional[Tuple[Optional[float], ...]]  # 可能只改坐标，9 元组，顺序同 COORD_FIELDS
     event: Optional[ACMIEvent]               # 可能只发生事件
     props: Optional[ACMIObjectProperties]    # 可能只改属性
 
 @dataclass
 class _ObjectRemove:
+    time_offset: float
     obj_id: int
 
 
+@dataclass
+class _LineFilter:
+    """
+    流式过滤条件：时间窗 [start, end]、id 集合、属性谓词
+    谓词以对象首次带文本属性的那一行为准判定，结果对该对象之后的所有行生效
+    """
+    start: Optional[float] = None
+    end: Optional[float] = None
+    ids: Optional[AbstractSet[int]] = None
+    predicate: Optional[Callable[[Dict[str, str]], bool]] = None
+    in_window: bool = True                       # 当前帧是否落在时间窗内
+    finished: bool = False                       # 已越过 end
+    decided: Dict[int, bool] = field(default_factory=dict)
+
+    def __post_init__(self):
+        self.in_window = self.start is None
+
+    def precheck(self, oid: int) -> Optional[bool]:
+        """只凭 id 判定：False 拒绝，True 接受，None 需要解析属性后再判定"""
+        if self.ids is not None and oid not in self.ids:
+            return False
+        if self.predicate is None:
+            return True
+        return self.decided.get(oid)
+
+    def judge(self, oid: int, props: Optional[ACMIObjectProperties]) -> bool:
+        if props is None or not props.text_properties:
+            return False  # 尚无文本属性，暂不判定，本行丢弃
+        ok = self.decided[oid] = bool(self.predicate(props.text_properties))
+        return ok
+
+    def enter_frame(self, t: float) -> bool:
+        """进入新帧；返回 False 表示已越过 end，可提前结束"""
+        if self.end is not None and t > self.end:
+            self.finished = True
+            return False
+        self.in_window = self.start is None or t >= self.start
+        return True
+
+
 
 
 class ACMIParser:
     # ---------- 正则 ----------
     _RE_HEADER   = re.compile(r'^(FileType|FileVersion)=(.*)$') # 解析文件头
-    _RE_FRAME    = re.compile(r'^#\s*([0-9.+-]+)\s*$')             # 解析#时间帧
-    _RE_REMOVE   = re.compile(r'^-([0-9a-fA-F]+)\s*$')          # 解析-对象移除
-    _RE_COMMENT  = re.compile(r'^\s*//')                        # 忽略注释行
-    _RE_UPDATE   = re.compile(r'^([0-9a-fA-F]+),(.*)$')         # 解析对象更新
     _RE_SPLIT    = re.compile(r'(?<!\\),')                      # 忽略属性分隔符','但忽略'\,'防止误分割
-    
+
+    # 行首字符分类：对象更新行以十六进制 id 开头
+    _HEX_CHARS = frozenset('0123456789abcdefABCDEF')
+    _HEX_BYTES = frozenset(b'0123456789abcdefABCDEF')
+
     _first_seen: set = set()   # 记录已出现的对象
 
-    def __init__(self, file: str, encoding: str = 'utf-8-sig'):
-        self.reader = ACMIFileReader(file_path=file, encoding=encoding)
+    def __init__(self, file: Optional[str] = None, encoding: str = 'utf-8-sig'):
+        self.reader = ACMIFileReader(file_path=file, encoding=encoding) if file is not None else None
+        self.encoding = encoding
         self._time = 0.0
+        self._header = ACMIHeader()
+        self._header_done = False
+        self._global_prop_done = False
+        self._filter: Optional[_LineFilter] = None
 
     # ---------- 对外 API ----------
-    def events(self) -> Iterator[Any]:
-        header_done = False
-        global_prop_done = False
-        header = ACMIHeader()
+    def events(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        ids: Optional[Iterable[int]] = None,
+        predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+        lines: Optional[Iterable[Union[str, bytes]]] = None,
+    ) -> Iterator[Any]:
+        """
+        lines: 自定义行来源(如 follow 模式的读取器)，默认从文件逐行读取
+        start/end: 只产出时间窗内的帧，窗外对象行不做分词，越过 end 后停止读取
+        ids: 只保留这些 object_id，其余行在解析出 id 后立即丢弃
+        predicate: 以文本属性(如 Type)判定对象是否保留
+        """
+        self._set_filter(start, end, ids, predicate)
+        src = lines if lines is not None else self.reader.read_raw_lines()
+        m = profiling.current()
+        if m is None:
+            return self.parse_lines(src)
+        stage = 'read.zip' if self.reader is not None and self.reader.zip_file else 'read'
+        return profiling.instrument_events(m, self.parse_lines, src, stage)
 
-        for raw in self.reader.read_lines():
-            if not raw or self._RE_COMMENT.match(raw):
-                continue
+    async def aevents(
+        self,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        ids: Optional[Iterable[int]] = None,
+        predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+    ) -> AsyncIterator[Any]:
+        """events 的异步版本：按块异步读取，每块的分词放到线程池执行，事件循环只负责转交事件"""
+        from .aio import AsyncACMIFileReader
+        self._set_filter(start, end, ids, predicate)
+        reader = AsyncACMIFileReader(self.reader.file_path, self.encoding)
+        async for batch in reader.iter_line_batches():
+            for ev in await asyncio.to_thread(list, self.parse_lines(batch)):
+                yield ev
+            if self._filter is not None and self._filter.finished:
+                break  # 已越过时间窗终点
 
-            # ---- 解析文件头两行 ----
-            if not header_done:
-                m = self._RE_HEADER.match(raw)
-                if m:
-                    key, val = m.groups()
-                    if key == 'FileType':
-                        header.file_type = val
-                    elif key == 'FileVersion':
-                        header.file_version = val
+    def _set_filter(self, start, end, ids, predicate) -> None:
+        if start is not None or end is not None or ids is not None or predicate is not None:
+            self._filter = _LineFilter(start, end, frozenset(ids) if ids is not None else None, predicate)
+
+    def parse_lines(self, lines: Iterable[Union[str, bytes]]) -> Iterator[Any]:
+        """
+        解析任意行序列(str 或 bytes)；解析阶段(文件头/全局属性)保存在实例上，可分段连续调用
+        每行只看首字符分类：'#' 帧、'-' 移除、'/' 注释、十六进制数字为对象更新
+        bytes 行的帧/移除/id 直接按字节解析，只有更新行的属性部分需要解码，纯 ASCII 行走快速路径
+        """
+        hex_chars = self._HEX_CHARS
+        hex_bytes = self._HEX_BYTES
+        encoding = self.encoding
+        parse_body = self._parse_body
+        flt = self._filter
+
+        for raw in lines:
+            if not raw:
+                continue
+            c = raw[0]
+            if c.__class__ is int:  # bytes 行
+                if c in hex_bytes and self._global_prop_done:
+                    idx = raw.find(b',')
+                    if idx > 0:
+                        try:
+                            oid = int(raw[:idx], 16)
+                        except ValueError:
+                            profiling.warn('bad_id')
+                            continue
+                        if flt is not None:
+                            verdict = flt.precheck(oid)
+                            if verdict is False or (verdict and not flt.in_window):
+                                continue
+                        body = raw[idx + 1:]
+                        body = body.decode('ascii') if body.isascii() else bytes(body).decode(encoding)
+                        coords, event, props = parse_body(oid, body)
+                        if flt is not None and verdict is None:
+                            if not flt.judge(oid, props) or not flt.in_window:
+                                continue
+                        yield _ObjectUpdate(oid, coords, event, props)
                     continue
+                if c == 0x23 or c == 0x2d:  # '#' / '-'
+                    raw = raw.decode('ascii', 'replace')
                 else:
-                    yield _HeaderParsed(header) # 发送文件头
-                    header_done = True  # 后面不再收 header
-                    
-            if not global_prop_done:
-                m = self._RE_UPDATE.match(raw)
-                if m:
-                    oid_hex, body = m.groups()
-                    oid = int(oid_hex, 16)
+                    raw = raw.decode('ascii') if raw.isascii() else bytes(raw).decode(encoding)
+                if not raw:
+                    continue
+                c = raw[0]
+
+            # ---- 对象更新(最常见，放最前) ----
+            if c in hex_chars and self._header_done:
+                idx = raw.find(',')
+                if idx <= 0:
+                    continue
+                try:
+                    oid = int(raw[:idx], 16)
+                except ValueError:
+                    profiling.warn('bad_id')
+                    continue
+                body = raw[idx + 1:]
+                if not self._global_prop_done:
                     k, v = self._parse_global_props(body)
                     if k in ACMIPropertyRegistry.GLOBAL_PROPERTIES_ALLOWED_KEYS:
                         yield _GlobalProp(oid, k, v)
                         continue
-                    else:
-                        global_prop_done = True # 全局属性解析完毕
-
-            # ---- 属性更新 ----
-            m = self._RE_UPDATE.match(raw)
-            if m:
-                oid_hex, body = m.groups()
-                oid = int(oid_hex, 16)
-                
-                coords, event, props = self._parse_body(oid, body)
+                    self._global_prop_done = True # 全局属性解析完毕
+                if flt is not None:
+                    verdict = flt.precheck(oid)
+                    if verdict is False or (verdict and not flt.in_window):
+                        continue
+                coords, event, props = parse_body(oid, body)
+                if flt is not None and verdict is None:
+                    if not flt.judge(oid, props) or not flt.in_window:
+                        continue
                 yield _ObjectUpdate(oid, coords, event, props)
                 continue
-            
+
             # ---- 时间帧 ----
-            m = self._RE_FRAME.match(raw)
-            if m:
-                self._time = float(m.group(1))
+            if c == '#':
+                if not self._header_done:
+                    yield self._end_header()
+                try:
+                    self._time = float(raw[1:])
+                except ValueError:
+                    profiling.warn('bad_time')
+                    continue
+                if flt is not None:
+                    if flt.finished or not flt.enter_frame(self._time):
+                        return  # 已越过时间窗终点
+                    if not flt.in_window:
+                        continue
                 yield _FrameBegin(self._time)
                 continue
-            
+
+            # ---- 注释 ----
+            if c == '/' or c.isspace():
+                if raw.lstrip().startswith('//'):
+                    continue
+
+            # ---- 解析文件头两行 ----
+            if not self._header_done:
+                m = self._RE_HEADER.match(raw)
+                if m:
+                    key, val = m.groups()
+                    if key == 'FileType':
+                        self._header.file_type = val
+                    elif key == 'FileVersion':
+                        self._header.file_version = val
+                    continue
+                yield self._end_header()
+                if c in hex_chars:  # 文件头后的第一行即对象/全局属性行
+                    yield from self.parse_lines((raw,))
+                    continue
+
             # ---- 移除对象 ----
-            m = self._RE_REMOVE.match(raw)
-            if m:
-                yield _ObjectRemove(self._time, int(m.group(1), 16))
+            if c == '-':
+                try:
+                    oid = int(raw[1:], 16)
+                except ValueError:
+                    continue
+                if flt is not None and (not flt.in_window or not flt.precheck(oid)):
+                    continue
+                yield _ObjectRemove(self._time, oid)
                 continue
 
+    def _end_header(self) -> _HeaderParsed:
+        self._header_done = True  # 后面不再收 header
+        return _HeaderParsed(self._header) # 发送文件头
+
     # ---------- 内部工具 ----------
-    def _parse_body(self, id, body: str) -> Tuple[ACMIObjectCoordinates, ACMIEvent, ACMIObjectProperties]:
+    def _parse_body(self, id, body: str) -> Tuple[Optional[Tuple[Optional[float], ...]], ACMIEvent, ACMIObjectProperties]:
         coords = None 
         props  = None 
         event  = None 
         for kv in self._split_props(body):
-            k, v = kv.split('=', 1)
+            k, _, v = kv.partition('=')
+            if not _:
+                raise ValueError(f"属性缺少'=': {kv}")
             k = k.strip()
             v = v.strip()
             # --- T 特殊处理 ---
             if k == 'T':
-                coords = ACMIObjectCoordinates(object_id=id)
                 parts = v.split('|')
                 n = len(parts)
-                if n == 3:
-                    coords.longitude = to_float(parts[0])  # 经度
-                    coords.latitude  = to_float(parts[1])  # 纬度
-                    coords.altitude  = to_float(parts[2])  # 高度
-                elif n == 5:
-                    coords.longitude = to_float(parts[0])  # 经度
-                    coords.latitude  = to_float(parts[1])  # 纬度
-                    coords.altitude  = to_float(parts[2])  # 高度
-                    coords.u         = to_float(parts[3])  # U
-                    coords.v         = to_float(parts[4])  # V
-                elif n == 6:
-                    coords.longitude = to_float(parts[0])  # 经度
-                    coords.latitude  = to_float(parts[1])  # 纬度
-                    coords.altitude  = to_float(parts[2])  # 高度
-                    coords.roll      = to_float(parts[3])  # Roll
-                    coords.pitch     = to_float(parts[4])  # Pitch
-                    coords.yaw       = to_float(parts[5])  # Yaw
-                elif n == 9:
-                    coords.longitude = to_float(parts[0])  # 经度
-                    coords.latitude  = to_float(parts[1])  # 纬度
-                    coords.altitude  = to_float(parts[2])  # 高度
-                    coords.roll      = to_float(parts[3])  # Roll
-                    coords.pitch     = to_float(parts[4])  # Pitch
-                    coords.yaw       = to_float(parts[5])  # Yaw
-                    coords.u         = to_float(parts[6])  # U
-                    coords.v         = to_float(parts[7])  # V
-                    coords.heading   = to_float(parts[8])  # Heading
+                if n == 3:    # 经度|纬度|高度
+                    coords = tuple(to_floats(v, parts)) + _NONE6
+                elif n == 5:  # 经度|纬度|高度|U|V
+                    lon, lat, alt, u, vv = to_floats(v, parts)
+                    coords = (lon, lat, alt) + _NONE3 + (u, vv) + _NONE1
+                elif n == 6:  # 经度|纬度|高度|Roll|Pitch|Yaw
+                    coords = tuple(to_floats(v, parts)) + _NONE3
+                elif n == 9:  # 经度|纬度|高度|Roll|Pitch|Yaw|U|V|Heading
+                    coords = tuple(to_floats(v, parts))
                 else:
+                    coords = _NO_COORDS
                     logger.warning(f"无法解析坐标: {v}")
-            elif k == 'Event':
-                event = ACMIEvent(object_id=id)
+                    profiling.warn('unparseable_coordinates')
+            elif k == 'Event':  # 类型|id1|id2|...|文本
                 parts = v.split('|')
-                event.event_type = parts[0]
                 n = len(parts)
-                if n > 2:
-                    event.object_ids = [int(x, 16) for x in parts[1:-1] if x.strip()]
-                if n > 1:
-                    event.event_text = parts[-1]
-                else:
-                    event.event_text = ''
+                event = ACMIEvent(id, parts[0],
+                                  [int(x, 16) for x in parts[1:-1] if x.strip()] if n > 2 else [],
+                                  parts[-1] if n > 1 else '')
             else:
                 props = ACMIObjectProperties() if not props else props
                 if k in ACMIPropertyRegistry.OBJECT_PROPERTIES_ALLOWED_TEXT_KEYS:       # 字符串属性较少，出现频率更高，放前面
@@ -182,6 +329,8 @@ class ACMIParser:
 
     @staticmethod
     def _split_props(body: str) -> List[str]:
+        if '\\,' not in body:  # 绝大多数行没有转义逗号，直接 split
+            return body.split(',')
         return ACMIParser._RE_SPLIT.split(body)
 
     def _parse_global_props(self, body: str) -> Tuple[str, str]:
@@ -197,9 +346,20 @@ class ACMILoader:
     用法：
         for frame in ACMILoader.from_file('demo.acmi'):
             do_something(frame)
+    columnar=True 时坐标/属性直接写入 ColumnarFrameStore，不保留逐行对象
+    start/end/ids/predicate 透传给 ACMIParser.events 做流式过滤
+    迭代 loader 时逐帧产出并随即丢弃，内存只与单帧大小有关；load() 才会保留全部帧
+    compact_properties=True 时属性集中存入 PropertyTable，每个对象只持有只读视图
     """
-    def __init__(self, file_path: str, encoding: str = 'utf-8-sig'):
+    def __init__(self, file_path: str, encoding: str = 'utf-8-sig', columnar: bool = False, *,
+                 start: Optional[float] = None, end: Optional[float] = None,
+                 ids: Optional[Iterable[int]] = None,
+                 predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+                 compact_properties: bool = False):
         self._parser = ACMIParser(file=file_path, encoding=encoding)
+        self._columnar = columnar
+        self._compact_properties = compact_properties
+        self._filters = dict(start=start, end=end, ids=ids, predicate=predicate)
         self._reset()
 
     # ---------- 内部状态 ----------
@@ -209,19 +369,89 @@ class ACMILoader:
             global_properties=ACMIGlobalProperties(),
             frames=[]
         )
+        self._file._event_log = []
+        self._file._removal_log = []
+        self._summary: Optional[ACMISummary] = None if self._columnar else ACMISummary()
+        self._file._summary = self._summary
+        self._live: Dict[int, list] = {}   # 当前存活期：id -> [出现时间, 最后更新时间]
+        self._ended: List[Tuple[int, float, float, float]] = []   # 已结束的存活期 (id, 出现, 最后更新, 移除)
         self._current_frame: Optional[ACMIFrame] = None
-        self._obj_table: Dict[int, ACMIObject] = {}  # 当前帧存活对象
+        self._store: Optional[ColumnarFrameStore] = ColumnarFrameStore() if self._columnar else None
+        self._props_table: Optional[PropertyTable] = PropertyTable() if self._compact_properties else None
         self.timestamp = 0
 
     # ---------- 生成器 ----------
+    @classmethod
+    def from_file(cls, file_path: str, encoding: str = 'utf-8-sig', **filters) -> 'ACMILoader':
+        return cls(file_path, encoding, **filters)
+
+    @property
+    def header(self) -> ACMIHeader:
+        return self._file.header
+
+    @property
+    def global_properties(self) -> ACMIGlobalProperties:
+        return self._file.global_properties
+
+    def __iter__(self) -> Iterator[ACMIFrame]:
+        return self.iter_frames()
+
+    def iter_frames(self, reconstruct: bool = False, follow: bool = False,
+                    poll_interval: float = 0.5, idle_timeout: Optional[float] = None) -> Iterator[ACMIFrame]:
+        """
+        逐帧产出已完成的 ACMIFrame，不在内存中累积
+        reconstruct: 产出该帧结束时全部存活对象的完整状态(增量已合并)，而不是原始增量行
+        follow: 读到文件末尾后继续等待新写入(实时录制)，idle_timeout 秒无新数据后结束
+        """
+        from .state import ACMIStateEngine  # state 依赖本模块，延迟导入
+        engine = ACMIStateEngine() if reconstruct else None
+        current: Optional[ACMIFrame] = None
+        lines = self._parser.reader.read_raw_lines(follow=follow, poll_interval=poll_interval,
+                                                   idle_timeout=idle_timeout)
+        for ev in self._parser.events(lines=lines, **self._filters):
+            if isinstance(ev, _FrameBegin):
+                if current is not None:  # 上一帧已经填完
+                    yield engine.snapshot() if engine is not None else current
+                current = ACMIFrame(timestamp=ev.time_offset, objects=[])
+                self.timestamp = ev.time_offset
+            elif isinstance(ev, _ObjectUpdate):
+                if current is not None and engine is None:
+                    current.objects.append(self._make_object(ev))
+            elif not isinstance(ev, _ObjectRemove):
+                self._handle(ev)
+            if engine is not None:
+                engine.apply(ev)
+        if current is not None:
+            yield engine.snapshot() if engine is not None else current
+
     def load(self) -> ACMIFile:
         """每完成一帧就 yield；文件结束后 yield 最后一帧（如果有）"""
-        for ev in self._parser.events():
-            self._handle(ev)
+        m = profiling.current()
+        if m is None:
+            for ev in self._parser.events(**self._filters):
+                self._handle(ev)
+            return self._finish()
+        streamed = m.stream_time()
+        with m.stage('_load'):
+            for ev in self._parser.events(**self._filters):
+                self._handle(ev)
+            acmi = self._finish()
+        # build = load 总耗时 - 花在事件流(读取/解析/数值转换)上的时间
+        m.add_time('build', m.timers.pop('_load') - (m.stream_time() - streamed))
+        m.incr('objects_created', self._store.row_count if self._store is not None
+               else sum(len(f.objects) for f in acmi.frames))
+        return acmi
+
+    def _finish(self) -> ACMIFile:
+        if self._store is not None:
+            self._store.trim()
+            return ColumnarACMIFile.from_store(self._file.header, self._file.global_properties, self._store)
         # 文件结束：如果最后一帧没触发 FrameBegin，也 yield
         if self._current_frame is not None:
             self._file.frames.append(self._current_frame)
-        
+        nan = float('nan')
+        self._file._lifecycle = LifecycleTable.from_records(
+            self._ended + [(oid, s[0], s[1], nan) for oid, s in self._live.items()], self._summary.end)
         return self._file
 
     # ---------- 事件分发 ----------
@@ -243,36 +473,89 @@ class ACMILoader:
 
         elif isinstance(ev, _FrameBegin):
             self.timestamp = ev.time_offset
+            if self._store is not None:
+                self._store.begin_frame(ev.time_offset)
+                return
             if self._current_frame: # 上一帧已经填完，则加入文件
                 self._file.frames.append(self._current_frame)
-                self._obj_table.clear()
             self._current_frame = ACMIFrame(timestamp=ev.time_offset, objects=[])
+            self._summary.add_frame(ev.time_offset)
             # print(f"开始处理帧 {self._current_frame}")
 
         elif isinstance(ev, _ObjectUpdate):
-            # 取出旧对象或新建
-            obj = ACMIObject(object_id=ev.obj_id, time_offset=self.timestamp)
-            # 合并坐标和属性
-            if ev.coords:
-                obj.object_coordinates = ev.coords
-            if ev.props:
-                obj.object_properties = ev.props
-            if ev.event:
-                obj.object_events = ev.event
+            if self._store is not None:
+                if self._store.frame_count:
+                    self._store.append_update(ev.obj_id, ev.coords, ev.props, ev.event)
+                return
+            obj = self._make_object(ev)
             if self._current_frame:
-                frame_index = len(self._file.frames)
-                obj_index = len(self._current_frame.objects)
                 self._current_frame.objects.append(obj)
-                self._file._id_index[obj.object_id].append(FrameObjectRef(frame_index, obj_index))
+                self._summary.add_update(self.timestamp, ev.obj_id, bool(ev.coords), ev.props,
+                                         ev.event is not None)
+                life = self._live.get(ev.obj_id)
+                if life is None:
+                    self._live[ev.obj_id] = [self.timestamp, self.timestamp]
+                else:
+                    life[1] = self.timestamp
+                if ev.event is not None:
+                    self._file._event_log.append((self.timestamp, ev.event))
             # print(f'add object {self._current_frame}')
 
         elif isinstance(ev, _ObjectRemove):
-            self._obj_table.pop(ev.obj_id, None)
+            # 记录移除发生在第几条更新之后，生命周期表据此切分存活期
+            if self._store is not None:
+                self._store.append_removal(ev.time_offset, ev.obj_id)
+            else:
+                self._file._removal_log.append((self._summary.updates, ev.time_offset, ev.obj_id))
+                life = self._live.pop(ev.obj_id, None)
+                if life is not None:   # 移除一个当前不存活的 id 不产生记录
+                    self._ended.append((ev.obj_id, life[0], life[1], ev.time_offset))
+
+    def _make_object(self, ev: _ObjectUpdate) -> ACMIObject:
+        obj = ACMIObject(object_id=ev.obj_id, time_offset=self.timestamp)
+        # 合并坐标和属性
+        if ev.coords:
+            obj.object_coordinates = pack_coordinates(ev.coords)  # 访问时才还原
+        if ev.props:
+            obj.object_properties = ev.props if self._props_table is None else self._props_table.add(ev.props)
+        if ev.event:
+            obj.object_events = ev.event
+        return obj
 
     @staticmethod
-    def load_file(file_path: str, encoding: str = 'utf-8-sig') -> ACMIFile:
-        loader = ACMILoader(file_path, encoding)
+    def load_file(file_path: str, encoding: str = 'utf-8-sig', columnar: bool = False,
+                  **filters) -> ACMIFile:
+        loader = ACMILoader(file_path, encoding, columnar=columnar, **filters)
         return loader.load()
 
-def load_acmi(file_path: str, encoding: str = 'utf-8-sig') -> ACMIFile:
-    return ACMILoader.load_file(file_path, encoding)
\ No newline at end of file
+def load_acmi(file_path: str, encoding: str = 'utf-8-sig', columnar: bool = False,
+              cache: bool = False, cache_dir: Optional[str] = None, *,
+              start: Optional[float] = None, end: Optional[float] = None,
+              ids: Optional[Iterable[int]] = None,
+              predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+              compact_properties: bool = False, lazy: bool = False) -> ACMIFile:
+    """
+    cache=True 时使用二进制 sidecar 缓存(隐含 columnar=True)：
+    缓存有效则 mmap 直接载入，否则解析后写入缓存
+    start/end/ids/predicate 为流式过滤条件，带过滤条件时不读写缓存
+    例：load_acmi(path, start=600, end=900, predicate=lambda p: 'Air+FixedWing' in p.get('Type', ''))
+    compact_properties=True 时对象属性使用紧凑的共享属性表(仅对象模型，列式本身已字典编码)
+    lazy=True 时只做一遍字节扫描建立行索引，对象在被访问时才解析(见 lazy.py)；不支持 columnar/cache/predicate
+    """
+    filters = dict(start=start, end=end, ids=ids, predicate=predicate)
+    if lazy:
+        if columnar or cache or predicate is not None:
+            raise ValueError("lazy=True 不支持 columnar/cache/predicate")
+        from .lazy import scan  # lazy 依赖本模块，延迟导入
+        return scan(file_path, encoding, start=start, end=end, ids=ids, compact_properties=compact_properties)
+    if not cache or any(v is not None for v in filters.values()):
+        return ACMILoader.load_file(file_path, encoding, columnar=columnar,
+                                    compact_properties=compact_properties, **filters)
+    acmi = load_cache(file_path, cache_dir)
+    if acmi is None:
+        acmi = ACMILoader.load_file(file_path, encoding, columnar=True)
+        try:
+            save_cache(acmi, file_path, cache_dir)
+        except OSError as e:
+            logger.warning(f"写入缓存失败: {e}")
+    return acmi
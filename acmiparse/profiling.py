@@ -0,0 +1,217 @@
+# profiling.py
+"""
+可选的分阶段计时与计数
+
+默认关闭：各入口只在调用开始时检查一次 current() 是否为 None，逐行热路径上没有额外开销。
+开启后：
+    with profile() as m:
+        load_acmi('demo.zip.acmi')
+    print(m.report())
+阶段划分(秒)：
+    read      读取/解压(zip 输入为 read.zip)
+    parse     行分类与字段切分(不含 read、float)
+    float     坐标数值转换(包含少量计时开销)
+    build     ACMILoader 构建对象/列存储
+    index     id 索引建立
+计数：按类型的行数、解码字节数、创建的对象数、告警(如无法解析的坐标)、单帧最大对象数
+"""
+from __future__ import annotations
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Dict, Optional, Callable, Iterator, Iterable, Any
+import logging
+
+logger = logging.getLogger(__name__)
+
+_current: Optional['Metrics'] = None
+
+STAGES = ('read', 'read.zip', 'parse', 'float', 'build', 'index')
+
+
+# ---------- 指标容器 ----------
+@dataclass
+class Metrics:
+    timers: Dict[str, float] = field(default_factory=dict)
+    counters: Dict[str, int] = field(default_factory=dict)
+    peaks: Dict[str, int] = field(default_factory=dict)
+    wall: float = 0.0
+
+    def add_time(self, stage: str, seconds: float) -> None:
+        self.timers[stage] = self.timers.get(stage, 0.0) + seconds
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def peak(self, name: str, value: int) -> None:
+        if value > self.peaks.get(name, 0):
+            self.peaks[name] = value
+
+    def warn(self, kind: str) -> None:
+        self.incr('warnings.' + kind)
+
+    @contextmanager
+    def stage(self, name: str):
+        t0 = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, perf_counter() - t0)
+
+    def stream_time(self) -> float:
+        """事件流(读取、解析、数值转换)累计耗时"""
+        t = self.timers
+        return t.get('read', 0.0) + t.get('read.zip', 0.0) + t.get('parse', 0.0) + t.get('float', 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """可直接转发到遥测系统的扁平字典"""
+        out: Dict[str, Any] = {'wall_s': self.wall}
+        out.update({f'time.{k}_s': v for k, v in self.timers.items()})
+        out.update({f'count.{k}': v for k, v in self.counters.items()})
+        out.update({f'peak.{k}': v for k, v in self.peaks.items()})
+        return out
+
+    def report(self) -> str:
+        lines = [f"{'阶段':10s} {'耗时(s)':>10s} {'占比':>7s}"]
+        total = self.wall or sum(self.timers.values()) or 1.0
+        ordered = [s for s in STAGES if s in self.timers] + sorted(set(self.timers) - set(STAGES))
+        for s in ordered:
+            t = self.timers[s]
+            lines.append(f"{s:10s} {t:10.3f} {t / total:7.1%}")
+        if self.wall:
+            lines.append(f"{'总计':10s} {self.wall:10.3f}")
+        if self.counters:
+            lines.append('')
+            lines.extend(f"{k:28s} {v:>14,}" for k, v in sorted(self.counters.items()))
+        if self.peaks:
+            lines.extend(f"{'峰值 ' + k:28s} {v:>14,}" for k, v in sorted(self.peaks.items()))
+        return '\n'.join(lines)
+
+
+def current() -> Optional[Metrics]:
+    return _current
+
+
+def warn(kind: str) -> None:
+    """供异常分支调用的告警计数，未开启时只是一次 None 判断"""
+    if _current is not None:
+        _current.warn(kind)
+
+
+@contextmanager
+def profile(callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Iterator[Metrics]:
+    """
+    在 with 块内开启计时；退出时把 snapshot() 交给 callback(如转发到遥测)
+    只支持单线程使用，嵌套时内层沿用外层的 Metrics
+    """
+    global _current
+    if _current is not None:
+        yield _current
+        return
+    m = _current = Metrics()
+    restore = _patch_floats(m)
+    t0 = perf_counter()
+    try:
+        yield m
+    finally:
+        m.wall = perf_counter() - t0
+        restore()
+        _current = None
+        if callback is not None:
+            try:
+                callback(m.snapshot())
+            except Exception as e:
+                logger.warning(f"metrics 回调失败: {e}")
+
+
+# ---------- 插桩 ----------
+def _patch_floats(m: Metrics) -> Callable[[], None]:
+    """把解析器里的数值转换函数换成计时版本，返回还原函数"""
+    from . import parser
+    originals = {name: getattr(parser, name) for name in ('to_float', 'to_floats')}
+
+    def timed(fn):
+        def wrapper(*args):
+            t0 = perf_counter()
+            v = fn(*args)
+            m.timers['float'] = m.timers.get('float', 0.0) + (perf_counter() - t0)
+            return v
+        return wrapper
+
+    for name, fn in originals.items():
+        setattr(parser, name, timed(fn))
+
+    def restore():
+        for name, fn in originals.items():
+            setattr(parser, name, fn)
+    return restore
+
+
+def _timed_lines(m: Metrics, lines: Iterable, stage: str) -> Iterator:
+    """统计行数/字节数，并把花在底层迭代器(读取、解压)上的时间记入 stage"""
+    it = iter(lines)
+    n = nbytes = 0
+    spent = 0.0
+    try:
+        while True:
+            t0 = perf_counter()
+            try:
+                line = next(it)
+            except StopIteration:
+                spent += perf_counter() - t0
+                return
+            spent += perf_counter() - t0
+            n += 1
+            nbytes += len(line) + 1
+            yield line
+    finally:
+        m.add_time(stage, spent)
+        m.incr('lines', n)
+        m.incr('bytes_decoded', nbytes)
+
+
+def instrument_events(m: Metrics, parse: Callable[[Iterable], Iterator], lines: Iterable,
+                      read_stage: str = 'read') -> Iterator:
+    """
+    包装 ACMIParser.parse_lines：按事件类型计数、记录单帧最大对象数，
+    并把 parse 阶段的时间与读取、数值转换分开
+    """
+    read_before = m.timers.get(read_stage, 0.0)
+    float_before = m.timers.get('float', 0.0)
+    gen = parse(_timed_lines(m, lines, read_stage))
+    counts: Dict[str, int] = {}
+    frame_size = 0
+    spent = 0.0
+    try:
+        while True:
+            t0 = perf_counter()
+            try:
+                ev = next(gen)
+            except StopIteration:
+                spent += perf_counter() - t0
+                return
+            spent += perf_counter() - t0
+            name = ev.__class__.__name__
+            counts[name] = counts.get(name, 0) + 1
+            if name == '_ObjectUpdate':
+                frame_size += 1
+            elif name == '_FrameBegin':
+                m.peak('frame_objects', frame_size)
+                frame_size = 0
+            yield ev
+    finally:
+        gen.close()
+        m.peak('frame_objects', frame_size)
+        for name, n in counts.items():
+            m.incr('lines.' + _EVENT_LINE.get(name, name), n)
+        inner = (m.timers.get(read_stage, 0.0) - read_before) + (m.timers.get('float', 0.0) - float_before)
+        m.add_time('parse', spent - inner)
+
+
+_EVENT_LINE = {
+    '_HeaderParsed': 'header',
+    '_GlobalProp': 'global',
+    '_FrameBegin': 'frame',
+    '_ObjectUpdate': 'update',
+    '_ObjectRemove': 'remove',
+}
@@ -1,16 +1,147 @@
 import os
 import re
+import mmap
+import time
+import queue
 import logging
-from typing import List, Dict, Optional, Generator, Union, BinaryIO
+import threading
+from typing import List, Dict, Optional, Generator, Union, BinaryIO, Tuple
 from zipfile import ZipFile, is_zipfile
 # from .model import ACMIHeader, ACMIObject, ACMIFrame, ACMIFile
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+PIPELINE_DEPTH = 4   # 流水线中已解压未切行的块数上限，额外内存约 PIPELINE_DEPTH * 块大小
+
+
+# ---------- 按块切行 ----------
+def _continued(buf, nl: int, start: int) -> bool:
+    """buf[nl] 处的换行之前是否为续行符 '\\'(允许中间有 '\\r')"""
+    k = nl - 1
+    if k >= start and buf[k] == 0x0D:
+        k -= 1
+    return k >= start and buf[k] == 0x5C
+
+
+def _logical_end(buf, start: int, end: int) -> int:
+    """buf[start:end] 中最后一个逻辑行结束的换行位置(跳过续行)，没有返回 -1"""
+    nl = buf.rfind(b'\n', start, end)
+    while nl >= 0 and _continued(buf, nl, start):
+        nl = buf.rfind(b'\n', start, nl)
+    return nl
+
+
+def join_continuations(lines: List[bytes]) -> List[bytes]:
+    """以 '\\' 结尾的行与下一行合并，续行符还原为换行(多行文本属性)"""
+    out, pending = [], []
+    for line in lines:
+        if line.endswith(b'\\'):
+            pending.append(line[:-1])
+            continue
+        if pending:
+            pending.append(line)
+            line = b'\n'.join(pending)
+            pending = []
+        out.append(line)
+    if pending:
+        out.append(b'\n'.join(pending))
+    return out
+
+
+def split_block(block: bytes) -> List[bytes]:
+    """
+    把以逻辑行边界结束的字节块切成行(不解码)：去掉行尾 '\\r'，合并续行
+    切分在 C 层一次完成，只有块内确实出现 '\\r' 或续行时才逐行处理
+    """
+    if block.endswith(b'\n'):
+        block = block[:-1]
+    lines = block.split(b'\n')
+    if b'\r' in block:
+        lines = [line.rstrip(b'\r') for line in lines]
+    if b'\\\n' in block or b'\\\r\n' in block or block.rstrip(b'\r').endswith(b'\\'):
+        lines = join_continuations(lines)
+    return lines
+
+
+def split_complete(data: bytes) -> Tuple[List[bytes], bytes]:
+    """切出 data 中全部完整的逻辑行，返回 (行, 剩余的半行)，半行留待与下一块拼接"""
+    nl = _logical_end(data, 0, len(data))
+    if nl < 0:
+        return [], data
+    return split_block(data[:nl]), data[nl + 1:]
+
+
+def iter_stream_lines(f: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE) -> Generator[bytes, None, None]:
+    """按块读取二进制流并切行，跨块的半行(含未结束的续行)留到下一块"""
+    rest = b''
+    while True:
+        block = f.read(block_size)
+        if not block:
+            break
+        lines, rest = split_complete(rest + block if rest else block)
+        yield from lines
+    if rest:
+        yield from split_block(rest)
+
+
+def iter_pipelined_lines(f: BinaryIO, block_size: int = DEFAULT_BLOCK_SIZE,
+                         depth: int = PIPELINE_DEPTH) -> Generator[bytes, None, None]:
+    """
+    两级流水线：后台线程按大块读取并解压(zlib 解压期间释放 GIL)，当前线程切行并交给解析器
+    两级之间是容量为 depth 的有界队列，解析跟不上时解压线程阻塞，内存有上限
+    调用方提前停止迭代(如时间窗过滤越过 end)时通知后台线程退出并等待其结束
+    """
+    q: queue.Queue = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce() -> None:
+        try:
+            while True:
+                block = f.read(block_size)
+                if not put(block) or not block:
+                    return
+        except BaseException as e:  # 在消费线程中重新抛出
+            put(e)
+
+    worker = threading.Thread(target=produce, name='acmi-inflate', daemon=True)
+    worker.start()
+    rest = b''
+    try:
+        while True:
+            block = q.get()
+            if isinstance(block, BaseException):
+                raise block
+            if not block:
+                break
+            lines, rest = split_complete(rest + block if rest else block)
+            yield from lines
+        if rest:
+            yield from split_block(rest)
+    finally:
+        stop.set()
+        while worker.is_alive():
+            try:
+                q.get_nowait()
+            except queue.Empty:
+                worker.join(0.05)
+
+
 class ACMIFileReader:
     def __init__(self, file_path: str, encoding: str = 'utf-8-sig'):
         self.file_path = file_path
         self.encoding = encoding
+        self.index = None  # 帧时间索引，见 build_index
+        self.pipeline: Optional[bool] = None  # 压缩包是否用后台线程解压，None 为多核时自动启用
         if not os.path.exists(file_path):
             logger.error(f"文件不存在: {file_path}")
             raise FileNotFoundError(f"文件不存在: {file_path}")
@@ -53,6 +184,129 @@ class ACMIFileReader:
                 logger.error(f"读取文件失败: {e}")
                 raise
 
+    def open_binary(self) -> BinaryIO:
+        """以二进制流打开 .acmi 内容(压缩包则打开其中的 .acmi 成员)，调用方负责关闭"""
+        if not self.zip_file:
+            return open(self.file_path, 'rb')
+        z = ZipFile(self.file_path)
+        try:
+            for name in z.namelist():
+                if name.lower().endswith('.acmi'):
+                    return z.open(name)  # 成员流持有底层文件引用，关闭 ZipFile 不影响读取
+            raise FileNotFoundError("压缩包中未找到.acmi文件")
+        finally:
+            z.close()
+
+    def open_mmap(self, sequential: bool = True) -> Optional[mmap.mmap]:
+        """
+        只读映射整个普通 .acmi 文件，多个进程读同一文件时共享页缓存；空文件返回 None
+        sequential=True 提示内核顺序预读(随机访问时传 False)
+        """
+        if self.zip_file:
+            raise ValueError("压缩文件不支持 mmap")
+        with open(self.file_path, 'rb') as f:
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # 空文件
+                return None
+        advice = getattr(mmap, 'MADV_SEQUENTIAL' if sequential else 'MADV_RANDOM', None)
+        if advice is not None:
+            try:
+                mm.madvise(advice)
+            except OSError:
+                pass
+        return mm
+
+    def iter_mmap_lines(self, block_size: int = DEFAULT_BLOCK_SIZE) -> Generator[bytes, None, None]:
+        """
+        普通文件经 mmap 按大块切行：每块在逻辑行边界处截断(不拆开续行)，块内由 split_block 一次切分
+        """
+        mm = self.open_mmap()
+        if mm is None:
+            return
+        try:
+            n = len(mm)
+            start = 0
+            while start < n:
+                end = min(start + block_size, n)
+                nl = _logical_end(mm, start, end) if end < n else n
+                while nl < 0:  # 单个逻辑行比块还长
+                    end = min(end + block_size, n)
+                    nl = _logical_end(mm, start, end) if end < n else n
+                yield from split_block(mm[start:nl])
+                start = nl + 1
+        finally:
+            mm.close()
+
+    def read_raw_lines(self, follow: bool = False, poll_interval: float = 0.5,
+                       idle_timeout: Optional[float] = None) -> Generator[bytes, None, None]:
+        """
+        按字节读取行(不解码)，由解析器决定哪些部分需要解码；'\\' 结尾的续行会与下一行合并
+        普通文件走 mmap，压缩包按块解压切行(pipeline 启用时解压与解析在两个线程上重叠进行)
+        follow=True 时到达文件末尾后每 poll_interval 秒重试(类似 tail -f)，
+        未以换行结尾的半行会等写完再产出；idle_timeout 秒无新数据后结束(None 表示一直等待)
+        """
+        if not follow:
+            if not self.zip_file:
+                yield from self.iter_mmap_lines()
+                return
+            pipeline = self.pipeline if self.pipeline is not None else (os.cpu_count() or 1) > 1
+            with self.open_binary() as f:
+                yield from iter_pipelined_lines(f) if pipeline else iter_stream_lines(f)
+            return
+        if self.zip_file:
+            raise ValueError("压缩文件不支持 follow 模式")
+        with open(self.file_path, 'rb') as f:
+            partial = b''
+            held: List[bytes] = []   # 以 '\\' 结尾、等待下一行的续行
+            idle = 0.0
+            while True:
+                line = f.readline()
+                if line:
+                    idle = 0.0
+                    if not line.endswith(b'\n'):
+                        partial += line
+                        continue
+                    line = (partial + line).rstrip(b'\r\n')
+                    partial = b''
+                    if line.endswith(b'\\'):
+                        held.append(line)
+                    elif held:
+                        held.append(line)
+                        yield from join_continuations(held)
+                        held = []
+                    else:
+                        yield line
+                    continue
+                if idle_timeout is not None and idle >= idle_timeout:
+                    break
+                time.sleep(poll_interval)
+                idle += poll_interval
+            if partial:
+                held.append(partial.rstrip(b'\r\n'))
+            if held:
+                yield from join_continuations(held)
+
+    # ---------- 随机访问 ----------
+    def build_index(self, interval: float = 60.0, keyframes: bool = True) -> 'FrameTimeIndex':
+        """扫描一遍建立帧时间索引(zip 输入同时记录解压检查点)"""
+        from .index import build_frame_index
+        self.index = build_frame_index(self, interval=interval, keyframes=keyframes)
+        return self.index
+
+    def seek(self, time_offset: float) -> Generator[bytes, None, None]:
+        """从覆盖 time_offset 的检查点帧开始逐行(bytes)读取，需先 build_index"""
+        return self._require_index().seek(time_offset)
+
+    def state_at(self, time_offset: float) -> 'ACMIFrame':
+        """time_offset 时刻全部存活对象的完整状态，需先 build_index"""
+        return self._require_index().state_at(time_offset)
+
+    def _require_index(self):
+        if getattr(self, 'index', None) is None:
+            raise RuntimeError("尚未建立索引，请先调用 build_index()")
+        return self.index
+
     def read_lines(self) -> Generator[str, None, None]:
         """读取文件行，自动处理压缩文件"""
         if self.zip_file:
@@ -0,0 +1,358 @@
+# resample.py
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from .model import *
+from .acmi_file import ACMIFile
+from .columnar import COORD_FIELDS, ColumnarACMIFile
+from .state import ObjectTrack
+from .lifecycle import LifecycleTable
+
+# 角度字段按最短弧插值；其余数值字段线性插值，文本字段保持上一次的值
+ANGLE_FIELDS = frozenset(['roll', 'pitch', 'yaw', 'heading'])
+_WRAP_360 = frozenset(['yaw', 'heading'])    # [0, 360)，其余角度落在 [-180, 180)
+
+
+# ---------- 结果 ----------
+@dataclass
+class ResampledTracks:
+    """
+    统一时间网格上的稠密轨迹：
+    values[i, t, f]      第 i 个对象在 times[t] 的第 f 个数值字段，不存活或未知为 NaN
+    alive[i, t]          对象是否存活(已出现且未被移除)
+    text_codes[i, t, k]  文本字段的类别编码，-1 表示无值，categories[code] 为原字符串
+    """
+    times: np.ndarray
+    ids: np.ndarray
+    fields: Tuple[str, ...]
+    values: np.ndarray
+    alive: np.ndarray
+    text_fields: Tuple[str, ...] = ()
+    text_codes: Optional[np.ndarray] = None
+    categories: Sequence[str] = ()
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.values.shape
+
+    def field(self, name: str) -> np.ndarray:
+        """(n_objects, n_times) 的单个数值字段"""
+        return self.values[:, :, self.fields.index(name)]
+
+    def text(self, name: str) -> np.ndarray:
+        """(n_objects, n_times) 的单个文本字段，解码为字符串(无值为 None)"""
+        codes = self.text_codes[:, :, self.text_fields.index(name)]
+        lookup = np.array(list(self.categories) + [None], dtype=object)
+        return lookup[codes]   # -1 恰好取到末尾的 None
+
+
+# ---------- 排序后的样本 ----------
+@dataclass
+class _Samples:
+    """按 id 分组、组内按时间排序的全部更新行；_fill_samples 之后字段在每段存活期内前向填充"""
+    ids: np.ndarray              # (n_objects,)
+    bounds: np.ndarray           # (n_objects + 1,) 各组在行数组中的起止
+    times: np.ndarray            # (n_rows,)
+    values: np.ndarray           # (n_rows, n_fields)
+    text_codes: np.ndarray       # (n_rows, n_text) int32
+    categories: List[str]
+    restart: Optional[np.ndarray] = None   # (n_rows,) bool，同一 id 移除后再次出现的首行
+
+
+def _ffill_groups(col: np.ndarray, starts: np.ndarray, missing) -> np.ndarray:
+    """段内前向填充，不跨越 starts 标记的段首；段首行缺失时保持缺失"""
+    n = len(col)
+    valid = (col == col) if missing is None else (col != missing)
+    valid |= starts
+    idx = np.where(valid, np.arange(n), 0)
+    np.maximum.accumulate(idx, out=idx)
+    return col[idx]
+
+
+def _fill_samples(s: _Samples, restart: np.ndarray) -> _Samples:
+    """按 id 分组并在每段新的存活期处断开，前向填充数值与文本列(原地)"""
+    starts = restart.copy()
+    heads = s.bounds[:-1]
+    starts[heads[heads < len(starts)]] = True
+    for f in range(s.values.shape[1]):
+        s.values[:, f] = _ffill_groups(s.values[:, f], starts, None)
+    for k in range(s.text_codes.shape[1]):
+        s.text_codes[:, k] = _ffill_groups(s.text_codes[:, k], starts, -1)
+    s.restart = restart
+    return s
+
+
+def _lifecycle_restarts(life, s: _Samples) -> np.ndarray:
+    """由生命周期表的出现时间定位每个 id 移除后再次出现的首行"""
+    out = np.zeros(len(s.times), dtype=bool)
+    keys, counts = np.unique(life.object_ids, return_counts=True)
+    multi = set(keys[counts > 1].tolist())
+    for g, oid in enumerate(s.ids.tolist()):
+        if oid not in multi:
+            continue
+        lo, hi = int(s.bounds[g]), int(s.bounds[g + 1])
+        t = s.times[lo:hi]
+        spans = life.get(oid)
+        for prev, cur in zip(spans, spans[1:]):
+            # 与上一段最后一次更新同一时刻重新出现时，该时刻的最后一行属于新的存活期
+            r = int(np.searchsorted(t, cur.spawn, 'right')) - 1 if cur.spawn == prev.last_update \
+                else int(np.searchsorted(t, cur.spawn, 'left'))
+            if 0 < r < hi - lo:
+                out[lo + r] = True
+    return out
+
+
+def _track_restarts(tracks: Dict[int, ObjectTrack], s: _Samples) -> np.ndarray:
+    """轨迹记录了每段存活期的起始行，直接标记"""
+    out = np.zeros(len(s.times), dtype=bool)
+    for g, oid in enumerate(s.ids.tolist()):
+        for a, _, _ in tracks[oid].lifetimes()[1:]:
+            out[s.bounds[g] + a] = True
+    return out
+
+
+def _samples_from_columnar(acmi: ColumnarACMIFile, fields, text_fields, ids) -> _Samples:
+    """直接在列存储上取列，不还原任何对象"""
+    store = acmi.store
+    order, uniq, bounds = store.id_index()
+    if ids is not None:
+        pos = np.flatnonzero(np.isin(uniq, np.array(list(ids), dtype=uniq.dtype)))
+        order = np.concatenate([order[bounds[p]:bounds[p + 1]] for p in pos]) if len(pos) else order[:0]
+        lengths = bounds[pos + 1] - bounds[pos]
+        uniq, bounds = uniq[pos], np.concatenate([[0], np.cumsum(lengths)])
+    rows = order
+    times = store.row_times[rows]
+
+    codes_of = store._string_codes
+    values = np.full((len(rows), len(fields)), np.nan)
+    for f, name in enumerate(fields):
+        if name in COORD_FIELDS:
+            values[:, f] = store.row_coords.values[rows, COORD_FIELDS.index(name)]
+        elif name in codes_of:
+            dense = np.full(store.row_count, np.nan)
+            m = store.num_key.values == codes_of[name]
+            dense[store.num_row.values[m]] = store.num_value.values[m]
+            values[:, f] = dense[rows]
+
+    codes = np.full((len(rows), len(text_fields)), -1, dtype=np.int32)
+    for k, name in enumerate(text_fields):
+        if name in codes_of:
+            dense = np.full(store.row_count, -1, dtype=np.int32)
+            m = store.text_key.values == codes_of[name]
+            dense[store.text_row.values[m]] = store.text_value.values[m]
+            codes[:, k] = dense[rows]
+    # 只保留用到的字符串作为类别
+    used, inverse = np.unique(codes, return_inverse=True)
+    shift = 1 if len(used) and used[0] == -1 else 0
+    categories = [store.strings[c] for c in used[shift:].tolist()]
+    codes = (inverse.reshape(codes.shape) - shift).astype(np.int32)
+    return _Samples(uniq.astype(np.int64), bounds, times, values, codes, categories)
+
+
+def _samples_from_rows(per_id: Iterable[Tuple[int, np.ndarray, np.ndarray, List[Dict[str, str]]]],
+                       fields, text_fields) -> _Samples:
+    """per_id 产出 (id, 时间, 数值列, 文本属性字典列表)"""
+    ids, lengths, times, values, codes = [], [], [], [], []
+    categories: List[str] = []
+    cat_codes: Dict[str, int] = {}
+    for oid, t, vals, texts in per_id:
+        ids.append(oid)
+        lengths.append(len(t))
+        times.append(t)
+        values.append(vals)
+        c = np.full((len(t), len(text_fields)), -1, dtype=np.int32)
+        for r, props in enumerate(texts):
+            if not props:
+                continue
+            for k, name in enumerate(text_fields):
+                v = props.get(name)
+                if v is not None:
+                    code = cat_codes.get(v)
+                    if code is None:
+                        code = cat_codes[v] = len(categories)
+                        categories.append(v)
+                    c[r, k] = code
+        codes.append(c)
+    bounds = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    return _Samples(
+        np.array(ids, dtype=np.int64), bounds,
+        np.concatenate(times) if times else np.empty(0),
+        np.concatenate(values) if values else np.empty((0, len(fields))),
+        np.concatenate(codes) if codes else np.empty((0, len(text_fields)), dtype=np.int32),
+        categories)
+
+
+def _samples_from_file(acmi: ACMIFile, fields, text_fields, ids) -> _Samples:
+    """对象模型：逐 id 取 id 索引中的更新"""
+    def per_id():
+        for oid in (acmi.ids if ids is None else sorted(set(ids))):
+            objs = acmi.id_objects(oid)
+            if not objs:
+                continue
+            t = np.array([o.time_offset for o in objs], dtype=np.float64)
+            vals = np.full((len(objs), len(fields)), np.nan)
+            texts = []
+            for r, o in enumerate(objs):
+                c = o.object_coordinates
+                p = o.object_properties
+                numeric = (p.numeric_properties if p is not None else None) or {}
+                for f, name in enumerate(fields):
+                    v = getattr(c, name, None) if name in COORD_FIELDS else numeric.get(name)
+                    if v is not None:
+                        vals[r, f] = v
+                texts.append(p.text_properties if p is not None else None)
+            yield oid, t, vals, texts
+    return _samples_from_rows(per_id(), fields, text_fields)
+
+
+def _samples_from_tracks(tracks: Dict[int, ObjectTrack], fields, text_fields, ids) -> _Samples:
+    """状态引擎的轨迹：坐标与属性已是完整状态"""
+    def per_id():
+        for oid in (sorted(tracks) if ids is None else sorted(set(ids) & tracks.keys())):
+            tr = tracks[oid]
+            if not len(tr):
+                continue
+            arr = tr.to_arrays()
+            vals = np.full((len(tr), len(fields)), np.nan)
+            texts = []
+            for r, (text, numeric) in enumerate(tr._iter_properties()):
+                for f, name in enumerate(fields):
+                    if name not in COORD_FIELDS and name in numeric:
+                        vals[r, f] = numeric[name]
+                texts.append({k: text[k] for k in text_fields if k in text})
+            for f, name in enumerate(fields):
+                if name in COORD_FIELDS:
+                    vals[:, f] = arr[name]
+            yield oid, arr['time_offset'], vals, texts
+    return _samples_from_rows(per_id(), fields, text_fields)
+
+
+# ---------- 重采样核心 ----------
+def make_grid(start: float, end: float, rate: float) -> np.ndarray:
+    """[start, end] 上间隔 1/rate 秒的时间网格"""
+    step = 1.0 / rate
+    n = int(np.floor((end - start) / step + 1e-9)) + 1
+    return start + step * np.arange(max(n, 0))
+
+
+def _lifecycle_alive(life, ids: np.ndarray, grid: np.ndarray) -> np.ndarray:
+    """
+    (n_objects, n_times) 的存活掩码：网格时刻落在该 id 任一段存活期 [出现, 移除) 内
+    未被移除的存活期不设上限，与未提供移除时间时的行为一致
+    """
+    n_obj, n_t = len(ids), len(grid)
+    ids = np.asarray(ids, dtype=np.uint64)
+    order = np.argsort(ids, kind='stable')
+    pos = np.searchsorted(ids[order], life.object_ids)
+    pos = np.minimum(pos, max(n_obj - 1, 0))
+    hit = (ids[order][pos] == life.object_ids) if n_obj else np.zeros(len(life), dtype=bool)
+    rows = order[pos[hit]]
+    stop = np.where(np.isnan(life.removed), np.inf, life.removed)[hit]
+    lo = np.searchsorted(grid, life.spawn[hit], 'left')
+    hi = np.searchsorted(grid, stop, 'left')
+    # 差分数组：每段存活期在 [lo, hi) 上 +1，累加后大于 0 即存活
+    diff = np.zeros((n_obj, n_t + 1), dtype=np.int32)
+    np.add.at(diff, (rows, lo), 1)
+    np.add.at(diff, (rows, hi), -1)
+    return np.cumsum(diff[:, :n_t], axis=1) > 0
+
+
+def _resample_samples(s: _Samples, grid: np.ndarray, fields: Tuple[str, ...],
+                      text_fields: Tuple[str, ...], removed: Dict[int, float],
+                      dtype, live: Optional[np.ndarray] = None) -> ResampledTracks:
+    n_obj, n_t = len(s.ids), len(grid)
+    # 每个网格时刻在各组内的位置：i0 为不晚于 t 的最后一行
+    i0 = np.empty((n_obj, n_t), dtype=np.int64)
+    for g in range(n_obj):
+        lo, hi = int(s.bounds[g]), int(s.bounds[g + 1])
+        i0[g] = np.searchsorted(s.times[lo:hi], grid, 'right') - 1 + lo
+    first = s.bounds[:-1, None]
+    last = s.bounds[1:, None] - 1
+    alive = i0 >= first
+    if removed:
+        until = np.array([removed.get(int(oid), np.inf) for oid in s.ids])
+        alive &= grid[None, :] < until[:, None]
+    if live is not None:
+        alive &= live
+    i0 = np.maximum(i0, first)
+    i1 = np.minimum(i0 + 1, last)
+    if s.restart is not None and s.restart.any():
+        # 下一行属于新的存活期时不跨过移除插值，保持前一行的值直到移除
+        i1 = np.where(s.restart[i1] & (i1 > i0), i0, i1)
+    t0, t1 = s.times[i0], s.times[i1]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        w = np.where(t1 > t0, (grid[None, :] - t0) / (t1 - t0), 0.0)
+    np.clip(w, 0.0, 1.0, out=w)
+
+    values = np.empty((n_obj, n_t, len(fields)), dtype=dtype)
+    for f, name in enumerate(fields):
+        v0, v1 = s.values[i0, f], s.values[i1, f]
+        if name in ANGLE_FIELDS:
+            d = (v1 - v0 + 180.0) % 360.0 - 180.0
+            v = v0 + w * d
+            v = v % 360.0 if name in _WRAP_360 else (v + 180.0) % 360.0 - 180.0
+        else:
+            v = v0 + w * (v1 - v0)
+        v[~alive] = np.nan
+        values[:, :, f] = v
+
+    text_codes = s.text_codes[i0] if text_fields else np.empty((n_obj, n_t, 0), dtype=np.int32)
+    if text_fields:
+        text_codes[~alive] = -1
+    return ResampledTracks(grid, s.ids, tuple(fields), values, alive,
+                           tuple(text_fields), text_codes, s.categories)
+
+
+def _grid_for(s: _Samples, rate: float, start: Optional[float], end: Optional[float]) -> np.ndarray:
+    if start is None:
+        start = float(s.times.min()) if len(s.times) else 0.0
+    if end is None:
+        end = float(s.times.max()) if len(s.times) else start
+    return make_grid(start, end, rate)
+
+
+# ---------- 入口 ----------
+def resample(acmi: ACMIFile, rate: float = 1.0, start: Optional[float] = None,
+             end: Optional[float] = None, fields: Sequence[str] = COORD_FIELDS,
+             text_fields: Sequence[str] = (), ids: Optional[Iterable[int]] = None,
+             removed: Optional[Dict[int, float]] = None,
+             dtype=np.float64) -> ResampledTracks:
+    """
+    把 ACMIFile 中每个 id 的更新重采样到 rate Hz 的统一网格上。
+    fields 可以是坐标字段或数值属性名(如 'IAS')，text_fields 为文本属性名(如 'Name')。
+    存活区间取自 acmi.lifecycle：对象在被移除(-id 行)之后为 NaN，同一 id 再次出现时重新存活；
+    给出 removed(id -> 移除时间)时改用它，不再查询生命周期表。
+    用法：
+        r = resample(load_acmi('demo.acmi', columnar=True), rate=10, text_fields=['Name'])
+        r.values.shape   # (n_objects, n_times, n_fields)
+    """
+    fields, text_fields = tuple(fields), tuple(text_fields)
+    if isinstance(acmi, ColumnarACMIFile):
+        s = _samples_from_columnar(acmi, fields, text_fields, ids)
+    else:
+        s = _samples_from_file(acmi, fields, text_fields, ids)
+    life = acmi.lifecycle
+    s = _fill_samples(s, _lifecycle_restarts(life, s))
+    grid = _grid_for(s, rate, start, end)
+    if removed is not None:
+        return _resample_samples(s, grid, fields, text_fields, removed, dtype)
+    return _resample_samples(s, grid, fields, text_fields, {}, dtype, _lifecycle_alive(life, s.ids, grid))
+
+
+def resample_tracks(tracks: Dict[int, ObjectTrack], rate: float = 1.0, start: Optional[float] = None,
+                    end: Optional[float] = None, fields: Sequence[str] = COORD_FIELDS,
+                    text_fields: Sequence[str] = (), ids: Optional[Iterable[int]] = None,
+                    dtype=np.float64) -> ResampledTracks:
+    """与 resample 相同，但以 reconstruct_tracks 的结果为输入，存活区间取自各轨迹的存活期(含移除后再次出现)"""
+    fields, text_fields = tuple(fields), tuple(text_fields)
+    s = _samples_from_tracks(tracks, fields, text_fields, ids)
+    s = _fill_samples(s, _track_restarts(tracks, s))
+    nan = float('nan')
+    life = LifecycleTable.from_records(
+        ((oid, tr.times[a], tr.times[b - 1], nan if t is None else t)
+         for oid, tr in tracks.items() for a, b, t in tr.lifetimes()), None)
+    grid = _grid_for(s, rate, start, end)
+    return _resample_samples(s, grid, fields, text_fields, {}, dtype, _lifecycle_alive(life, s.ids, grid))
@@ -0,0 +1,350 @@
+# spatial.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Iterable, Tuple
+import itertools
+import logging
+
+import numpy as np
+
+from .model import *
+from .parser import ACMIParser, _GlobalProp
+from .state import ACMIStateEngine, ObjectTrack
+
+logger = logging.getLogger(__name__)
+
+NM = 1852.0                     # 海里 -> 米
+_WGS84_A = 6378137.0
+_WGS84_E2 = 6.69437999014e-3
+_CHUNK_CELLS = 4 * 1024 * 1024  # 单次向量化计算的元素上限，控制峰值内存
+
+# 网格的 13 个"正半"邻格偏移：每对相邻格子只访问一次
+_HALF_OFFSETS = [o for o in itertools.product((-1, 0, 1), repeat=3) if o > (0, 0, 0)]
+
+
+# ---------- 坐标转换 ----------
+def geodetic_to_ecef(lon: np.ndarray, lat: np.ndarray, alt: np.ndarray) -> np.ndarray:
+    """WGS84 经纬高(度, 度, 米) -> ECEF(米)，返回 (..., 3)"""
+    lon = np.radians(lon)
+    lat = np.radians(lat)
+    sin_lat = np.sin(lat)
+    n = _WGS84_A / np.sqrt(1.0 - _WGS84_E2 * sin_lat * sin_lat)
+    x = (n + alt) * np.cos(lat) * np.cos(lon)
+    y = (n + alt) * np.cos(lat) * np.sin(lon)
+    z = (n * (1.0 - _WGS84_E2) + alt) * sin_lat
+    return np.stack([x, y, z], axis=-1)
+
+
+def ecef_to_enu(xyz: np.ndarray, ref_lon: float, ref_lat: float, ref_alt: float = 0.0) -> np.ndarray:
+    """ECEF -> 以 (ref_lon, ref_lat, ref_alt) 为原点的本地东北天坐标(米)"""
+    origin = geodetic_to_ecef(np.float64(ref_lon), np.float64(ref_lat), np.float64(ref_alt))
+    lo, la = np.radians(ref_lon), np.radians(ref_lat)
+    rot = np.array([
+        [-np.sin(lo), np.cos(lo), 0.0],
+        [-np.sin(la) * np.cos(lo), -np.sin(la) * np.sin(lo), np.cos(la)],
+        [np.cos(la) * np.cos(lo), np.cos(la) * np.sin(lo), np.sin(la)],
+    ])
+    return (xyz - origin) @ rot.T
+
+
+# ---------- 查询结果 ----------
+@dataclass
+class RangeHit:
+    object_id: int
+    times: np.ndarray        # 处于范围内的时间桶
+    distances: np.ndarray    # 对应的距离(米)
+
+    @property
+    def min_distance(self) -> float:
+        return float(self.distances.min())
+
+
+@dataclass
+class ClosestApproach:
+    id_a: int
+    id_b: int
+    time_offset: float
+    distance: float          # 米
+
+
+# ---------- 时空索引 ----------
+@dataclass
+class SpatialIndex:
+    """
+    按固定时间桶对齐的位置矩阵：positions[t, n] 为第 n 个对象在第 t 个桶的
+    本地 ENU 坐标(米)，对象不存在时为 NaN。
+    原点取 ReferenceLongitude/ReferenceLatitude，直线距离与 ECEF 下一致。
+    用法：
+        index = SpatialIndex.from_file('demo.acmi', bucket=1.0)
+        index.within(0x1, 10 * NM, start=100, end=400)
+    """
+    times: np.ndarray                      # (T,) 桶时间
+    ids: np.ndarray                        # (N,) object_id
+    positions: np.ndarray                  # (T, N, 3) float32
+    reference: Tuple[float, float] = (0.0, 0.0)
+    _columns: Dict[int, int] = field(default_factory=dict, repr=False)
+
+    def __post_init__(self):
+        self._columns = {int(oid): i for i, oid in enumerate(self.ids)}
+
+    # ----- 构建 -----
+    @classmethod
+    def from_tracks(cls, tracks: Dict[int, ObjectTrack], reference: Tuple[float, float] = (0.0, 0.0),
+                    bucket: float = 1.0, start: Optional[float] = None,
+                    end: Optional[float] = None) -> 'SpatialIndex':
+        """
+        由 reconstruct_tracks 的结果构建；桶内位置按轨迹的每段存活期分别线性插值，
+        首次出现之前与被移除之后(直到同一 id 再次出现)为 NaN。轨迹中的经纬度是相对 reference 的偏移。
+        """
+        tracks = [tr for tr in tracks.values() if len(tr)]
+        if not tracks:
+            return cls(np.empty(0), np.empty(0, np.int64), np.empty((0, 0, 3), np.float32), reference)
+        t0 = min(tr.times[0] for tr in tracks) if start is None else start
+        t1 = max(tr.times[-1] for tr in tracks) if end is None else end
+        times = t0 + bucket * np.arange(int(np.floor((t1 - t0) / bucket)) + 1)
+        ref_lon, ref_lat = reference
+
+        ids = np.array([tr.object_id for tr in tracks], dtype=np.int64)
+        positions = np.full((len(times), len(tracks), 3), np.nan, dtype=np.float32)
+        for n, tr in enumerate(tracks):
+            arr = tr.to_arrays()
+            # 每段存活期单独插值，不跨越移除后的空档
+            for a, b, removed in tr.lifetimes():
+                lon, lat = arr['longitude'][a:b], arr['latitude'][a:b]
+                ok = ~(np.isnan(lon) | np.isnan(lat))
+                if not ok.any():
+                    continue
+                tt = arr['time_offset'][a:b][ok]
+                alt = np.nan_to_num(arr['altitude'][a:b][ok])
+                enu = ecef_to_enu(geodetic_to_ecef(lon[ok] + ref_lon, lat[ok] + ref_lat, alt), ref_lon, ref_lat)
+                alive = times >= tt[0]
+                if removed is not None:
+                    alive &= times < removed
+                for k in range(3):
+                    positions[alive, n, k] = np.interp(times[alive], tt, enu[:, k])
+        return cls(times, ids, positions, (ref_lon, ref_lat))
+
+    @classmethod
+    def from_file(cls, file_path: str, encoding: str = 'utf-8-sig', bucket: float = 1.0,
+                  **filters) -> 'SpatialIndex':
+        """一次扫描：收集参考经纬度并重建全部轨迹"""
+        engine = ACMIStateEngine(record_tracks=True)
+        ref = {'ReferenceLongitude': 0.0, 'ReferenceLatitude': 0.0}
+        for ev in ACMIParser(file=file_path, encoding=encoding).events(**filters):
+            if isinstance(ev, _GlobalProp):
+                if ev.key in ref:
+                    ref[ev.key] = float(ev.value)
+            else:
+                engine.apply(ev)
+        return cls.from_tracks(engine.tracks, (ref['ReferenceLongitude'], ref['ReferenceLatitude']),
+                               bucket=bucket)
+
+    # ----- 基础访问 -----
+    @property
+    def bucket(self) -> float:
+        return float(self.times[1] - self.times[0]) if len(self.times) > 1 else 0.0
+
+    def _column(self, object_id: int) -> int:
+        try:
+            return self._columns[object_id]
+        except KeyError:
+            raise KeyError(f"索引中没有对象: {object_id:x}") from None
+
+    def _bucket_range(self, start: Optional[float], end: Optional[float]) -> Tuple[int, int]:
+        lo = 0 if start is None else int(np.searchsorted(self.times, start, 'left'))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, 'right'))
+        return lo, hi
+
+    def _bucket_at(self, time_offset: float) -> int:
+        i = int(np.searchsorted(self.times, time_offset, 'right')) - 1
+        if i < 0:
+            raise ValueError(f"时间早于索引起点: {time_offset}")
+        return i
+
+    def _chunks(self, lo: int, hi: int, width: int) -> Iterable[Tuple[int, int]]:
+        step = max(1, _CHUNK_CELLS // max(width, 1))
+        for a in range(lo, hi, step):
+            yield a, min(a + step, hi)
+
+    def position(self, object_id: int, time_offset: float) -> np.ndarray:
+        """对象在 time_offset 所在桶的 ENU 坐标"""
+        return self.positions[self._bucket_at(time_offset), self._column(object_id)].astype(np.float64)
+
+    # ----- 范围查询 -----
+    def within(self, object_id: int, radius: float, start: Optional[float] = None,
+               end: Optional[float] = None) -> List[RangeHit]:
+        """[start, end] 内曾与 object_id 相距不超过 radius(米) 的对象，按最近距离排序"""
+        c = self._column(object_id)
+        lo, hi = self._bucket_range(start, end)
+        hit_t, hit_n, hit_d = [], [], []
+        for a, b in self._chunks(lo, hi, len(self.ids)):
+            block = self.positions[a:b].astype(np.float64)
+            d = np.linalg.norm(block - block[:, c:c + 1], axis=-1)
+            d[:, c] = np.nan
+            with np.errstate(invalid='ignore'):
+                t, n = np.nonzero(d <= radius)
+            hit_t.append(t + a)
+            hit_n.append(n)
+            hit_d.append(d[t, n])
+        return self._group_hits(hit_t, hit_n, hit_d)
+
+    def around(self, lon: float, lat: float, alt: float, radius: float,
+               start: Optional[float] = None, end: Optional[float] = None) -> List[RangeHit]:
+        """[start, end] 内曾进入某个固定点(绝对经纬高) radius 范围的对象"""
+        ref_lon, ref_lat = self.reference
+        p = ecef_to_enu(geodetic_to_ecef(np.float64(lon), np.float64(lat), np.float64(alt)), ref_lon, ref_lat)
+        lo, hi = self._bucket_range(start, end)
+        hit_t, hit_n, hit_d = [], [], []
+        for a, b in self._chunks(lo, hi, len(self.ids)):
+            d = np.linalg.norm(self.positions[a:b].astype(np.float64) - p, axis=-1)
+            with np.errstate(invalid='ignore'):
+                t, n = np.nonzero(d <= radius)
+            hit_t.append(t + a)
+            hit_n.append(n)
+            hit_d.append(d[t, n])
+        return self._group_hits(hit_t, hit_n, hit_d)
+
+    def _group_hits(self, hit_t, hit_n, hit_d) -> List[RangeHit]:
+        t, n, d = (np.concatenate(x) if x else np.empty(0, np.int64) for x in (hit_t, hit_n, hit_d))
+        order = np.lexsort((t, n))
+        t, n, d = t[order], n[order], d[order]
+        cols, starts = np.unique(n, return_index=True)
+        hits = [RangeHit(int(self.ids[col]), self.times[ts], ds)
+                for col, ts, ds in zip(cols, np.split(t, starts[1:]), np.split(d, starts[1:]))]
+        hits.sort(key=lambda h: h.min_distance)
+        return hits
+
+    # ----- 最近邻 -----
+    def nearest(self, object_id: int, time_offset: float, k: int = 1) -> List[Tuple[int, float]]:
+        """time_offset 所在桶内离 object_id 最近的 k 个对象 [(id, 距离)]"""
+        i, c = self._bucket_at(time_offset), self._column(object_id)
+        row = self.positions[i].astype(np.float64)
+        d = np.linalg.norm(row - row[c], axis=-1)
+        d[c] = np.nan
+        valid = np.flatnonzero(~np.isnan(d))
+        order = valid[np.argsort(d[valid], kind='stable')[:k]]
+        return [(int(self.ids[n]), float(d[n])) for n in order]
+
+    def nearest_track(self, object_id: int, start: Optional[float] = None,
+                      end: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """每个时间桶内离 object_id 最近的对象，返回 (times, ids, 距离)，无邻居时 id 为 -1"""
+        c = self._column(object_id)
+        lo, hi = self._bucket_range(start, end)
+        near_ids = np.full(hi - lo, -1, dtype=np.int64)
+        near_d = np.full(hi - lo, np.nan)
+        for a, b in self._chunks(lo, hi, len(self.ids)):
+            block = self.positions[a:b].astype(np.float64)
+            d = np.linalg.norm(block - block[:, c:c + 1], axis=-1)
+            d[:, c] = np.inf
+            d[np.isnan(d)] = np.inf
+            if d.shape[1] == 0:
+                continue
+            n = d.argmin(axis=1)
+            best = d[np.arange(len(n)), n]
+            ok = np.isfinite(best)
+            near_ids[a - lo:b - lo][ok] = self.ids[n[ok]]
+            near_d[a - lo:b - lo][ok] = best[ok]
+        return self.times[lo:hi], near_ids, near_d
+
+    # ----- 两两最近接近 -----
+    def closest_approach(self, ids: Optional[Iterable[int]] = None, start: Optional[float] = None,
+                         end: Optional[float] = None,
+                         max_range: Optional[float] = None) -> List[ClosestApproach]:
+        """
+        每对对象在 [start, end] 内的最近距离及发生时刻，按距离升序。
+        ids 指定参与的对象子集(如所有战斗机)，子集内做稠密两两计算；
+        max_range 给出时只报告最近距离不超过它的对象对，使用均匀网格只比较相邻格子，
+        适合数千个对象的全量查询。
+        """
+        cols = (np.arange(len(self.ids)) if ids is None
+                else np.array([self._column(int(i)) for i in ids], dtype=np.int64))
+        lo, hi = self._bucket_range(start, end)
+        if len(cols) < 2 or hi <= lo:
+            return []
+        if max_range is None:
+            pair, t, d = self._dense_pairs(cols, lo, hi)
+        else:
+            pair, t, d = self._grid_pairs(cols, lo, hi, max_range)
+        m = len(cols)
+        out = [ClosestApproach(int(self.ids[cols[p // m]]), int(self.ids[cols[p % m]]),
+                               float(self.times[ti]), float(di))
+               for p, ti, di in zip(pair.tolist(), t.tolist(), d.tolist())]
+        out.sort(key=lambda a: a.distance)
+        return out
+
+    def _dense_pairs(self, cols: np.ndarray, lo: int, hi: int):
+        m = len(cols)
+        ia, ib = np.triu_indices(m, k=1)
+        best_d = np.full(len(ia), np.inf)
+        best_t = np.full(len(ia), -1, dtype=np.int64)
+        for a, b in self._chunks(lo, hi, m * m):
+            block = self.positions[a:b][:, cols].astype(np.float64)
+            d = np.linalg.norm(block[:, ia] - block[:, ib], axis=-1)
+            d[np.isnan(d)] = np.inf
+            t = d.argmin(axis=0)
+            dt = d[t, np.arange(len(ia))]
+            better = dt < best_d
+            best_d[better] = dt[better]
+            best_t[better] = t[better] + a
+        ok = np.isfinite(best_d)
+        return ia[ok] * m + ib[ok], best_t[ok], best_d[ok]
+
+    def _grid_pairs(self, cols: np.ndarray, lo: int, hi: int, max_range: float):
+        """把时间桶当作第 4 维，一个时间块内所有桶一起做网格近邻配对"""
+        m = len(cols)
+        best = (np.empty(0, np.int64), np.empty(0, np.int64), np.empty(0))
+        for a, b in self._chunks(lo, hi, m):
+            block = self.positions[a:b][:, cols].astype(np.float64)
+            t, n = np.nonzero(~np.isnan(block[..., 0]))
+            if len(t) < 2:
+                continue
+            p = block[t, n]
+            cell = np.floor(p / max_range).astype(np.int64)
+            cell -= cell.min(axis=0) - 1
+            dims = cell.max(axis=0) + 2
+            if (b - a) * float(np.prod(dims)) >= 2.0 ** 62:
+                raise ValueError(f"max_range={max_range} 相对活动范围过小，网格编码溢出")
+            key = ((t * dims[0] + cell[:, 0]) * dims[1] + cell[:, 1]) * dims[2] + cell[:, 2]
+            order = np.argsort(key)
+            key, t, n, p = key[order], t[order], n[order], p[order]
+            # 格子内的点连续存放，按格子查邻格即可
+            ukey, first, counts = np.unique(key, return_index=True, return_counts=True)
+            cell_of = np.repeat(np.arange(len(ukey)), counts)
+            cand_i, cand_j = [], []
+            for off in [(0, 0, 0)] + _HALF_OFFSETS:
+                nk = ukey + (off[0] * dims[1] + off[1]) * dims[2] + off[2]
+                pos = np.searchsorted(ukey, nk)
+                pos[pos == len(ukey)] = 0
+                found = ukey[pos] == nk
+                left = np.where(found, first[pos], 0)[cell_of]
+                cnt = np.where(found, counts[pos], 0)[cell_of]
+                total = int(cnt.sum())
+                if not total:
+                    continue
+                i = np.repeat(np.arange(len(key)), cnt)
+                j = np.repeat(left - np.cumsum(cnt) + cnt, cnt) + np.arange(total)
+                if off == (0, 0, 0):
+                    keep = i < j
+                    i, j = i[keep], j[keep]
+                cand_i.append(i)
+                cand_j.append(j)
+            if not cand_i:
+                continue
+            i, j = np.concatenate(cand_i), np.concatenate(cand_j)
+            d = np.linalg.norm(p[i] - p[j], axis=-1)
+            keep = d <= max_range
+            i, j, d = i[keep], j[keep], d[keep]
+            na, nb = np.minimum(n[i], n[j]), np.maximum(n[i], n[j])
+            best = _reduce_min(np.concatenate([best[0], na * m + nb]),
+                               np.concatenate([best[1], t[i] + a]),
+                               np.concatenate([best[2], d]))
+        return best
+
+
+def _reduce_min(pair: np.ndarray, t: np.ndarray, d: np.ndarray):
+    """每个 pair 只保留距离最小的一条"""
+    order = np.lexsort((t, d, pair))
+    pair, t, d = pair[order], t[order], d[order]
+    first = np.ones(len(pair), dtype=bool)
+    first[1:] = pair[1:] != pair[:-1]
+    return pair[first], t[first], d[first]
@@ -0,0 +1,203 @@
+# state.py
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Iterator, Tuple, Any
+
+import numpy as np
+import pandas as pd
+
+from .model import *
+from .columnar import COORD_FIELDS
+from .parser import ACMIParser, _FrameBegin, _ObjectUpdate, _ObjectRemove
+
+
+# ---------- 单个对象的当前完整状态 ----------
+@dataclass
+class ObjectState:
+    object_id: int
+    first_seen: float
+    last_update: float
+    coords: List[Optional[float]] = field(default_factory=lambda: [None] * len(COORD_FIELDS))
+    text_properties: Dict[str, str] = field(default_factory=dict)
+    numeric_properties: Dict[str, float] = field(default_factory=dict)
+
+    def apply(self, time_offset: float, ev: _ObjectUpdate) -> None:
+        """合并一次增量更新，只触碰本行出现的字段"""
+        self.last_update = time_offset
+        if ev.coords is not None:
+            coords = self.coords
+            for i, v in enumerate(ev.coords):
+                if v is not None:
+                    coords[i] = v
+        if ev.props is not None:
+            if ev.props.text_properties:
+                self.text_properties.update(ev.props.text_properties)
+            if ev.props.numeric_properties:
+                self.numeric_properties.update(ev.props.numeric_properties)
+
+    def to_object(self) -> ACMIObject:
+        """拷贝为完整状态的 ACMIObject"""
+        return ACMIObject(
+            object_id=self.object_id,
+            time_offset=self.last_update,
+            object_coordinates=ACMIObjectCoordinates(
+                object_id=self.object_id, **dict(zip(COORD_FIELDS, self.coords))),
+            object_properties=ACMIObjectProperties(
+                text_properties=dict(self.text_properties),
+                numeric_properties=dict(self.numeric_properties)),
+        )
+
+
+# ---------- 单个对象的完整轨迹 ----------
+@dataclass
+class ObjectTrack:
+    """
+    每次更新记录一行前向填充后的坐标；属性只记增量，取用时再展开
+    """
+    object_id: int
+    times: List[float] = field(default_factory=list)
+    coords: List[Tuple[Optional[float], ...]] = field(default_factory=list)
+    removed_at: Optional[float] = None    # 最后一段存活期的移除时间，仍存活为 None
+    _prop_deltas: List[Tuple[int, Dict[str, str], Dict[str, float]]] = field(
+        default_factory=list, repr=False)
+    _ended: List[Tuple[int, float]] = field(default_factory=list, repr=False)  # 已结束的存活期 (结束行号, 移除时间)
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def _append(self, state: ObjectState, ev: _ObjectUpdate) -> None:
+        self.times.append(state.last_update)
+        self.coords.append(tuple(state.coords))
+        if ev.props is not None:
+            self._prop_deltas.append((len(self.times) - 1,
+                                      ev.props.text_properties or {},
+                                      ev.props.numeric_properties or {}))
+
+    def _remove(self, time_offset: float) -> None:
+        self._ended.append((len(self.times), time_offset))
+        self.removed_at = time_offset
+
+    def lifetimes(self) -> List[Tuple[int, int, Optional[float]]]:
+        """各段存活期 (起始行, 结束行, 移除时间)；同一 id 移除后再次出现时为多段，最后一段未移除时为 None"""
+        out, start = [], 0
+        for stop, t in self._ended:
+            out.append((start, stop, t))
+            start = stop
+        if start < len(self.times):
+            out.append((start, len(self.times), None))
+        return out
+
+    def _iter_properties(self) -> Iterator[Tuple[Dict[str, str], Dict[str, float]]]:
+        """逐行产出前向填充后的属性(同一字典对象，调用方按需拷贝)；新的存活期不继承之前的属性"""
+        text: Dict[str, str] = {}
+        numeric: Dict[str, float] = {}
+        deltas = iter(self._prop_deltas)
+        nxt = next(deltas, None)
+        restarts = {stop for stop, _ in self._ended}
+        for i in range(len(self.times)):
+            if i in restarts:
+                text, numeric = {}, {}
+            if nxt is not None and nxt[0] == i:
+                text.update(nxt[1])
+                numeric.update(nxt[2])
+                nxt = next(deltas, None)
+            yield text, numeric
+
+    def to_objects(self) -> List[ACMIObject]:
+        return [
+            ACMIObject(
+                object_id=self.object_id,
+                time_offset=t,
+                object_coordinates=ACMIObjectCoordinates(
+                    object_id=self.object_id, **dict(zip(COORD_FIELDS, c))),
+                object_properties=ACMIObjectProperties(
+                    text_properties=dict(text), numeric_properties=dict(numeric)),
+            )
+            for t, c, (text, numeric) in zip(self.times, self.coords, self._iter_properties())
+        ]
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """时间与坐标列，缺失为 NaN"""
+        arr = np.array(self.coords, dtype=np.float64).reshape(len(self.coords), len(COORD_FIELDS))
+        out = {'time_offset': np.asarray(self.times, dtype=np.float64)}
+        out.update({name: arr[:, i] for i, name in enumerate(COORD_FIELDS)})
+        return out
+
+    def to_df(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.to_arrays())
+        rows = [{**text, **numeric} for text, numeric in self._iter_properties()]
+        if rows:
+            df = pd.concat([df, pd.DataFrame(rows)], axis=1)
+        return df
+
+
+# ---------- 状态引擎 ----------
+class ACMIStateEngine:
+    """
+    逐事件维护所有存活对象的完整状态
+    用法：
+        engine = ACMIStateEngine(record_tracks=True)
+        for ev in ACMIParser('demo.acmi').events():
+            engine.apply(ev)
+    """
+
+    def __init__(self, record_tracks: bool = False):
+        self.time_offset = 0.0
+        self.live: Dict[int, ObjectState] = {}
+        self.tracks: Optional[Dict[int, ObjectTrack]] = {} if record_tracks else None
+
+    def apply(self, ev: Any) -> None:
+        if isinstance(ev, _ObjectUpdate):
+            state = self.live.get(ev.obj_id)
+            if state is None:
+                if not ev.coords and ev.props is None:
+                    return  # 只带事件的行(如 0,Event=...)不产生存活对象
+                state = self.live[ev.obj_id] = ObjectState(ev.obj_id, self.time_offset, self.time_offset)
+            state.apply(self.time_offset, ev)
+            if self.tracks is not None:
+                track = self.tracks.get(ev.obj_id)
+                if track is None:
+                    track = self.tracks[ev.obj_id] = ObjectTrack(ev.obj_id)
+                elif track.removed_at is not None:
+                    track.removed_at = None  # 移除后同一 id 再次出现，开始新的存活期
+                track._append(state, ev)
+
+        elif isinstance(ev, _FrameBegin):
+            self.time_offset = ev.time_offset
+
+        elif isinstance(ev, _ObjectRemove):
+            # 只有存活的对象才结束一段存活期，重复移除不改变已记录的移除时间
+            if self.live.pop(ev.obj_id, None) is not None and self.tracks is not None \
+                    and ev.obj_id in self.tracks:
+                self.tracks[ev.obj_id]._remove(ev.time_offset)
+
+    def state(self, object_id: int) -> Optional[ObjectState]:
+        return self.live.get(object_id)
+
+    def snapshot(self) -> ACMIFrame:
+        """当前时刻全部存活对象的完整状态"""
+        return ACMIFrame(timestamp=self.time_offset,
+                         objects=[s.to_object() for s in self.live.values()])
+
+
+# ---------- 便捷函数 ----------
+def iter_snapshots(file_path: str, encoding: str = 'utf-8-sig') -> Iterator[ACMIFrame]:
+    """每一帧结束时产出一次完整快照"""
+    engine = ACMIStateEngine()
+    in_frame = False
+    for ev in ACMIParser(file=file_path, encoding=encoding).events():
+        if isinstance(ev, _FrameBegin):
+            if in_frame:
+                yield engine.snapshot()
+            in_frame = True
+        engine.apply(ev)
+    if in_frame:
+        yield engine.snapshot()
+
+
+def reconstruct_tracks(file_path: str, encoding: str = 'utf-8-sig') -> Dict[int, ObjectTrack]:
+    """解析整个文件，返回 object_id -> 完整轨迹"""
+    engine = ACMIStateEngine(record_tracks=True)
+    for ev in ACMIParser(file=file_path, encoding=encoding).events():
+        engine.apply(ev)
+    return engine.tracks
@@ -0,0 +1,222 @@
+# summary.py
+"""
+文件概要：排序后的 id、每个 id 的首末出现时间/更新次数/Type/Name、出现过的列、帧数与时间跨度
+ACMILoader.load 时随事件增量维护，不额外扫描；之后的查询都是 O(1)
+用法：
+    acmi = load_acmi('big.zip.acmi')
+    s = acmi.summary
+    s.ids, s.frames, s.start, s.end
+    s[0x102].type, s[0x102].first_time
+    s.to_df()            # 每个 id 一行，适合在界面上直接列出内容
+列式存储与惰性加载的文件由各自的数组一次性向量化生成，手工构建的 ACMIFile 回退为遍历全部帧
+"""
+from __future__ import annotations
+from array import array
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterable, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .model import *
+
+_COORD_COLUMNS = [f'object_coordinates.{f}' for f in ACMIObjectCoordinates.__dataclass_fields__]
+_PROPS_COLUMNS = [f'object_properties.{f}' for f in ACMIObjectProperties.__dataclass_fields__]
+_EVENT_COLUMNS = [f'object_events.{f}' for f in ACMIEvent.__dataclass_fields__]
+
+
+@dataclass(slots=True)
+class IdSummary:
+    object_id: int
+    first_time: float
+    last_time: float
+    updates: int
+    type: Optional[str] = None   # 最后一次出现的 Type
+    name: Optional[str] = None   # 最后一次出现的 Name
+
+    @property
+    def duration(self) -> float:
+        return self.last_time - self.first_time
+
+
+class ACMISummary:
+    """
+    增量维护的文件概要
+    每个 id 的统计存为 [首次时间, 末次时间, 更新次数]，按 id 排序的列表在首次访问时生成并缓存，出现新 id 时失效
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.start: Optional[float] = None      # 首帧时间
+        self.end: Optional[float] = None        # 末帧时间
+        self.updates = 0
+        self.types: Dict[int, str] = {}
+        self.names: Dict[int, str] = {}
+        self.has_coordinates = False
+        self.has_properties = False
+        self.has_events = False
+        self._stats: Dict[int, list] = {}
+        self._frame_offsets = array('q')   # 第 i 帧开始时已有的对象数
+        self._ids: Optional[List[int]] = None
+
+    # ---------- 增量维护 ----------
+    def add_frame(self, timestamp: float) -> None:
+        if self.start is None:
+            self.start = timestamp
+        self.end = timestamp
+        self.frames += 1
+        self._frame_offsets.append(self.updates)
+
+    def add_update(self, timestamp: float, object_id: int, has_coords: bool,
+                   props: Optional[ACMIObjectProperties], has_event: bool) -> None:
+        """记录当前帧中的一条对象更新；props 传原始属性对象(未写入紧凑属性表之前)"""
+        self.updates += 1
+        s = self._stats.get(object_id)
+        if s is None:
+            self._stats[object_id] = [timestamp, timestamp, 1]
+            self._ids = None
+        else:
+            s[1] = timestamp
+            s[2] += 1
+        if has_coords and not self.has_coordinates:
+            self.has_coordinates = True
+        if has_event and not self.has_events:
+            self.has_events = True
+        if props is not None:
+            if not self.has_properties:
+                self.has_properties = True
+            text = props.text_properties
+            if text:
+                t = text.get('Type')
+                if t:
+                    self.types[object_id] = t
+                n = text.get('Name')
+                if n:
+                    self.names[object_id] = n
+
+    # ---------- 一次性构建 ----------
+    @classmethod
+    def from_frames(cls, frames: Iterable[ACMIFrame]) -> 'ACMISummary':
+        """遍历全部帧(用于不是由 ACMILoader 生成的 ACMIFile)"""
+        s = cls()
+        for frame in frames:
+            s.add_frame(frame.timestamp)
+            for o in frame.objects:
+                s.add_update(o.time_offset, o.object_id, o.object_coordinates is not None,
+                             o.object_properties, o.object_events is not None)
+        return s
+
+    @classmethod
+    def from_arrays(cls, frame_times: np.ndarray, frame_starts: np.ndarray,
+                    row_frame: np.ndarray, row_id: np.ndarray, *,
+                    types: Dict[int, str], names: Dict[int, str],
+                    has_coordinates: bool, has_properties: bool, has_events: bool) -> 'ACMISummary':
+        """由行数组(每条更新的帧号、id)向量化构建，行按文件顺序排列"""
+        s = cls()
+        n_frames, n_rows = len(frame_times), len(row_id)
+        s.frames, s.updates = n_frames, n_rows
+        if n_frames:
+            s.start, s.end = float(frame_times[0]), float(frame_times[-1])
+        s._frame_offsets = array('q', np.asarray(frame_starts, dtype=np.int64).tobytes())
+        if n_rows:
+            order = np.argsort(row_id, kind='stable')
+            ids, first, counts = np.unique(row_id[order], return_index=True, return_counts=True)
+            times = np.asarray(frame_times, dtype=np.float64)[row_frame[order]]
+            s._stats = {oid: [t0, t1, c] for oid, t0, t1, c in zip(
+                ids.tolist(), times[first].tolist(), times[first + counts - 1].tolist(), counts.tolist())}
+            s._ids = ids.tolist()
+        s.types, s.names = types, names
+        s.has_coordinates, s.has_properties, s.has_events = has_coordinates, has_properties, has_events
+        return s
+
+    @classmethod
+    def from_store(cls, store) -> 'ACMISummary':
+        """由 ColumnarFrameStore 的数组构建，Type/Name 取自文本属性稀疏表"""
+        row_id = store.row_object_id.values
+        types: Dict[int, str] = {}
+        names: Dict[int, str] = {}
+        codes = store._string_codes
+        for key, out in (('Type', types), ('Name', names)):
+            code = codes.get(key)
+            if code is None:
+                continue
+            hit = np.flatnonzero(store.text_key.values == code)
+            strings = store.strings
+            for oid, v in zip(row_id[store.text_row.values[hit]].tolist(),
+                              store.text_value.values[hit].tolist()):
+                if strings[v]:
+                    out[oid] = strings[v]
+        return cls.from_arrays(store.frame_times.values, store.frame_starts.values,
+                               store.row_frame.values, row_id, types=types, names=names,
+                               has_coordinates=bool(store.row_has_coords.values.any()),
+                               has_properties=bool(len(store.num_row) or len(store.text_row)),
+                               has_events=bool(len(store.event_row)))
+
+    # ---------- 查询 ----------
+    @property
+    def ids(self) -> List[int]:
+        """出现过的全部 object_id(升序)，缓存的列表，调用方不要修改"""
+        if self._ids is None:
+            self._ids = sorted(self._stats)
+        return self._ids
+
+    @property
+    def columns(self) -> List[str]:
+        """出现过的全部扁平列名(按字母序)，与 ACMIFile._auto_columns 对全部对象的结果一致"""
+        if not self.updates:
+            return []
+        cols = ['object_id', 'time_offset']
+        if self.has_coordinates:
+            cols += _COORD_COLUMNS
+        if self.has_properties:
+            cols += _PROPS_COLUMNS
+        if self.has_events:
+            cols += _EVENT_COLUMNS
+        return sorted(cols)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return None if self.start is None else self.end - self.start
+
+    @property
+    def frame_offsets(self) -> np.ndarray:
+        """长度为帧数 + 1，第 i 帧的对象在全部对象中的下标为 [offsets[i], offsets[i + 1])"""
+        return np.append(np.frombuffer(self._frame_offsets, dtype=np.int64), self.updates)
+
+    def get(self, object_id: int) -> Optional[IdSummary]:
+        s = self._stats.get(object_id)
+        if s is None:
+            return None
+        return IdSummary(object_id, s[0], s[1], s[2], self.types.get(object_id), self.names.get(object_id))
+
+    def __getitem__(self, object_id: int) -> IdSummary:
+        found = self.get(object_id)
+        if found is None:
+            raise KeyError(object_id)
+        return found
+
+    def __contains__(self, object_id: int) -> bool:
+        return object_id in self._stats
+
+    def __len__(self) -> int:
+        return len(self._stats)
+
+    def __iter__(self) -> Iterator[IdSummary]:
+        return (self.get(oid) for oid in self.ids)
+
+    def count(self, object_id: int) -> int:
+        s = self._stats.get(object_id)
+        return 0 if s is None else s[2]
+
+    def to_df(self) -> pd.DataFrame:
+        """每个 id 一行：object_id / type / name / first_time / last_time / updates"""
+        ids = self.ids
+        stats = self._stats
+        return pd.DataFrame({
+            'object_id': np.asarray(ids, dtype=np.uint64),
+            'type': [self.types.get(i) for i in ids],
+            'name': [self.names.get(i) for i in ids],
+            'first_time': np.asarray([stats[i][0] for i in ids], dtype=np.float64),
+            'last_time': np.asarray([stats[i][1] for i in ids], dtype=np.float64),
+            'updates': np.asarray([stats[i][2] for i in ids], dtype=np.int64),
+        })
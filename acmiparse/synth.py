@@ -0,0 +1,193 @@
+# synth.py
+"""
+确定性的合成 .acmi 录像生成器，用于基准测试与回归对比
+同一 SynthConfig(含 seed) 总是生成逐字节相同的文件
+用法：
+    from acmiparse.synth import SynthConfig, write_synthetic
+    write_synthetic('bench.zip.acmi', SynthConfig(objects=200, rate=10, duration=600))
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field, asdict
+from typing import List, Dict, Optional, Iterator, TextIO
+from zipfile import ZipFile, ZIP_DEFLATED
+import io
+import math
+import random
+
+from .writer import zip_member_name
+
+_TYPES = ['Air+FixedWing', 'Air+Rotorcraft', 'Ground+Vehicle', 'Sea+Watercraft', 'Ground+Static+Building']
+_COALITIONS = [('Allies', 'Blue'), ('Enemies', 'Red'), ('Neutrals', 'Grey')]
+_NAMES = ['F-16C', 'Su-27', 'MiG-29', 'F/A-18C', 'AH-64D', 'T-72', 'M1A2', 'Ticonderoga']
+_MESSAGES = ['Fox 2', 'Splash one', 'Bingo fuel', 'RTB', 'Tally ho']
+
+
+@dataclass
+class SynthConfig:
+    objects: int = 50                 # 同时存活的对象数
+    rate: float = 10.0                # 帧率(Hz)
+    duration: float = 600.0           # 录像时长(秒)
+    update_probability: float = 1.0   # 每帧每个对象输出一行更新的概率
+    # T= 形式(3/5/6/9 段)的权重，对象出生时按权重选定并保持
+    coord_forms: Dict[int, float] = field(default_factory=lambda: {3: 0.2, 5: 0.1, 6: 0.3, 9: 0.4})
+    unchanged_fields: float = 0.2     # 每个坐标分量留空(表示未变)的概率
+    property_churn: float = 0.05      # 每行附带数值属性变化的概率，其中 1/10 同时修改文本属性
+    event_rate: float = 0.02          # 每帧产生一条事件的概率
+    removal_rate: float = 0.0005      # 每帧每个对象被移除(并由新对象补位)的概率
+    escaped_commas: float = 0.05      # 文本属性中带转义逗号的概率
+    reference_longitude: float = -129.0
+    reference_latitude: float = 43.0
+    seed: int = 0
+
+
+@dataclass
+class _Obj:
+    oid: int
+    form: int
+    lon: float
+    lat: float
+    alt: float
+    heading: float
+    speed: float       # 度/秒
+    climb: float       # 米/秒
+
+
+class _Generator:
+    def __init__(self, cfg: SynthConfig):
+        self.cfg = cfg
+        self.rng = random.Random(cfg.seed)
+        self.next_id = 1
+        forms = sorted(cfg.coord_forms)
+        self._forms = forms
+        self._form_weights = [cfg.coord_forms[f] for f in forms]
+
+    def _text(self, s: str) -> str:
+        if self.rng.random() < self.cfg.escaped_commas:
+            return s + '\\, ' + self.rng.choice(_MESSAGES)
+        return s
+
+    def _spawn(self) -> _Obj:
+        rng = self.rng
+        obj = _Obj(self.next_id, rng.choices(self._forms, self._form_weights)[0],
+                   rng.uniform(-1, 1), rng.uniform(-1, 1), rng.uniform(0, 9000),
+                   rng.uniform(0, 360), rng.uniform(1e-4, 3e-3), rng.uniform(-5, 5))
+        self.next_id += 1
+        return obj
+
+    def _spawn_line(self, o: _Obj) -> str:
+        rng = self.rng
+        coalition, color = rng.choice(_COALITIONS)
+        name = self._text(rng.choice(_NAMES))
+        return (f"{o.oid:x},T={self._coords(o, full=True)},Type={rng.choice(_TYPES)},"
+                f"Name={name},Pilot=Pilot{o.oid},Coalition={coalition},Color={color}")
+
+    def _coords(self, o: _Obj, full: bool = False) -> str:
+        lon, lat, alt = f"{o.lon:.7f}", f"{o.lat:.7f}", f"{o.alt:.1f}"
+        if o.form == 3:
+            vals = [lon, lat, alt]
+        elif o.form == 5:
+            vals = [lon, lat, alt, f"{o.lon * 1e5:.1f}", f"{o.lat * 1e5:.1f}"]
+        else:
+            roll = f"{math.sin(o.heading) * 30:.1f}"
+            pitch = f"{o.climb:.1f}"
+            yaw = f"{o.heading:.1f}"
+            vals = [lon, lat, alt, roll, pitch, yaw]
+            if o.form == 9:
+                vals += [f"{o.lon * 1e5:.1f}", f"{o.lat * 1e5:.1f}", f"{o.heading:.1f}"]
+        if not full:
+            p = self.cfg.unchanged_fields
+            vals = ['' if self.rng.random() < p else v for v in vals]
+        return '|'.join(vals)
+
+    def _move(self, o: _Obj, dt: float) -> None:
+        rng = self.rng
+        o.heading = (o.heading + rng.uniform(-3, 3)) % 360
+        rad = math.radians(o.heading)
+        o.lon += math.sin(rad) * o.speed * dt
+        o.lat += math.cos(rad) * o.speed * dt
+        o.alt = max(0.0, o.alt + o.climb * dt)
+
+    def _churn(self) -> str:
+        rng = self.rng
+        out = f",IAS={rng.uniform(80, 350):.1f},Throttle={rng.random():.2f}"
+        if rng.random() < 0.1:
+            out += f",Color={rng.choice(_COALITIONS)[1]},Label={self._text('Lead')}"
+        return out
+
+    def lines(self) -> Iterator[str]:
+        cfg, rng = self.cfg, self.rng
+        yield 'FileType=text/acmi/tacview'
+        yield 'FileVersion=2.2'
+        yield '0,ReferenceTime=2011-06-02T05:00:00Z'
+        yield f'0,ReferenceLongitude={cfg.reference_longitude:g}'
+        yield f'0,ReferenceLatitude={cfg.reference_latitude:g}'
+        yield '0,DataSource=acmiparse.synth'
+        yield f'0,Title={self._text("Synthetic recording")}'
+
+        live: List[_Obj] = [self._spawn() for _ in range(cfg.objects)]
+        dt = 1.0 / cfg.rate
+        n_frames = int(round(cfg.duration * cfg.rate)) + 1
+        for i in range(n_frames):
+            yield f'#{i * dt:.2f}'
+            if i == 0:
+                for o in live:
+                    yield self._spawn_line(o)
+                continue
+            for k, o in enumerate(live):
+                self._move(o, dt)
+                if rng.random() < cfg.removal_rate:
+                    yield f'-{o.oid:x}'
+                    yield f'0,Event=Destroyed|{o.oid:x}|'
+                    live[k] = self._spawn()
+                    yield self._spawn_line(live[k])
+                    continue
+                if rng.random() >= cfg.update_probability:
+                    continue
+                line = f"{o.oid:x},T={self._coords(o)}"
+                if rng.random() < cfg.property_churn:
+                    line += self._churn()
+                yield line
+            if rng.random() < cfg.event_rate:
+                a, b = rng.sample(live, 2) if len(live) > 1 else (live[0], live[0])
+                yield f'0,Event=Message|{a.oid:x}|{b.oid:x}|{self._text(rng.choice(_MESSAGES))}'
+
+
+# ---------- 入口 ----------
+def iter_synthetic_lines(cfg: Optional[SynthConfig] = None) -> Iterator[str]:
+    """逐行产出合成录像(不含换行符)"""
+    return _Generator(cfg or SynthConfig()).lines()
+
+
+def _write_lines(f: TextIO, cfg: SynthConfig) -> None:
+    buf = []
+    for line in iter_synthetic_lines(cfg):
+        buf.append(line)
+        if len(buf) >= 4096:
+            f.write('\n'.join(buf) + '\n')
+            buf.clear()
+    if buf:
+        f.write('\n'.join(buf) + '\n')
+
+
+def write_synthetic(path: str, cfg: Optional[SynthConfig] = None, zip_output: Optional[bool] = None) -> str:
+    """
+    写出合成录像；zip_output 默认按文件名判断(.zip.acmi 为压缩包)
+    """
+    cfg = cfg or SynthConfig()
+    if zip_output is None:
+        zip_output = path.lower().endswith('.zip.acmi')
+    if not zip_output:
+        with open(path, 'w', encoding='utf-8', newline='\n') as f:
+            _write_lines(f, cfg)
+        return path
+    with ZipFile(path, 'w', compression=ZIP_DEFLATED) as z:
+        with z.open(zip_member_name(path), 'w') as raw:
+            with io.TextIOWrapper(raw, encoding='utf-8', newline='\n') as f:
+                _write_lines(f, cfg)
+    return path
+
+
+def config_dict(cfg: SynthConfig) -> dict:
+    d = asdict(cfg)
+    d['coord_forms'] = {str(k): v for k, v in cfg.coord_forms.items()}
+    return d
@@ -1,10 +1,26 @@
 import re
+from typing import List, Optional
 
 FLOAT_PATTERN = re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$')
 def to_float(s: str, default: float = None) -> float:
-    s = s.strip()
-    if not s:
-        return default
-    if FLOAT_PATTERN.match(s):
-        return float(s)
-    return default
\ No newline at end of file
+    # 先直接 float()，只有 float() 接受而 FLOAT_PATTERN 不接受的写法(nan/inf/1_000)才回到正则判定
+    try:
+        v = float(s)
+    except ValueError:
+        return default  # 含空串
+    if v - v == 0 and '_' not in s:
+        return v
+    return v if FLOAT_PATTERN.match(s.strip()) else default
+
+
+def to_floats(text: str, parts: List[str]) -> List[Optional[float]]:
+    """
+    批量转换 T= 的各段(parts = text.split('|'))，结果与逐段 to_float 相同：空段为 None(未变化)，非法值为 None
+    整串不含 '_'/'n'/'N' 时(排除 nan/inf/下划线写法)一次列表推导完成，出错再逐段回退
+    """
+    if '_' in text or 'n' in text or 'N' in text:
+        return [to_float(p) for p in parts]
+    try:
+        return [float(p) if p else None for p in parts]
+    except ValueError:
+        return [to_float(p) for p in parts]
@@ -0,0 +1,457 @@
+# writer.py
+"""
+ACMI 写出：把 ACMIFile、逐帧数据或解析事件流序列化为 .acmi / .zip.acmi
+默认增量编码：每个对象只写出相对上次写出有变化的字段(未变的坐标分量留空)，新出现的对象写完整状态
+输出按批写入，不在内存中累积整个文件
+用法：
+    with ACMIWriter('flight.zip.acmi', rate=2) as w:
+        w.write_file(load_acmi('full.acmi', ids=[0x102]))
+    export_acmi('full.zip.acmi', 'window.acmi', start=600, end=900)
+往返：
+    delta=False 时逐个对象原样写出，load → write_file → load 得到相等的 ACMIFile
+    增量模式下重新解析后每帧重建的对象状态相等(见 state.iter_snapshots)
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from typing import List, Dict, Optional, Iterable, Any, Callable, Tuple, TextIO, Union
+from zipfile import ZipFile, ZIP_DEFLATED
+import io
+import math
+import os
+import re
+
+from .model import *
+from .acmi_file import ACMIFile
+from .parser import ACMIParser, _HeaderParsed, _GlobalProp, _FrameBegin, _ObjectUpdate, _ObjectRemove
+
+_RE_COMMA = re.compile(r'(?<!\\),')   # 未转义的逗号
+_EPS = 1e-6
+
+
+# ---------- 格式化 ----------
+def _fmt(x: float) -> str:
+    """可无损还原的最短写法，整数值不带小数点"""
+    if x.is_integer() and -1e15 < x < 1e15:
+        return str(int(x))
+    if x - x != 0:  # inf / nan
+        return '' if x != x else ('1e999' if x > 0 else '-1e999')
+    return repr(x)
+
+
+def _fixed(x: float, precision: int) -> str:
+    if x - x != 0:
+        return _fmt(x)
+    s = f'{x:.{precision}f}'
+    if '.' in s:
+        s = s.rstrip('0').rstrip('.')
+    return '0' if s == '-0' else s
+
+
+def _escape(s: str) -> str:
+    """逗号转义为 '\\,'(已转义的保持不变)，换行写成行尾 '\\' 续行"""
+    if ',' in s:
+        s = _RE_COMMA.sub(r'\\,', s)
+    if '\n' in s:
+        s = s.replace('\n', '\\\n')
+    return s
+
+
+def zip_member_name(path: str) -> str:
+    """压缩包内的成员名为去掉 .zip 后的文件名，与 Tacview 一致"""
+    member = os.path.basename(path)
+    if member.lower().endswith('.zip.acmi'):
+        return member[:-len('.zip.acmi')] + '.acmi'
+    return member + '.acmi'
+
+
+def _coord_form(coords: List[Any]) -> int:
+    """按已知字段选择 T= 段数：3(经纬高) / 5(+U,V) / 6(+姿态) / 9(全部)"""
+    rpy = coords[3] is not None or coords[4] is not None or coords[5] is not None
+    uv = coords[6] is not None or coords[7] is not None
+    if coords[8] is not None or (rpy and uv):
+        return 9
+    return 6 if rpy else 5 if uv else 3
+
+
+_FORM_FIELDS = {3: (0, 1, 2), 5: (0, 1, 2, 6, 7), 6: (0, 1, 2, 3, 4, 5), 9: tuple(range(9))}
+
+
+# ---------- 单个对象已知/已写出的状态 ----------
+@dataclass(slots=True)
+class _State:
+    coords: List[Optional[str]] = field(default_factory=lambda: [None] * 9)   # 已格式化
+    text: Dict[str, str] = field(default_factory=dict)
+    numeric: Dict[str, str] = field(default_factory=dict)                     # 已格式化
+
+
+# ---------- 写出器 ----------
+class ACMIWriter:
+    """
+    target: 输出路径(.zip.acmi 或 zip_output=True 时写成压缩包)或已打开的文本流
+    delta: 增量编码；False 时每个输入对象原样写成一行(不做状态跟踪，rate/start 不可用)
+    precision: 坐标保留的小数位数，None 为无损
+    rate: 抽稀到最高 rate Hz；被跳过帧的变化合并到下一个写出的帧
+    start/end: 只写出该时间窗内的帧；start 之前的变化合并进第一个写出的帧
+    snapshots: write_frame 收到的是完整快照(如 iter_frames(reconstruct=True))，帧中缺席的对象视为已移除
+    """
+
+    def __init__(self, target: Union[str, TextIO], zip_output: Optional[bool] = None, encoding: str = 'utf-8', *,
+                 delta: bool = True, precision: Optional[int] = None, rate: Optional[float] = None,
+                 start: Optional[float] = None, end: Optional[float] = None,
+                 snapshots: bool = False, buffer_lines: int = 4096):
+        if not delta and (rate is not None or start is not None or snapshots):
+            raise ValueError("rate/start/snapshots 需要增量模式(delta=True)")
+        self.delta = delta
+        self.rate = rate
+        self.start = start
+        self.end = end
+        self.snapshots = snapshots
+        self._fmt_coord: Callable[[float], str] = _fmt if precision is None else (lambda x: _fixed(x, precision))
+        self._buffer_lines = buffer_lines
+        self._buf: List[str] = []
+        self._zip: Optional[ZipFile] = None
+        self._f, self._own = self._open(target, zip_output, encoding)
+
+        self.header = ACMIHeader()
+        self.global_text: Dict[str, str] = {}
+        self.global_numeric: Dict[str, str] = {}
+        self._header_written = False
+
+        self._latest: Dict[int, _State] = {}     # 已收到的最新完整状态
+        self._written: Dict[int, _State] = {}    # 已写出的状态(增量的基准)
+        self._dirty: Dict[int, None] = {}        # 有待写出变化的对象，保持首次变化的顺序
+        self._removed: Dict[int, None] = {}      # 待写出的移除
+        self._events: List[Tuple[int, ACMIEvent]] = []
+        self._time: Optional[float] = None       # 当前帧时间
+        self._next_emit: Optional[float] = None
+        self._origin: Optional[float] = None
+        self._held = False                       # 当前帧被抽稀/时间窗跳过，变化尚未写出
+        self.frames_written = 0
+        self.lines_written = 0
+
+    def _open(self, target, zip_output, encoding) -> Tuple[TextIO, bool]:
+        if not isinstance(target, str):
+            return target, False
+        if zip_output is None:
+            zip_output = target.lower().endswith('.zip.acmi')
+        if not zip_output:
+            return open(target, 'w', encoding=encoding, newline='\n'), True
+        self._zip = ZipFile(target, 'w', compression=ZIP_DEFLATED)
+        raw = self._zip.open(zip_member_name(target), 'w')
+        return io.TextIOWrapper(raw, encoding=encoding, newline='\n'), True
+
+    # ---------- 上下文 ----------
+    def __enter__(self) -> 'ACMIWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._f is None:
+            return
+        try:
+            if self.delta and self._time is not None:
+                self._end_frame()
+                if self._held:
+                    self._emit(self._time)  # 末尾被抽稀掉的变化补写到最后一帧
+            self._write_header()
+            self._flush()
+        finally:
+            if self._own:
+                self._f.close()
+            if self._zip is not None:
+                self._zip.close()
+            self._f = None
+
+    # ---------- 对外 API ----------
+    def write_header(self, header: Optional[ACMIHeader] = None,
+                     global_properties: Optional[ACMIGlobalProperties] = None) -> None:
+        """设置文件头与全局属性，在第一帧之前写出"""
+        if self._header_written:
+            raise RuntimeError("文件头已经写出")
+        if header is not None:
+            self.header = header
+        if global_properties is not None:
+            self.global_text.update(global_properties.text_properties or {})
+            self.global_numeric.update({k: _fmt(float(v)) for k, v in
+                                        (global_properties.numeric_properties or {}).items()})
+
+    def write_file(self, acmi: ACMIFile) -> None:
+        """写出整个文件，移除记录按其在更新序列中的位置插回原来的帧"""
+        self.write_header(acmi.header, acmi.global_properties)
+        removals = sorted(acmi._removals(), key=lambda r: r[0])
+        frames = acmi.frames
+        n, k, pos = len(removals), 0, 0
+        # 第一帧之前的移除(时间与第一帧不同)
+        first = frames[0].timestamp if len(frames) else None
+        while k < n and removals[k][0] == 0 and removals[k][1] != first:
+            self._write_header()
+            self.remove(removals[k][2])
+            k += 1
+        for i, frame in enumerate(frames):
+            end = pos + len(frame.objects)
+            nxt = frames[i + 1].timestamp if i + 1 < len(frames) else None
+            here = []
+            # 恰在帧尾的移除若时间与本帧不同则属于下一帧开头
+            while k < n and (removals[k][0] < end or removals[k][0] == end and
+                             (nxt is None or removals[k][1] == frame.timestamp)):
+                here.append((removals[k][0] - pos, removals[k][2]))
+                k += 1
+            self._write_frame(frame, here)
+            pos = end
+
+    def write_frames(self, frames: Iterable[ACMIFrame]) -> None:
+        for frame in frames:
+            self.write_frame(frame)
+
+    def write_frame(self, frame: ACMIFrame, removed: Iterable[int] = ()) -> None:
+        """写入一帧；removed 为该帧结束时移除的对象"""
+        n = len(frame.objects)
+        self._write_frame(frame, [(n, oid) for oid in removed])
+
+    def remove(self, object_id: int) -> None:
+        """在当前帧移除对象"""
+        if self.delta:
+            self._remove(object_id)
+        else:
+            self._write_header()
+            self._buf.append(f'-{object_id:x}')
+
+    def write_events(self, events: Iterable[Any]) -> None:
+        """直接消费 ACMIParser.events() 的事件流(保留移除行，适合流式转换)"""
+        for ev in events:
+            cls = ev.__class__
+            if cls is _ObjectUpdate:
+                props = ev.props
+                if self.delta:
+                    self._merge(ev.obj_id, ev.coords,
+                                props.text_properties if props is not None else None,
+                                props.numeric_properties if props is not None else None)
+                    if ev.event is not None:
+                        self._events.append((ev.obj_id, ev.event))
+                else:
+                    self._write_header()
+                    line = self._line(ev.obj_id, ev.coords, props, ev.event)
+                    if line:
+                        self._buf.append(line)
+                        self._maybe_flush()
+            elif cls is _FrameBegin:
+                if self.end is not None and ev.time_offset > self.end + _EPS:
+                    break
+                self._begin_frame(ev.time_offset)
+            elif cls is _ObjectRemove:
+                self.remove(ev.obj_id)
+            elif cls is _GlobalProp:
+                if ev.key in ACMIPropertyRegistry.GLOBAL_PROPERTIES_ALLOWED_NUMERIC_KEYS:
+                    self.global_numeric[ev.key] = _fmt(float(ev.value))
+                else:
+                    self.global_text[ev.key] = ev.value
+            elif cls is _HeaderParsed:
+                self.header = ev.header
+
+    # ---------- 帧调度 ----------
+    def _write_frame(self, frame: ACMIFrame, removals: List[Tuple[int, int]]) -> None:
+        """removals 为 (帧内位置, id)，位置即该移除之前本帧已写的对象数，按位置升序"""
+        self._begin_frame(frame.timestamp)
+        k, n = 0, len(removals)
+        delta, buf = self.delta, self._buf
+        for j, obj in enumerate(frame.objects):
+            while k < n and removals[k][0] <= j:
+                self.remove(removals[k][1])
+                k += 1
+            if delta:
+                props = obj.object_properties
+                self._merge(obj.object_id, coordinate_values(obj),
+                            props.text_properties if props is not None else None,
+                            props.numeric_properties if props is not None else None)
+                if obj.object_events is not None:
+                    self._events.append((obj.object_id, obj.object_events))
+            else:
+                line = self._object_line(obj)
+                if line:
+                    buf.append(line)
+        for _, oid in removals[k:]:
+            self.remove(oid)
+        if not delta:
+            self._maybe_flush()
+        elif self.snapshots:
+            present = {obj.object_id for obj in frame.objects}
+            for oid in [oid for oid in self._latest if oid not in present]:
+                self._remove(oid)
+
+    def _begin_frame(self, t: float) -> None:
+        if self._time is not None and self.delta:
+            self._end_frame()
+        self._write_header()
+        self._time = t
+        if not self.delta:
+            self._buf.append(f'#{_fmt(t)}')
+            self.frames_written += 1
+
+    def _end_frame(self) -> None:
+        t = self._time
+        if self.end is not None and t > self.end + _EPS:
+            self._held = False
+            return
+        due = (self.start is None or t >= self.start - _EPS) and \
+              (self._next_emit is None or t >= self._next_emit - _EPS)
+        if not due:
+            self._held = True
+            return
+        self._emit(t)
+        if self.rate:
+            # 以第一个写出的帧为原点按 1/rate 对齐，避免帧间隔不整除时逐步漂移
+            if self._origin is None:
+                self._origin = t
+            step = 1.0 / self.rate
+            self._next_emit = self._origin + (math.floor((t - self._origin) / step + _EPS) + 1) * step
+
+    def _emit(self, t: float) -> None:
+        buf = self._buf
+        buf.append(f'#{_fmt(t)}')
+        for oid in self._removed:   # 先移除：同一窗口内被移除后又出现的 id 写成新对象
+            buf.append(f'-{oid:x}')
+        for oid in self._dirty:
+            line = self._delta_line(oid)
+            if line:
+                buf.append(line)
+        for oid, event in self._events:
+            buf.append(f'{oid:x},Event={self._event_text(event)}')
+        self._removed.clear()
+        self._dirty.clear()
+        self._events.clear()
+        self._held = False
+        self.frames_written += 1
+        self._maybe_flush()
+
+    # ---------- 增量状态 ----------
+    def _merge(self, oid: int, coords, text: Optional[Dict[str, str]], numeric: Optional[Dict[str, float]]) -> None:
+        if coords is None and not text and not numeric:
+            return
+        st = self._latest.get(oid)
+        if st is None:
+            st = self._latest[oid] = _State()
+        if coords is not None:
+            fmt = self._fmt_coord
+            cur = st.coords
+            for i, v in enumerate(coords):
+                if v is not None:
+                    cur[i] = fmt(v)
+        if text:
+            st.text.update(text)
+        if numeric:
+            st.numeric.update({k: _fmt(v) for k, v in numeric.items()})
+        self._dirty[oid] = None
+
+    def _remove(self, oid: int) -> None:
+        self._latest.pop(oid, None)
+        self._dirty.pop(oid, None)
+        if self._written.pop(oid, None) is not None:
+            self._removed[oid] = None
+
+    def _delta_line(self, oid: int) -> Optional[str]:
+        """与已写出状态比较生成增量行，同时把已写出状态更新为当前状态"""
+        cur = self._latest[oid]
+        old = self._written.get(oid)
+        if old is None:
+            old = self._written[oid] = _State()
+        fields = []
+        cc, oc = cur.coords, old.coords
+        vals = []
+        changed = False
+        for i in _FORM_FIELDS[_coord_form(cc)]:
+            v = cc[i]
+            if v is not None and v != oc[i]:
+                oc[i] = v
+                vals.append(v)
+                changed = True
+            else:
+                vals.append('')
+        if changed:
+            fields.append('T=' + '|'.join(vals))
+        if cur.text:
+            text = old.text
+            for k, v in cur.text.items():
+                if text.get(k) != v:
+                    text[k] = v
+                    fields.append(f'{k}={_escape(v)}')
+        if cur.numeric:
+            numeric = old.numeric
+            for k, v in cur.numeric.items():
+                if numeric.get(k) != v:
+                    numeric[k] = v
+                    fields.append(f'{k}={v}')
+        if not fields:
+            return None
+        return f'{oid:x},' + ','.join(fields)
+
+    # ---------- 原样写出 ----------
+    def _object_line(self, obj: ACMIObject) -> Optional[str]:
+        return self._line(obj.object_id, coordinate_values(obj), obj.object_properties, obj.object_events)
+
+    def _line(self, oid: int, coords, props: Optional[ACMIObjectProperties],
+              event: Optional[ACMIEvent]) -> Optional[str]:
+        fields = []
+        if coords is not None:
+            fmt = self._fmt_coord
+            vals = ['' if coords[i] is None else fmt(coords[i]) for i in _FORM_FIELDS[_coord_form(coords)]]
+            fields.append('T=' + '|'.join(vals))
+        if props is not None:
+            if props.text_properties:
+                fields.extend(f'{k}={_escape(v)}' for k, v in props.text_properties.items())
+            if props.numeric_properties:
+                fields.extend(f'{k}={_fmt(v)}' for k, v in props.numeric_properties.items())
+        if event is not None:
+            fields.append('Event=' + self._event_text(event))
+        if not fields:
+            return None
+        return f'{oid:x},' + ','.join(fields)
+
+    @staticmethod
+    def _event_text(event: ACMIEvent) -> str:
+        return '|'.join([event.event_type] + [f'{i:x}' for i in event.object_ids] + [_escape(event.event_text or '')])
+
+    # ---------- 输出 ----------
+    def _write_header(self) -> None:
+        if self._header_written:
+            return
+        self._header_written = True
+        buf = self._buf
+        buf.append(f'FileType={self.header.file_type}')
+        buf.append(f'FileVersion={self.header.file_version}')
+        buf.extend(f'0,{k}={_escape(v)}' for k, v in self.global_text.items())
+        buf.extend(f'0,{k}={v}' for k, v in self.global_numeric.items())
+
+    def _maybe_flush(self) -> None:
+        if len(self._buf) >= self._buffer_lines:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self._buf:
+            self._f.write('\n'.join(self._buf) + '\n')
+            self.lines_written += len(self._buf)
+            self._buf.clear()
+
+
+# ---------- 便捷函数 ----------
+def write_acmi(acmi: ACMIFile, path: str, **kwargs) -> str:
+    """把已加载的 ACMIFile 写出，kwargs 透传给 ACMIWriter"""
+    with ACMIWriter(path, **kwargs) as w:
+        w.write_file(acmi)
+    return path
+
+
+def export_acmi(src: str, dst: str, *, start: Optional[float] = None, end: Optional[float] = None,
+                ids: Optional[Iterable[int]] = None,
+                predicate: Optional[Callable[[Dict[str, str]], bool]] = None,
+                rate: Optional[float] = None, precision: Optional[int] = None,
+                zip_output: Optional[bool] = None, encoding: str = 'utf-8-sig') -> str:
+    """
+    流式导出子集：解析 src 的事件流直接写入 dst，内存只与存活对象数有关
+    ids/predicate 在解析阶段过滤；start 之前的状态合并进第一个写出的帧，越过 end 后停止读取
+    """
+    parser = ACMIParser(src, encoding=encoding)
+    with ACMIWriter(dst, zip_output, rate=rate, start=start, end=end, precision=precision) as w:
+        w.write_events(parser.events(end=end, ids=ids, predicate=predicate))
+    return dst
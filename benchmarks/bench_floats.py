@@ -0,0 +1,85 @@
+# bench_floats.py
+"""
+T= 坐标数值转换的微基准：原正则版 to_float 逐段 vs 当前 to_float 逐段 vs 批量 to_floats
+另外测一遍 ACMIParser.events 的端到端耗时(对比时把解析器换回正则版)
+用法：
+    python benchmarks/bench_floats.py
+    python benchmarks/bench_floats.py data/flyingdata0.acmi
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse import parser
+from acmiparse.utils import to_float, to_floats
+
+_FLOAT_PATTERN = re.compile(r'^[+-]?(\d+(\.\d*)?|\.\d+)([eE][+-]?\d+)?$')
+
+
+def regex_to_float(s, default=None):
+    """改动前的实现：strip + 正则 + float"""
+    s = s.strip()
+    if not s:
+        return default
+    if _FLOAT_PATTERN.match(s):
+        return float(s)
+    return default
+
+
+def regex_to_floats(text, parts):
+    return [regex_to_float(p) for p in parts]
+
+
+SAMPLES = {
+    '3段': '-0.1234567|0.7654321|8123.4',
+    '6段': '-0.1234567|0.7654321|8123.4|12.3|-3.4|271.2',
+    '9段': '-0.1234567|0.7654321|8123.4|12.3|-3.4|271.2|-12345.6|76543.2|271.2',
+    '9段含空': '-0.1234567||8123.4||-3.4|271.2|||271.2',
+}
+
+
+def micro(number):
+    print(f"{'样本':10s} {'正则逐段':>10s} {'to_float':>10s} {'to_floats':>10s}  (us/行)")
+    for name, text in SAMPLES.items():
+        parts = text.split('|')
+        r = [min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6 for fn in (
+            lambda: [regex_to_float(p) for p in parts],
+            lambda: [to_float(p) for p in parts],
+            lambda: to_floats(text, parts))]
+        print(f"{name:10s} {r[0]:10.2f} {r[1]:10.2f} {r[2]:10.2f}   x{r[0] / r[2]:.1f}")
+
+
+def end_to_end(path):
+    def run():
+        t0 = time.perf_counter()
+        for _ in parser.ACMIParser(path).events():
+            pass
+        return time.perf_counter() - t0
+
+    new = min(run() for _ in range(3))
+    saved = parser.to_floats
+    parser.to_floats = regex_to_floats
+    try:
+        old = min(run() for _ in range(3))
+    finally:
+        parser.to_floats = saved
+    print(f"events() {path}: 正则版 {old:.3f}s -> 当前 {new:.3f}s (x{old / new:.2f})")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file', nargs='?')
+    ap.add_argument('--number', type=int, default=100000)
+    args = ap.parse_args()
+    micro(args.number)
+    if args.file:
+        end_to_end(args.file)
+
+
+if __name__ == '__main__':
+    main()
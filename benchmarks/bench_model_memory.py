@@ -0,0 +1,49 @@
+# bench_model_memory.py
+"""
+对象模型加载后的常驻内存，按"每条更新"折算
+分别统计：load_acmi 结果本身、首次按 id 访问后建立的 id 索引
+用法：
+    python benchmarks/bench_model_memory.py data/flyingdata0.acmi
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse.parser import load_acmi
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file')
+    ap.add_argument('--compact-properties', action='store_true')
+    args = ap.parse_args()
+
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    acmi = load_acmi(args.file, compact_properties=args.compact_properties)
+    t_load = time.perf_counter() - t0
+    gc.collect()
+    loaded = tracemalloc.get_traced_memory()[0]
+    t0 = time.perf_counter()
+    acmi._ensure_index()
+    t_index = time.perf_counter() - t0
+    gc.collect()
+    indexed = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    n = sum(len(f.objects) for f in acmi.frames)
+    print(f"更新行数 {n}，对象 {len(acmi.ids)} 个")
+    print(f"加载   {loaded / 2**20:8.1f} MB  每行 {loaded / n:6.0f} B  耗时 {t_load:.2f}s")
+    print(f"id索引 {(indexed - loaded) / 2**20:8.1f} MB  每行 {(indexed - loaded) / n:6.0f} B  "
+          f"耗时 {t_index:.2f}s")
+    print(f"合计   {indexed / 2**20:8.1f} MB  每行 {indexed / n:6.0f} B")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+# bench_props_memory.py
+"""
+对比 dict 属性与紧凑属性表(compact_properties=True)加载后的常驻内存
+用法：
+    python benchmarks/bench_props_memory.py data/flyingdata0.acmi
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse.parser import load_acmi
+
+
+def measure(path: str, compact: bool) -> tuple:
+    gc.collect()
+    tracemalloc.start()
+    acmi = load_acmi(path, compact_properties=compact)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    updates = sum(len(f.objects) for f in acmi.frames)
+    with_props = sum(1 for f in acmi.frames for o in f.objects if o.object_properties is not None)
+    del acmi
+    return current, peak, updates, with_props
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file')
+    args = ap.parse_args()
+
+    base = measure(args.file, False)
+    compact = measure(args.file, True)
+    print(f"更新行数: {base[2]}，带属性的行: {base[3]}")
+    for name, (cur, peak, n, _) in (('dict', base), ('compact', compact)):
+        print(f"{name:8s} 常驻 {cur / 2**20:8.1f} MB  峰值 {peak / 2**20:8.1f} MB  "
+              f"每行 {cur / max(n, 1):6.0f} B")
+    saved = base[0] - compact[0]
+    print(f"节省 {saved / 2**20:.1f} MB ({saved / base[0]:.0%})，"
+          f"每条带属性的行约 {saved / max(base[3], 1):.0f} B")
+
+
+if __name__ == '__main__':
+    main()
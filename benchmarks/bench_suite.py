@@ -0,0 +1,239 @@
+# bench_suite.py
+"""
+基准测试套件：在合成(或指定)录像上测量各入口的吞吐、峰值 RSS 与首帧时间，结果存为 JSON
+每个用例在独立子进程中运行，峰值 RSS 互不干扰
+用法：
+    python benchmarks/bench_suite.py --objects 200 --rate 10 --duration 600 -o results.json
+    python benchmarks/bench_suite.py --file data/flyingdata0.acmi -o results.json
+    python benchmarks/bench_suite.py --objects 200 -o new.json --compare old.json
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse.synth import SynthConfig, write_synthetic, config_dict
+
+_REGRESSION = 0.10   # 比较时耗时增加超过 10% 视为退化
+
+
+# ---------- 用例(在子进程中执行) ----------
+def _case_events(path):
+    from acmiparse.parser import ACMIParser, _FrameBegin
+    t0 = time.perf_counter()
+    first = None
+    n = 0
+    for ev in ACMIParser(path).events():
+        if first is None and isinstance(ev, _FrameBegin):
+            first = time.perf_counter() - t0
+        n += 1
+    return {'events': n, 'first_frame_s': first}
+
+
+def _case_iter_frames(path):
+    from acmiparse.parser import ACMILoader
+    t0 = time.perf_counter()
+    first = None
+    n = 0
+    for _ in ACMILoader(path):
+        if first is None:
+            first = time.perf_counter() - t0
+        n += 1
+    return {'frames': n, 'first_frame_s': first}
+
+
+def _case_load(path, **kw):
+    from acmiparse.parser import load_acmi
+    acmi = load_acmi(path, **kw)
+    return {'frames': len(acmi.frames)}
+
+
+def _loaded(path, columnar):
+    from acmiparse.parser import load_acmi
+    acmi = load_acmi(path, columnar=columnar)
+    return acmi, time.perf_counter()
+
+
+def _case_id_index(path, columnar=False):
+    acmi, t0 = _loaded(path, columnar)
+    acmi._ensure_index()   # ids 取自加载时维护的概要，这里计时的是按 id 分组的索引本身
+    return {'ids': len(acmi.ids), '_start': t0}
+
+
+def _case_to_csv(path, columnar=False):
+    acmi, t0 = _loaded(path, columnar)
+    acmi._ensure_index()
+    t0 = time.perf_counter()
+    with open(os.devnull, 'w', newline='') as f:
+        acmi.id_to_csv(file=f)
+    return {'_start': t0}
+
+
+def _case_to_df(path, columnar=False):
+    acmi, t0 = _loaded(path, columnar)
+    acmi._ensure_index()
+    t0 = time.perf_counter()
+    df = acmi.id_to_df()
+    return {'rows': len(df), '_start': t0}
+
+
+CASES = {
+    'events': _case_events,
+    'iter_frames': _case_iter_frames,
+    'load_acmi': _case_load,
+    'load_acmi_columnar': lambda p: _case_load(p, columnar=True),
+    'load_acmi_compact_properties': lambda p: _case_load(p, compact_properties=True),
+    'id_index': _case_id_index,
+    'id_index_columnar': lambda p: _case_id_index(p, columnar=True),
+    'id_to_csv': _case_to_csv,
+    'id_to_csv_columnar': lambda p: _case_to_csv(p, columnar=True),
+    'id_to_df': _case_to_df,
+    'id_to_df_columnar': lambda p: _case_to_df(p, columnar=True),
+}
+
+
+def _run_case(name, path):
+    """子进程入口：执行一个用例并把结果 JSON 打到 stdout"""
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    extra = CASES[name](path) or {}
+    t1 = time.perf_counter()
+    start = extra.pop('_start', t0)   # 只计时用例的目标阶段(如建索引、导出)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    scale = 1 if sys.platform == 'darwin' else 1024   # Linux 单位为 KB
+    result = {'seconds': t1 - start, 'total_seconds': t1 - t0,
+              'peak_rss_mb': peak * scale / 2**20,
+              'peak_rss_delta_mb': (peak - base_rss) * scale / 2**20}
+    result.update(extra)
+    print(json.dumps(result))
+
+
+# ---------- 主进程 ----------
+def _file_stats(path):
+    from acmiparse.reader import ACMIFileReader
+    lines = 0
+    nbytes = 0
+    for line in ACMIFileReader(path).read_raw_lines():
+        lines += 1
+        nbytes += len(line) + 1
+    return {'path': path, 'size_bytes': os.path.getsize(path), 'decoded_bytes': nbytes, 'lines': lines}
+
+
+def _git_rev():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _best(name, path, repeat):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-case', name, path],
+                             capture_output=True, text=True)
+        if out.returncode != 0:
+            return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'failed'}
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r['seconds'])
+    best['peak_rss_mb'] = max(r['peak_rss_mb'] for r in runs)
+    best['runs'] = [r['seconds'] for r in runs]
+    return best
+
+
+def _compare(results, old_path):
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)['results']
+    print(f"\n与 {old_path} 比较(耗时比 新/旧)：")
+    worse = []
+    for name, r in results.items():
+        o = old.get(name)
+        if not o or 'seconds' not in o or 'seconds' not in r:
+            continue
+        ratio = r['seconds'] / o['seconds']
+        flag = '  <-- 退化' if ratio > 1 + _REGRESSION else ''
+        print(f"  {name:30s} x{ratio:5.2f}  RSS {o['peak_rss_mb']:7.1f} -> {r['peak_rss_mb']:7.1f} MB{flag}")
+        if flag:
+            worse.append(name)
+    return worse
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--file', help='使用已有录像而不是生成合成录像')
+    ap.add_argument('--objects', type=int, default=100)
+    ap.add_argument('--rate', type=float, default=10.0)
+    ap.add_argument('--duration', type=float, default=300.0)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--zip', action='store_true', help='合成录像写成 .zip.acmi')
+    ap.add_argument('--cases', nargs='*', default=list(CASES), choices=list(CASES))
+    ap.add_argument('--repeat', type=int, default=3)
+    ap.add_argument('-o', '--output', help='结果 JSON 路径')
+    ap.add_argument('--compare', help='与旧的结果 JSON 比较，存在退化时退出码为 1')
+    ap.add_argument('--run-case', nargs=2, metavar=('NAME', 'PATH'), help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.run_case:
+        _run_case(*args.run_case)
+        return 0
+
+    tmpdir = None
+    synth = None
+    path = args.file
+    if path is None:
+        cfg = SynthConfig(objects=args.objects, rate=args.rate, duration=args.duration, seed=args.seed)
+        tmpdir = tempfile.mkdtemp(prefix='acmibench-')
+        path = os.path.join(tmpdir, 'synthetic.zip.acmi' if args.zip else 'synthetic.acmi')
+        write_synthetic(path, cfg)
+        synth = config_dict(cfg)
+
+    stats = _file_stats(path)
+    print(f"{path}: {stats['lines']:,} 行, 解码后 {stats['decoded_bytes'] / 1e6:.1f} MB, "
+          f"文件 {stats['size_bytes'] / 1e6:.1f} MB")
+    results = {}
+    try:
+        for name in args.cases:
+            r = _best(name, path, args.repeat)
+            if 'seconds' in r:
+                r['lines_per_s'] = stats['lines'] / r['seconds']
+                r['mb_per_s'] = stats['decoded_bytes'] / 1e6 / r['seconds']
+                ttff = r.get('first_frame_s')
+                print(f"  {name:30s} {r['seconds']:8.3f}s {r['lines_per_s']:12,.0f} 行/s "
+                      f"{r['mb_per_s']:7.1f} MB/s  峰值RSS {r['peak_rss_mb']:7.1f} MB"
+                      + (f"  首帧 {ttff * 1e3:.1f} ms" if ttff is not None else ''))
+            else:
+                print(f"  {name:30s} 失败: {r['error']}")
+            results[name] = r
+    finally:
+        if tmpdir:
+            for fn in os.listdir(tmpdir):
+                os.remove(os.path.join(tmpdir, fn))
+            os.rmdir(tmpdir)
+
+    report = {
+        'git_rev': _git_rev(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'input': {**stats, 'synthetic': synth},
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.output}")
+    if args.compare:
+        return 1 if _compare(results, args.compare) else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
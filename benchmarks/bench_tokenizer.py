@@ -0,0 +1,166 @@
+"""
+对比旧的正则级联解析与新的首字符分类解析的吞吐(行/秒)
+用法：
+    python benchmarks/bench_tokenizer.py path/to/recording.acmi [--repeat 3]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse.model import *
+from acmiparse.utils import to_float
+from acmiparse.parser import (ACMIParser, _HeaderParsed, _GlobalProp, _FrameBegin,
+                              _ObjectUpdate, _ObjectRemove, logger)
+
+
+class LegacyParser(ACMIParser):
+    """改写前的 events() 实现，仅用于基准对比"""
+    _RE_FRAME    = re.compile(r'^#\s*([0-9.+-]+)\s*$')
+    _RE_REMOVE   = re.compile(r'^-([0-9a-fA-F]+)\s*$')
+    _RE_COMMENT  = re.compile(r'^\s*//')
+    _RE_UPDATE   = re.compile(r'^([0-9a-fA-F]+),(.*)$')
+
+    def events(self):
+        header_done = False
+        global_prop_done = False
+        header = ACMIHeader()
+
+        for raw in self.reader.read_lines():
+            if not raw or self._RE_COMMENT.match(raw):
+                continue
+            if not header_done:
+                m = self._RE_HEADER.match(raw)
+                if m:
+                    key, val = m.groups()
+                    if key == 'FileType':
+                        header.file_type = val
+                    elif key == 'FileVersion':
+                        header.file_version = val
+                    continue
+                else:
+                    yield _HeaderParsed(header)
+                    header_done = True
+            if not global_prop_done:
+                m = self._RE_UPDATE.match(raw)
+                if m:
+                    oid_hex, body = m.groups()
+                    oid = int(oid_hex, 16)
+                    k, v = self._parse_global_props(body)
+                    if k in ACMIPropertyRegistry.GLOBAL_PROPERTIES_ALLOWED_KEYS:
+                        yield _GlobalProp(oid, k, v)
+                        continue
+                    else:
+                        global_prop_done = True
+            m = self._RE_UPDATE.match(raw)
+            if m:
+                oid_hex, body = m.groups()
+                oid = int(oid_hex, 16)
+                coords, event, props = self._parse_body(oid, body)
+                yield _ObjectUpdate(oid, coords, event, props)
+                continue
+            m = self._RE_FRAME.match(raw)
+            if m:
+                self._time = float(m.group(1))
+                yield _FrameBegin(self._time)
+                continue
+            m = self._RE_REMOVE.match(raw)
+            if m:
+                yield _ObjectRemove(self._time, int(m.group(1), 16))
+                continue
+
+    def _parse_body(self, id, body):
+        coords = None
+        props = None
+        event = None
+        for kv in self._RE_SPLIT.split(body):
+            k, v = kv.split('=', 1)
+            k = k.strip()
+            v = v.strip()
+            if k == 'T':
+                coords = ACMIObjectCoordinates(object_id=id)
+                parts = v.split('|')
+                n = len(parts)
+                if n == 3:
+                    coords.longitude = to_float(parts[0])
+                    coords.latitude  = to_float(parts[1])
+                    coords.altitude  = to_float(parts[2])
+                elif n == 5:
+                    coords.longitude = to_float(parts[0])
+                    coords.latitude  = to_float(parts[1])
+                    coords.altitude  = to_float(parts[2])
+                    coords.u         = to_float(parts[3])
+                    coords.v         = to_float(parts[4])
+                elif n == 6:
+                    coords.longitude = to_float(parts[0])
+                    coords.latitude  = to_float(parts[1])
+                    coords.altitude  = to_float(parts[2])
+                    coords.roll      = to_float(parts[3])
+                    coords.pitch     = to_float(parts[4])
+                    coords.yaw       = to_float(parts[5])
+                elif n == 9:
+                    coords.longitude = to_float(parts[0])
+                    coords.latitude  = to_float(parts[1])
+                    coords.altitude  = to_float(parts[2])
+                    coords.roll      = to_float(parts[3])
+                    coords.pitch     = to_float(parts[4])
+                    coords.yaw       = to_float(parts[5])
+                    coords.u         = to_float(parts[6])
+                    coords.v         = to_float(parts[7])
+                    coords.heading   = to_float(parts[8])
+                else:
+                    logger.warning(f"无法解析坐标: {v}")
+            elif k == 'Event':
+                parts = v.split('|')
+                event = ACMIEvent(id, parts[0], [int(x, 16) for x in parts[1:-1] if x.strip()],
+                                  parts[-1] if len(parts) > 1 else '')
+            else:
+                props = ACMIObjectProperties() if not props else props
+                if k in ACMIPropertyRegistry.OBJECT_PROPERTIES_ALLOWED_TEXT_KEYS:
+                    props.text_properties = props.text_properties or {}
+                    props.text_properties[k] = v
+                elif k in ACMIPropertyRegistry.OBJECT_PROPERTIES_ALLOWED_NUMERIC_KEYS:
+                    props.numeric_properties = props.numeric_properties or {}
+                    props.numeric_properties[k] = float(v)
+                else:
+                    props.text_properties = props.text_properties or {}
+                    props.text_properties[k] = v
+        return coords, event, props
+
+
+def _run(make_events, repeat: int):
+    best = float('inf')
+    n = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        n = sum(1 for _ in make_events())
+        best = min(best, time.perf_counter() - t0)
+    return n, best
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args(argv)
+
+    lines = sum(1 for _ in ACMIParser(args.file).reader.read_raw_lines())
+    size = os.path.getsize(args.file)
+    cases = [
+        ('legacy regex events()', lambda: LegacyParser(args.file).events()),
+        ('events() (bytes lines)', lambda: ACMIParser(args.file).events()),
+        ('parse_lines(str lines)', lambda: (lambda p: p.parse_lines(p.reader.read_lines()))(ACMIParser(args.file))),
+    ]
+    base = None
+    print(f'{args.file}: {lines} lines, {size / 1e6:.1f} MB')
+    for name, make in cases:
+        n, t = _run(make, args.repeat)
+        base = base or t
+        print(f'{name:26s} {t:8.3f}s {lines / t:12,.0f} lines/s  x{base / t:.2f}  ({n} events)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+# bench_zip_pipeline.py
+"""
+压缩包输入：单线程按块解压切行 vs 后台线程解压的流水线
+分别测只读行(解压 + 切行)与 ACMIParser.events 端到端，并记录峰值内存(tracemalloc)
+流水线的收益来自解压与解析在两个核上重叠，单核机器上两者应基本持平
+用法：
+    python benchmarks/bench_zip_pipeline.py data/flyingdata0.zip.acmi
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from acmiparse import reader as reader_mod
+from acmiparse.parser import ACMIParser
+
+
+def run(path, pipeline, what):
+    p = ACMIParser(path)
+    p.reader.pipeline = pipeline
+    src = p.reader.read_raw_lines() if what == 'lines' else p.events()
+    t0 = time.perf_counter()
+    for _ in src:
+        pass
+    return time.perf_counter() - t0
+
+
+def peak(path, pipeline):
+    tracemalloc.start()
+    run(path, pipeline, 'lines')
+    _, top = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return top / 2 ** 20
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('file')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"cpu={os.cpu_count()} depth={reader_mod.PIPELINE_DEPTH} block={reader_mod.DEFAULT_BLOCK_SIZE}")
+    for what in ('lines', 'events'):
+        single = min(run(args.file, False, what) for _ in range(args.repeat))
+        piped = min(run(args.file, True, what) for _ in range(args.repeat))
+        print(f"{what:7s} 单线程 {single:.3f}s  流水线 {piped:.3f}s  (x{single / piped:.2f})")
+    print(f"峰值内存(只读行) 单线程 {peak(args.file, False):.1f}MB  流水线 {peak(args.file, True):.1f}MB")
+
+
+if __name__ == '__main__':
+    main()